@@ -0,0 +1,191 @@
+"""
+Exact integer token amounts and a cached token metadata registry.
+
+Amounts are ints in the token's smallest unit; human amounts are decimal
+strings. Nothing here goes through float: parse_units("0.1", 18) is
+exactly 10**17, format_units() prints every digit, and slippage math is
+floor division on ints.
+
+TokenRegistry reads decimals() and symbol() once per token address and
+persists them (token_registry.json next to this file, AGENT_TOKEN_REGISTRY
+overrides), so amounts are scaled by each token's real decimals instead of
+assuming 18, without an RPC call per conversion.
+
+Usage:
+    TOKENS.ensure(w3, [route['token0'], route['token1']])
+    cap_wei = parse_units("100", TOKENS.decimals(route['token0']))
+    min_out = apply_bps(quoted_out, slippage_bps)
+"""
+import json
+import os
+from dataclasses import dataclass
+from decimal import Decimal
+from fractions import Fraction
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+DEFAULT_DECIMALS = 18
+
+REGISTRY_PATH = Path(os.getenv("AGENT_TOKEN_REGISTRY", Path(__file__).resolve().parent / "token_registry.json"))
+
+# Minimal ERC20 ABI: metadata views
+ERC20_METADATA_ABI = [
+    {"constant": True, "inputs": [], "name": "decimals",
+     "outputs": [{"name": "", "type": "uint8"}], "type": "function"},
+    {"constant": True, "inputs": [], "name": "symbol",
+     "outputs": [{"name": "", "type": "string"}], "type": "function"},
+]
+
+
+def _fraction(amount) -> Fraction:
+    if isinstance(amount, float):
+        # Shortest round-trip repr: 0.1 is "0.1", not 0.1000000000000000055...
+        # (float() first: numpy scalars repr as "np.float64(...)")
+        amount = repr(float(amount))
+    try:
+        return Fraction(amount.strip() if isinstance(amount, str) else amount)
+    except (ValueError, TypeError, ZeroDivisionError):
+        raise ValueError(f"Invalid token amount: {amount!r}")
+
+
+def parse_units(amount, decimals: int = DEFAULT_DECIMALS) -> int:
+    """
+    Human amount -> smallest units, exactly.
+
+    Args:
+        amount: Decimal string ("1.5", "2e-3"), int, Decimal, Fraction or
+            float (taken at its shortest repr)
+        decimals: Token decimals
+
+    Returns:
+        int: Amount in smallest units; digits beyond `decimals` are truncated
+    """
+    if isinstance(amount, int):
+        return amount * 10 ** decimals
+    return int(_fraction(amount) * 10 ** decimals)
+
+
+def format_units(amount: int, decimals: int = DEFAULT_DECIMALS, places: Optional[int] = None) -> str:
+    """
+    Smallest units -> decimal string, exactly.
+
+    Args:
+        amount: Integer amount
+        decimals: Token decimals
+        places: Fixed number of fraction digits (truncated); default: as
+            many as needed, trailing zeros stripped
+    """
+    amount = int(amount)
+    sign = "-" if amount < 0 else ""
+    whole, frac = divmod(abs(amount), 10 ** decimals)
+    digits = str(frac).rjust(decimals, "0") if decimals else ""
+    if places is None:
+        digits = digits.rstrip("0")
+    else:
+        digits = digits[:places].ljust(places, "0")
+    return f"{sign}{whole}.{digits}" if digits else f"{sign}{whole}"
+
+
+def to_decimal(amount: int, decimals: int = DEFAULT_DECIMALS) -> Decimal:
+    """Smallest units -> exact Decimal (formats with :.4f, compares with numbers)."""
+    return Decimal(f"{int(amount)}E-{decimals}")
+
+
+def apply_bps(amount: int, bps) -> int:
+    """
+    floor(amount * (10000 - bps) / 10000), exactly.
+
+    bps may be fractional (12.5); ints stay on the pure integer path.
+    """
+    if isinstance(bps, float) and bps.is_integer():
+        bps = int(bps)
+    elif not isinstance(bps, int):
+        bps = _fraction(bps)
+    return int(amount * (10000 - bps) // 10000)
+
+
+@dataclass(frozen=True)
+class TokenInfo:
+    """Cached ERC20 metadata."""
+    address: str
+    symbol: str
+    decimals: int
+
+
+class TokenRegistry:
+    """
+    decimals()/symbol() per token address, read once and persisted.
+
+    lookup()/decimals()/symbol() never touch the chain; get()/ensure()
+    read unknown tokens and write the cache file.
+    """
+
+    def __init__(self, path: Path = REGISTRY_PATH):
+        self.path = Path(path)
+        self._tokens: Optional[Dict[str, TokenInfo]] = None
+
+    def _load(self) -> Dict[str, TokenInfo]:
+        if self._tokens is None:
+            self._tokens = {}
+            try:
+                with open(self.path, "r") as f:
+                    for address, info in json.load(f).items():
+                        self._tokens[address] = TokenInfo(address, info["symbol"], int(info["decimals"]))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"  [Warning: Ignoring unreadable token registry {self.path}: {e}]")
+        return self._tokens
+
+    def _save(self) -> None:
+        data = {a: {"symbol": t.symbol, "decimals": t.decimals} for a, t in sorted(self._load().items())}
+        try:
+            tmp_path = self.path.with_suffix(".json.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, indent=2)
+            tmp_path.replace(self.path)
+        except Exception as e:
+            print(f"  [Warning: Failed to write token registry: {e}]")
+
+    def lookup(self, address: Optional[str]) -> Optional[TokenInfo]:
+        """Cached metadata (None if the token was never read)."""
+        if not address:
+            return None
+        return self._load().get(address.lower())
+
+    def decimals(self, address: Optional[str], default: int = DEFAULT_DECIMALS) -> int:
+        info = self.lookup(address)
+        return info.decimals if info else default
+
+    def symbol(self, address: Optional[str], default: Optional[str] = None) -> Optional[str]:
+        info = self.lookup(address)
+        return info.symbol if info else default
+
+    def get(self, w3, address: str) -> TokenInfo:
+        """Metadata for a token, read from the chain on first use."""
+        info = self.lookup(address)
+        if info is not None:
+            return info
+        token = w3.eth.contract(address=address, abi=ERC20_METADATA_ABI)
+        decimals = int(token.functions.decimals().call())
+        try:
+            symbol = token.functions.symbol().call()
+        except Exception:
+            # symbol() is optional in ERC20
+            symbol = address[:10]
+        info = TokenInfo(address.lower(), symbol, decimals)
+        self._load()[info.address] = info
+        self._save()
+        return info
+
+    def ensure(self, w3, addresses: Iterable[str]) -> None:
+        """Read every unknown token in `addresses` (failures keep the defaults)."""
+        for address in dict.fromkeys(a for a in addresses if a):
+            try:
+                self.get(w3, address)
+            except Exception as e:
+                print(f"  [Warning: Could not read token metadata for {address}: {e}]")
+
+
+# Process-wide registry
+TOKENS = TokenRegistry()
@@ -0,0 +1,618 @@
+"""
+Historical backtester for registry strategies.
+
+Streams a tick file through build_policy(name, params) and simulates the
+vault rules an agent runs under:
+    - sub-balance depletion: executed BUYs debit the agent sub-balance and
+      size every later intent (amount_in = min(sub_balance, cap, default))
+    - per-trade cap: the agent config cap feeds ctx like loop_agent does
+    - maxNotionalPerTrade: approval fails (CAP_EXCEEDED) above it
+    - slippage: a fill below the intent's min_amount_out is rejected
+    - approval delay: requestExecution -> approveAndExecute takes
+      APPROVAL_DELAY seconds of tick time, and only one request can be
+      pending (further SWAP intents hit REQUEST_EXISTS and are counted as
+      blocked)
+
+Tick files are .jsonl (one signals.json dict per line) or .csv (a header
+with signal field names). They are memory-mapped and parsed line by line, so
+multi-gigabyte files are never loaded whole. Times come from the
+"timestamp" field (ISO 8601 or epoch seconds), or the row index in seconds.
+
+Two engines produce the same results:
+    - stream: calls policy.decide() on every tick, works for any policy
+    - columns: loads best_bid/best_ask/time as float64 arrays (24 bytes per
+      tick), takes decisions from a vectorized policy.decide_batch() and
+      only walks request/approval events in Python
+"auto" picks columns when the policy has a vectorized decide_batch(). The
+columns carry no order-book levels, so a depth-aware policy (uses_depth)
+on ticks with "asks" levels always runs on the stream engine.
+
+Usage:
+    python tickgen.py --mode record --count 1000000 --out /tmp/ticks.jsonl
+    python backtest.py --strategy sniper --params '{"target_price": 1.0}' --ticks /tmp/ticks.jsonl
+    python backtest.py --strategy arb --ticks ticks.csv --approval-delay 60 --fee-bps 30
+"""
+import argparse
+import json
+import mmap
+import time
+from array import array
+from datetime import datetime
+from pathlib import Path
+
+from amounts import apply_bps
+
+WEI = 10 ** 18
+
+# Signal fields parsed as floats when reading CSV tick files
+PRICE_FIELDS = ("best_bid", "best_ask", "spread", "op_bid", "pm_ask")
+
+
+def _parse_time(value, default):
+    """Tick time in seconds from an ISO 8601 string or epoch number."""
+    if value is None or value == "":
+        return float(default)
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def _iter_jsonl(mm):
+    for index, line in enumerate(iter(mm.readline, b"")):
+        line = line.strip()
+        if not line:
+            continue
+        signal = json.loads(line)
+        yield _parse_time(signal.get("timestamp"), index), signal
+
+
+def _iter_csv(mm):
+    header = mm.readline().decode().strip().split(",")
+    for index, line in enumerate(iter(mm.readline, b"")):
+        values = line.decode().rstrip("\r\n").split(",")
+        if len(values) != len(header):
+            continue
+        signal = {}
+        for key, value in zip(header, values):
+            # Empty cells are missing fields (strategies HOLD on no_signal)
+            if value != "":
+                signal[key] = float(value) if key in PRICE_FIELDS else value
+        yield _parse_time(signal.get("timestamp"), index), signal
+
+
+def iter_ticks(path):
+    """
+    Stream ticks from a .jsonl or .csv file.
+
+    The file is memory-mapped, so pages are read on demand and can be
+    evicted again; memory use does not grow with the file size.
+
+    Args:
+        path: Tick file path
+
+    Yields:
+        tuple: (time in seconds, signal dict)
+    """
+    path = Path(path)
+    if path.stat().st_size == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if path.suffix == ".csv":
+            yield from _iter_csv(mm)
+        else:
+            yield from _iter_jsonl(mm)
+
+
+def load_columns(path):
+    """
+    Load tick times, best bids and best asks as float64 arrays.
+
+    Missing prices are NaN (decide_batch treats them as no signal). Rows are
+    appended to compact C arrays while streaming, then wrapped without a copy.
+    Order-book levels are not loaded; "depth" tells whether any tick had them.
+
+    Args:
+        path: Tick file path
+
+    Returns:
+        dict: {"times", "bids", "asks"} numpy arrays, "depth" bool
+    """
+    import numpy as np
+
+    nan = float("nan")
+    times, bids, asks = array("d"), array("d"), array("d")
+    depth = False
+    for t, signal in iter_ticks(path):
+        times.append(t)
+        bids.append(signal.get("best_bid", nan))
+        asks.append(signal.get("best_ask", nan))
+        if not depth and isinstance(signal.get("asks"), list):
+            depth = True
+    return {
+        "times": np.frombuffer(times, dtype=np.float64),
+        "bids": np.frombuffer(bids, dtype=np.float64),
+        "asks": np.frombuffer(asks, dtype=np.float64),
+        "depth": depth,
+    }
+
+
+class VaultModel:
+    """
+    Simulated SafeAgentVault accounting for one agent.
+
+    Balances are integer wei: sub_balance in token0, position in token1.
+    A request is approved approval_delay seconds after it is made and fills
+    at the quote of the first tick at or after that time (BUY at the ask,
+    SELL at the bid), less fee_bps. The contract's approveAndExecute does not
+    debit agentBalances yet; the model debits like executeSwap does, so
+    the sub-balance depletes as it will on-chain.
+    """
+
+    def __init__(self, sub_balance_wei, max_notional_wei, approval_delay=0.0, fee_bps=0):
+        """
+        Initialize model.
+
+        Args:
+            sub_balance_wei: Initial agent sub-balance (token0, wei)
+            max_notional_wei: Vault maxNotionalPerTrade (wei)
+            approval_delay: Seconds between request and owner approval
+            fee_bps: Pool fee in basis points
+        """
+        self.initial_balance = sub_balance_wei
+        self.sub_balance = sub_balance_wei
+        self.position = 0
+        self.max_notional = max_notional_wei
+        self.approval_delay = approval_delay
+        self.fee_bps = fee_bps
+
+        # (due time, amount_in, zero_for_one, min_amount_out) or None
+        self.pending = None
+        self.requests = 0
+        self.executed = 0
+        self.rejected = {"cap_exceeded": 0, "slippage": 0, "insufficient_balance": 0}
+        self.turnover = 0
+        self.fees = 0
+
+    def request(self, t, amount_in, zero_for_one, min_amount_out):
+        """Record a requestExecution at tick time t."""
+        self.pending = (t + self.approval_delay, amount_in, zero_for_one, min_amount_out)
+        self.requests += 1
+
+    def execute(self, bid, ask):
+        """
+        Approve and fill the pending request at the given quote.
+
+        Returns:
+            bool: True if the swap executed, False if it was rejected
+        """
+        _, amount_in, zero_for_one, min_amount_out = self.pending
+        self.pending = None
+
+        if amount_in > self.max_notional:
+            self.rejected["cap_exceeded"] += 1
+            return False
+        if amount_in > (self.sub_balance if zero_for_one else self.position):
+            self.rejected["insufficient_balance"] += 1
+            return False
+
+        gross = amount_in / ask if zero_for_one else amount_in * bid
+        fee = gross * self.fee_bps / 10000
+        amount_out = int(gross - fee)
+        if amount_out < min_amount_out:
+            self.rejected["slippage"] += 1
+            return False
+
+        if zero_for_one:
+            self.sub_balance -= amount_in
+            self.position += amount_out
+            self.turnover += amount_in
+            self.fees += int(fee * ask)
+        else:
+            self.position -= amount_in
+            self.sub_balance += amount_out
+            self.turnover += amount_out
+            self.fees += int(fee)
+        self.executed += 1
+        return True
+
+
+def _report(vault, ticks, blocked, equity, max_dd, max_dd_pct, elapsed, engine):
+    initial = vault.initial_balance
+    pnl = equity - initial
+    return {
+        "engine": engine,
+        "ticks": ticks,
+        "requests": vault.requests,
+        "executed": vault.executed,
+        "rejected": dict(vault.rejected),
+        "blocked": blocked,
+        "pending_at_end": vault.pending is not None,
+        "pnl": pnl / WEI,
+        "pnl_pct": pnl / initial * 100 if initial else 0.0,
+        "turnover": vault.turnover / WEI,
+        "fees": vault.fees / WEI,
+        "max_drawdown": max_dd / WEI,
+        "max_drawdown_pct": max_dd_pct * 100,
+        "final_sub_balance": vault.sub_balance / WEI,
+        "final_position": vault.position / WEI,
+        "elapsed_s": round(elapsed, 3),
+        "ticks_per_s": round(ticks / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def simulate_stream(policy, ticks, vault, cap_wei, slippage_bps=50, default_amount_in_wei=None):
+    """
+    Backtest by calling policy.decide() on every tick.
+
+    Args:
+        policy: BasePolicy instance
+        ticks: Iterable of (time, signal) pairs, e.g. iter_ticks(path)
+        vault: VaultModel (mutated)
+        cap_wei: Agent config cap (max_per_trade_wei / cap_wei in ctx)
+        slippage_bps: Slippage tolerance in basis points
+        default_amount_in_wei: Default trade size (default: cap)
+
+    Returns:
+        dict: Backtest report
+    """
+    started = time.perf_counter()
+    strategy_state = {}
+    ctx = {
+        "signal": {},
+        "sub_balance_wei": vault.sub_balance,
+        "max_per_trade_wei": cap_wei,
+        "default_amount_in_wei": cap_wei if default_amount_in_wei is None else default_amount_in_wei,
+        "cap_wei": cap_wei,
+        "slippage_bps": slippage_bps,
+        "strategy_state": strategy_state,
+    }
+
+    engine = None
+    if policy.features:
+        from strategies.indicators import IndicatorEngine
+        engine = IndicatorEngine()
+
+    last_bid = last_ask = float("nan")
+    peak = float("-inf")
+    equity = float(vault.sub_balance)
+    max_dd = max_dd_pct = 0.0
+    blocked = 0
+    count = 0
+
+    for t, signal in ticks:
+        count += 1
+        bid = signal.get("best_bid")
+        if bid is not None:
+            last_bid = bid
+        ask = signal.get("best_ask")
+        if ask is not None:
+            last_ask = ask
+
+        # The owner's approval lands before the agent's next decision
+        if vault.pending is not None and t >= vault.pending[0]:
+            vault.execute(last_bid, last_ask)
+
+        ctx["signal"] = signal
+        ctx["sub_balance_wei"] = vault.sub_balance
+        if engine is not None:
+            ctx["features"] = engine.compute((policy,), signal)[0]
+        intent = policy.decide(ctx)
+        if intent.action == "SWAP":
+            if vault.pending is not None:
+                # REQUEST_EXISTS: the request reverts
+                blocked += 1
+                policy.unsent(strategy_state, intent)
+            else:
+                vault.request(t, intent.amount_in, intent.zero_for_one, intent.min_amount_out)
+
+        equity = vault.sub_balance + vault.position * last_bid if vault.position else float(vault.sub_balance)
+        if equity > peak:
+            peak = equity
+        drawdown = peak - equity
+        if drawdown > max_dd:
+            max_dd = drawdown
+        if peak > 0 and drawdown / peak > max_dd_pct:
+            max_dd_pct = drawdown / peak
+
+    return _report(vault, count, blocked, equity, max_dd, max_dd_pct,
+                   time.perf_counter() - started, "stream")
+
+
+def forward_fill(values):
+    """Replace NaNs with the last valid value (leading NaNs stay NaN)."""
+    import numpy as np
+
+    valid = ~np.isnan(values)
+    index = np.where(valid, np.arange(len(values)), 0)
+    np.maximum.accumulate(index, out=index)
+    return values[index]
+
+
+class RowVault:
+    """
+    VaultModel walked row by row from inside policy.decide_batch(vault=...).
+
+    For policies whose decisions depend on their own requests (they override
+    unsent()): the balance sizing row i and the fate of a request at row i
+    follow the stream engine's rules. A request is approved at the first
+    tick at or after its due time (and after the request tick) and fills at
+    the last known quotes there; it is settled lazily, before the next row
+    that asks.
+    """
+
+    def __init__(self, vault, times, fill_bids, fill_asks):
+        self.vault = vault
+        self.times = times
+        self.fill_bids = fill_bids
+        self.fill_asks = fill_asks
+        self.blocked = 0
+        # (first tick index, sub_balance, position) after each executed swap
+        self.segments = [(0, vault.sub_balance, vault.position)]
+        self._due = None  # tick index at which the pending request is approved
+
+    def settle(self, i):
+        """Approve the pending request if it is due by row i."""
+        k = self._due
+        if k is not None and k <= i:
+            self._due = None
+            if self.vault.execute(float(self.fill_bids[k]), float(self.fill_asks[k])):
+                self.segments.append((k, self.vault.sub_balance, self.vault.position))
+
+    def sub_balance(self, i):
+        self.settle(i)
+        return self.vault.sub_balance
+
+    def request(self, i, intent):
+        """requestExecution at row i; False if another request is still pending."""
+        import numpy as np
+
+        self.settle(i)
+        if self.vault.pending is not None:
+            self.blocked += 1
+            return False
+        self.vault.request(float(self.times[i]), intent.amount_in, intent.zero_for_one, intent.min_amount_out)
+        self._due = max(int(np.searchsorted(self.times, self.vault.pending[0])), i + 1)
+        return True
+
+
+def _equity_stats(segments, fill_bids, n):
+    """(final equity, max drawdown, max drawdown share) of a piecewise-constant book."""
+    import numpy as np
+
+    bounds = [s[0] for s in segments] + [n]
+    lengths = np.diff(bounds)
+    cash = np.repeat(np.array([float(s[1]) for s in segments]), lengths)
+    position = np.repeat(np.array([float(s[2]) for s in segments]), lengths)
+    equity = cash + np.where(position != 0, position * fill_bids, 0.0)
+
+    peak = np.maximum.accumulate(equity)
+    drawdown = peak - equity
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(peak > 0, drawdown / peak, 0.0)
+    return float(equity[-1]), float(drawdown.max()), float(ratio.max())
+
+
+def simulate_columns(policy, columns, vault, cap_wei, slippage_bps=50, default_amount_in_wei=None):
+    """
+    Backtest from tick columns using policy.decide_batch().
+
+    Decisions are taken for all ticks at once with the balance held at the
+    cap; the sub-balance only changes sizing, which is applied per request
+    with the same rule the built-in policies use. Policies whose decisions
+    depend on their own requests (has_request_state()) instead get a
+    RowVault to size and request through, row by row. Gives the same report
+    as simulate_stream() for policies whose decide_batch() matches decide().
+
+    Args:
+        policy: BasePolicy instance
+        columns: {"times", "bids", "asks"} arrays, e.g. load_columns(path);
+            times must be non-decreasing
+        vault: VaultModel (mutated)
+        cap_wei: Agent config cap
+        slippage_bps: Slippage tolerance in basis points
+        default_amount_in_wei: Default trade size (default: cap)
+
+    Returns:
+        dict: Backtest report
+    """
+    started = time.perf_counter()
+    times, bids, asks = columns["times"], columns["bids"], columns["asks"]
+    n = len(times)
+    default = cap_wei if default_amount_in_wei is None else default_amount_in_wei
+
+    # Last known quotes; callers replaying many configs can precompute these
+    fill_bids = columns["fill_bids"] if "fill_bids" in columns else forward_fill(bids)
+    fill_asks = columns["fill_asks"] if "fill_asks" in columns else forward_fill(asks)
+
+    if has_request_state(policy):
+        rows = RowVault(vault, times, fill_bids, fill_asks)
+        policy.decide_batch(bids, asks, cap_wei, cap_wei, slippage_bps, default, vault=rows)
+        rows.settle(n - 1)
+        segments, blocked = rows.segments, rows.blocked
+    else:
+        segments, blocked = _walk_candidates(policy, times, bids, asks, fill_bids, fill_asks,
+                                             vault, cap_wei, slippage_bps, default)
+
+    if n:
+        final_equity, max_dd, max_dd_pct = _equity_stats(segments, fill_bids, n)
+    else:
+        max_dd = max_dd_pct = 0.0
+        final_equity = float(vault.sub_balance)
+
+    return _report(vault, n, blocked, final_equity, max_dd, max_dd_pct,
+                   time.perf_counter() - started, "columns")
+
+
+def _walk_candidates(policy, times, bids, asks, fill_bids, fill_asks, vault, cap_wei, slippage_bps, default):
+    """
+    Request/approval events of a policy whose decisions ignore its requests.
+
+    Returns:
+        tuple: (segments, blocked), see RowVault
+    """
+    import numpy as np
+
+    n = len(times)
+    batch = policy.decide_batch(bids, asks, cap_wei, cap_wei, slippage_bps, default)
+    candidates = np.flatnonzero(batch.swap)
+    zero_for_one = batch.zero_for_one
+
+    segments = [(0, vault.sub_balance, vault.position)]
+    blocked = 0
+    start = 0
+    while True:
+        j = int(np.searchsorted(candidates, start))
+        if j >= len(candidates):
+            break
+        i = int(candidates[j])
+
+        amount_in = min(vault.sub_balance, cap_wei)
+        if default > 0:
+            amount_in = min(amount_in, default)
+        if amount_in <= 0:
+            # decide() HOLDs with insufficient_balance here; keep scanning
+            start = i + 1
+            continue
+        min_amount_out = apply_bps(amount_in, slippage_bps)
+        vault.request(float(times[i]), amount_in, bool(zero_for_one[i]), min_amount_out)
+
+        k = max(int(np.searchsorted(times, vault.pending[0])), i + 1)
+        if k >= n:
+            blocked += len(candidates) - j - 1
+            break
+        blocked += int(np.searchsorted(candidates, k)) - j - 1
+        if vault.execute(float(fill_bids[k]), float(fill_asks[k])):
+            segments.append((k, vault.sub_balance, vault.position))
+        start = k
+    return segments, blocked
+
+
+def iter_columns(columns):
+    """Stream (time, signal) pairs from tick columns (NaN prices omitted)."""
+    for t, bid, ask in zip(columns["times"].tolist(), columns["bids"].tolist(), columns["asks"].tolist()):
+        signal = {}
+        if bid == bid:
+            signal["best_bid"] = bid
+        if ask == ask:
+            signal["best_ask"] = ask
+        yield t, signal
+
+
+def has_request_state(policy):
+    """True if the policy's decisions depend on its own requests (it overrides unsent())."""
+    from strategies.base import BasePolicy
+
+    return type(policy).unsent is not BasePolicy.unsent
+
+
+def needs_depth(policy, columns):
+    """True if the policy sizes from order-book levels the columns dropped."""
+    return bool(columns.get("depth")) and policy.uses_depth
+
+
+def has_batch_decide(policy):
+    """True if the policy overrides decide_batch() with a vectorized version."""
+    from strategies.base import BasePolicy
+
+    return type(policy).decide_batch is not BasePolicy.decide_batch
+
+
+def run_backtest(strategy, params, ticks_path, sub_balance=150, cap=100, max_notional=None,
+                 slippage_bps=50, approval_delay=0.0, fee_bps=0, engine="auto"):
+    """
+    Backtest a registry strategy on a tick file.
+
+    Args:
+        strategy: Registry strategy name
+        params: strategyParams dict
+        ticks_path: .jsonl or .csv tick file
+        sub_balance: Initial agent sub-balance (tokens)
+        cap: Agent config cap (tokens)
+        max_notional: Vault maxNotionalPerTrade (tokens, default: cap)
+        slippage_bps: Slippage tolerance in basis points
+        approval_delay: Seconds between request and approval
+        fee_bps: Pool fee in basis points
+        engine: "auto", "stream" or "columns" (falls back to stream when
+            the policy needs the ticks' order-book levels)
+
+    Returns:
+        dict: Backtest report
+    """
+    from strategies import build_policy
+
+    policy = build_policy(strategy, params)
+    if policy is None:
+        raise ValueError(f"Unknown strategy '{strategy}'")
+
+    cap_wei = int(cap * WEI)
+    vault = VaultModel(
+        int(sub_balance * WEI),
+        cap_wei if max_notional is None else int(max_notional * WEI),
+        approval_delay,
+        fee_bps,
+    )
+
+    if engine == "auto":
+        engine = "columns" if has_batch_decide(policy) else "stream"
+    if engine == "columns":
+        started = time.perf_counter()
+        columns = load_columns(ticks_path)
+        load_s = time.perf_counter() - started
+        if needs_depth(policy, columns):
+            print(f"  [Warning: {strategy} sizes from order-book depth in the ticks, "
+                  f"using the stream engine]")
+            engine = "stream"
+    if engine == "columns":
+        result = simulate_columns(policy, columns, vault, cap_wei, slippage_bps)
+        result["load_s"] = round(load_s, 3)
+    else:
+        result = simulate_stream(policy, iter_ticks(ticks_path), vault, cap_wei, slippage_bps)
+    result.update(strategy=strategy, params=params)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--strategy", default="sniper", help="registry strategy name")
+    parser.add_argument("--params", default="{}", help="strategyParams as JSON")
+    parser.add_argument("--ticks", required=True, help=".jsonl or .csv tick file")
+    parser.add_argument("--sub-balance", type=float, default=150.0, help="initial sub-balance (tokens)")
+    parser.add_argument("--cap", type=float, default=100.0, help="agent config cap (tokens)")
+    parser.add_argument("--max-notional", type=float, default=None,
+                        help="vault maxNotionalPerTrade (tokens, default: cap)")
+    parser.add_argument("--slippage-bps", type=int, default=50)
+    parser.add_argument("--approval-delay", type=float, default=0.0, help="seconds")
+    parser.add_argument("--fee-bps", type=float, default=0.0)
+    parser.add_argument("--engine", choices=("auto", "stream", "columns"), default="auto")
+    parser.add_argument("--json", dest="json_out", help="also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    result = run_backtest(
+        args.strategy, json.loads(args.params), args.ticks,
+        sub_balance=args.sub_balance, cap=args.cap, max_notional=args.max_notional,
+        slippage_bps=args.slippage_bps, approval_delay=args.approval_delay,
+        fee_bps=args.fee_bps, engine=args.engine,
+    )
+
+    print(f"=== Backtest: {result['strategy']} {json.dumps(result['params'])} ===")
+    print(f"Ticks: {result['ticks']}  Engine: {result['engine']}  "
+          f"({result['ticks_per_s']:.0f} ticks/s"
+          + (f", load {result['load_s']}s)" if "load_s" in result else ")"))
+    print(f"Requests: {result['requests']}  Executed: {result['executed']}  "
+          f"Rejected: {result['rejected']}  Blocked (pending): {result['blocked']}")
+    print(f"PnL: {result['pnl']:+.4f} tokens ({result['pnl_pct']:+.2f}%)  "
+          f"Turnover: {result['turnover']:.4f}  Fees: {result['fees']:.4f}")
+    print(f"Max drawdown: {result['max_drawdown']:.4f} tokens ({result['max_drawdown_pct']:.2f}%)")
+    print(f"Final sub-balance: {result['final_sub_balance']:.4f}  Position: {result['final_position']:.4f}")
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,10 @@
+"""
+Microbenchmarks for agent hot paths.
+
+Usage (from agent_py/):
+    python -m benchmarks                 # run and compare against baseline
+    python -m benchmarks --save          # run and store results as baseline
+    python -m benchmarks -k decide       # only benchmarks matching "decide"
+
+See harness.py for the runner and bench_*.py for the cases.
+"""
@@ -0,0 +1,55 @@
+"""
+Benchmark runner CLI.
+
+Exits with status 1 if any benchmark regressed beyond --threshold
+compared to the stored baseline.
+"""
+import argparse
+import sys
+
+from . import harness
+from . import bench_hot_paths  # noqa: F401  (registers cases)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("-k", dest="pattern", help="only run benchmarks containing this string")
+    parser.add_argument("--save", action="store_true", help="store results as the new baseline")
+    parser.add_argument("--baseline", default=str(harness.BASELINE_PATH), help="baseline JSON path")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown vs baseline (default: 0.25 = +25%%)")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per sample")
+    parser.add_argument("--memory", action="store_true", help="also report bytes retained per call")
+    args = parser.parse_args(argv)
+
+    results = harness.run(args.pattern, repeat=args.repeat, min_time=args.min_time, memory=args.memory)
+    baseline = harness.load_baseline(args.baseline)
+    rows = harness.compare(results, baseline, args.threshold)
+
+    mem_header = f" {'bytes/call':>11}" if args.memory else ""
+    print(f"{'benchmark':<40} {'median':>12} {'baseline':>12} {'delta':>9}{mem_header}")
+    print("-" * (76 + len(mem_header)))
+    regressed = []
+    for name, current, base, delta, is_regression in rows:
+        base_s = f"{base:>10.2f}us" if base is not None else f"{'-':>12}"
+        delta_s = f"{delta * 100:>+8.1f}%" if delta is not None else f"{'new':>9}"
+        flag = "  REGRESSION" if is_regression else ""
+        mem_s = f" {results[name]['bytes_per_call']:>11.1f}" if args.memory else ""
+        print(f"{name:<40} {current:>10.2f}us {base_s} {delta_s}{mem_s}{flag}")
+        if is_regression:
+            regressed.append(name)
+
+    if args.save:
+        harness.save_baseline(results, args.baseline)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if regressed and not args.save:
+        print(f"\n{len(regressed)} benchmark(s) slower than baseline by more than "
+              f"{args.threshold * 100:.0f}%: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,364 @@
+"""
+Benchmarks for the per-iteration hot paths of loop_agent.
+
+Covers strategy decisions (per call and batched), pool quotes, SwapIntent
+construction/validation and the shared HOLD fast path, MarketData,
+cold start of a new agent process, state.json serialization, signal loading,
+agent config lookup, and status_server's fleet index and history queries.
+"""
+import atexit
+import contextlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from .harness import benchmark
+
+WEI = 10 ** 18
+
+SIGNAL = {
+    "best_bid": 0.998,
+    "best_ask": 0.999,
+    "spread": 0.001,
+    "timestamp": "2026-02-04T22:30:00Z",
+    "source": "bench",
+}
+
+SNAPSHOT = {
+    "agent_sub_balance": 150 * WEI,
+    "agent_spent": 50 * WEI,
+    "vault_balance": 950 * WEI,
+}
+
+AGENT_CONFIG = {
+    "address": "0x3C44CdDdB6a900fa2b585dd299e03d12FA4293BC",
+    "ensName": "agent.safe.eth",
+    "strategy": "sniper",
+    "enabled": True,
+    "config": {"cap": "100", "slippageTolerance": 0.5},
+}
+
+# Scratch directory and /dev/null handle, created by the first case that
+# needs them and removed when the harness process exits
+_SCRATCH = {}
+
+
+def _tmp_dir():
+    if "dir" not in _SCRATCH:
+        _SCRATCH["dir"] = Path(tempfile.mkdtemp(prefix="agent-bench-"))
+        atexit.register(shutil.rmtree, _SCRATCH["dir"], ignore_errors=True)
+    return _SCRATCH["dir"]
+
+
+def _devnull():
+    if "devnull" not in _SCRATCH:
+        _SCRATCH["devnull"] = open(os.devnull, "w")
+        atexit.register(_SCRATCH["devnull"].close)
+    return _SCRATCH["devnull"]
+
+
+def make_ctx(signal=None, strategy_state=None):
+    """Build a decide() context like loop_agent.main does."""
+    return {
+        "signal": SIGNAL if signal is None else signal,
+        "sub_balance_wei": 150 * WEI,
+        "max_per_trade_wei": 100 * WEI,
+        "default_amount_in_wei": 100 * WEI,
+        "cap_wei": 100 * WEI,
+        "slippage_bps": 50,
+        "agent_address": AGENT_CONFIG["address"],
+        "user_address": "0x70997970C51812dc3A010C7d01b50e0d17dc79C8",
+        "strategy_state": {} if strategy_state is None else strategy_state,
+    }
+
+
+@benchmark("sniper.decide.swap")
+def bench_sniper_decide_swap():
+    from strategies.sniper_policy import SniperPolicy
+    policy = SniperPolicy({"target_price": 1.0, "size": 10.0})
+    ctx = make_ctx()
+    return lambda: policy.decide(ctx)
+
+
+@benchmark("sniper.decide.hold")
+def bench_sniper_decide_hold():
+    from strategies.sniper_policy import SniperPolicy
+    policy = SniperPolicy({"target_price": 0.9, "size": 10.0})
+    ctx = make_ctx()
+    return lambda: policy.decide(ctx)
+
+
+@benchmark("sniper.decide.depth10k")
+def bench_sniper_decide_depth():
+    """Depth-aware sizing against a 10k-level book (ladder cached per tick)."""
+    from strategies.sniper_policy import SniperPolicy
+    policy = SniperPolicy({"target_price": 1.0, "size": 10.0})
+    asks = [[0.999 + i * 1e-6, 5.0] for i in range(10_000)]
+    ctx = make_ctx(signal=dict(SIGNAL, asks=asks))
+    policy.decide(ctx)
+    return lambda: policy.decide(ctx)
+
+
+def _warm_arb_state(policy, mean_spread=0.0002):
+    """strategy_state with OU estimates fitted to a spread well below SIGNAL's."""
+    import random
+    from external_strats.ou_arb import new_ou_stats, ou_update
+
+    rng = random.Random(1)
+    stats = new_ou_stats()
+    x = mean_spread
+    for _ in range(1000):
+        x = mean_spread + 0.8 * (x - mean_spread) + rng.gauss(0.0, 0.0001)
+        ou_update(stats, x, policy.strategy.decay)
+    return {"ou": stats}
+
+
+@benchmark("arb.decide.swap")
+def bench_arb_decide_swap():
+    from strategies.arb_policy import ArbPolicy
+    policy = ArbPolicy({"threshold": 0.0001, "size": 10.0})
+    state = _warm_arb_state(policy)
+    ctx = make_ctx(strategy_state=state)
+
+    def decide():
+        # Flat again, so every call is an entry
+        state["ou"]["in_position"], state["ou"]["position"] = False, 0
+        return policy.decide(ctx)
+    return decide
+
+
+@benchmark("arb.decide.hold")
+def bench_arb_decide_hold():
+    from strategies.arb_policy import ArbPolicy
+    policy = ArbPolicy({"threshold": 0.5, "size": 10.0})
+    ctx = make_ctx(strategy_state=_warm_arb_state(policy))
+    return lambda: policy.decide(ctx)
+
+
+def _batch_columns(n=1_000_000, seed=1):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    bids = rng.uniform(0.98, 1.01, n)
+    asks = bids + rng.uniform(0.0, 0.02, n)
+    return bids, asks
+
+
+@benchmark("sniper.decide_batch.1m")
+def bench_sniper_decide_batch():
+    from strategies.sniper_policy import SniperPolicy
+    policy = SniperPolicy({"target_price": 1.0})
+    bids, asks = _batch_columns()
+    return lambda: policy.decide_batch(bids, asks, 150 * WEI, 100 * WEI, 50)
+
+
+@benchmark("arb.decide_batch.1m")
+def bench_arb_decide_batch():
+    from strategies.arb_policy import ArbPolicy
+    policy = ArbPolicy({"threshold": 0.01})
+    bids, asks = _batch_columns()
+    return lambda: policy.decide_batch(bids, asks, 150 * WEI, 100 * WEI, 50)
+
+
+@benchmark("pool_mirror.quote")
+def bench_pool_mirror_quote():
+    from pool_mirror import PoolMirror
+    mirror = PoolMirror("0x" + "11" * 20, "0x" + "22" * 20, 3000, 1_000_000 * WEI, 1_002_000 * WEI)
+    return lambda: mirror.quote(100 * WEI, True)
+
+
+@benchmark("sniper.decide.quoted")
+def bench_sniper_decide_quoted():
+    from pool_mirror import PoolMirror
+    from strategies.sniper_policy import SniperPolicy
+    policy = SniperPolicy({"target_price": 1.0, "size": 10.0})
+    ctx = make_ctx()
+    ctx["quoter"] = PoolMirror("0x" + "11" * 20, "0x" + "22" * 20, 3000, 1_000_000 * WEI, 1_002_000 * WEI)
+    return lambda: policy.decide(ctx)
+
+
+@benchmark("intent.swap")
+def bench_intent_swap():
+    from strategies.types import SwapIntent
+    meta = {"signal": SIGNAL, "side": "BUY", "price": 0.999}
+
+    def construct():
+        return SwapIntent(
+            action="SWAP",
+            reason="sniper:snipe_at_0.9990",
+            zero_for_one=True,
+            amount_in=100 * WEI,
+            min_amount_out=995 * WEI // 10,
+            meta=meta,
+        )
+    return construct
+
+
+@benchmark("intent.hold")
+def bench_intent_hold():
+    from strategies.types import SwapIntent
+    return lambda: SwapIntent.hold("sniper:no_order")
+
+
+@benchmark("intent.hold.construct")
+def bench_intent_hold_construct():
+    from strategies.types import SwapIntent
+    meta = {"signal": SIGNAL}
+    return lambda: SwapIntent(action="HOLD", reason="sniper:no_order", meta=meta)
+
+
+@benchmark("market_data.from_signal")
+def bench_market_data():
+    from external_strats.base import MarketData
+    return lambda: MarketData.from_signal(SIGNAL)
+
+
+@benchmark("write_state.swap")
+def bench_write_state():
+    import loop_agent
+    from strategies.types import SwapIntent
+
+    loop_agent.STATE_FILE = _tmp_dir() / "state.json"
+    loop_agent.BALANCE_HISTORY[:] = [
+        {"time": "12:00:00", "balance": 950.0} for _ in range(loop_agent.MAX_BALANCE_HISTORY)
+    ]
+    intent = SwapIntent(
+        action="SWAP",
+        reason="sniper:snipe_at_0.9990",
+        zero_for_one=True,
+        amount_in=100 * WEI,
+        min_amount_out=995 * WEI // 10,
+        meta={"signal": SIGNAL, "side": "BUY", "price": 0.999},
+    )
+    devnull = _devnull()
+
+    def write():
+        with contextlib.redirect_stdout(devnull):
+            loop_agent.write_state(
+                "REQUEST_PENDING", intent.reason, SNAPSHOT, 0, 1,
+                AGENT_CONFIG, "DRY_RUN", intent=intent,
+            )
+    return write
+
+
+@benchmark("load_signals")
+def bench_load_signals():
+    import loop_agent
+
+    path = _tmp_dir() / "signals.json"
+    with open(path, "w") as f:
+        json.dump(SIGNAL, f, indent=2)
+    loop_agent.SIGNALS_PATH = path
+    return loop_agent.load_signals
+
+
+@benchmark("find_agent_config.1k")
+def bench_find_agent_config():
+    import loop_agent
+
+    agents = [
+        dict(AGENT_CONFIG, address=f"0x{i:040x}", name=f"agent-{i}")
+        for i in range(1000)
+    ]
+    config = {"agents": agents}
+    # Worst case: the agent is last in the list
+    target = agents[-1]["address"].upper().replace("0X", "0x")
+    return lambda: loop_agent.find_agent_config(config, target)
+
+
+def _fleet(count=10_000):
+    from fleet import FleetIndex
+
+    fleet = FleetIndex()
+    for i in range(count):
+        fleet.upsert({
+            "status": "AWAITING_APPROVAL" if i % 50 == 0 else "running",
+            "last_update": f"2026-02-04 22:{i // 600 % 60:02d}:{i % 60:02d}",
+            "pnl": (i * 7919 % 1000) / 10,
+            "agent": dict(AGENT_CONFIG, address=f"0x{i:040x}", strategy=("sniper", "arb", "ensemble")[i % 3]),
+            "decision": {"action": "HOLD", "reason": "bench"},
+        })
+    return fleet
+
+
+@benchmark("fleet.query.10k")
+def bench_fleet_query():
+    fleet = _fleet()
+    # Top PnL among one strategy: walks the pnl index, filtered by a set
+    return lambda: fleet.query({"strategy": "arb"}, sort="pnl", order="desc", limit=20)
+
+
+@benchmark("fleet.upsert.10k")
+def bench_fleet_upsert():
+    fleet = _fleet()
+    state = fleet.get(f"0x{5000:040x}")
+    pnl = iter(range(10 ** 9))
+    return lambda: fleet.upsert(dict(state, pnl=next(pnl) % 100))
+
+
+def _history_db(rows=1_000_000, agents=100):
+    from history import COLUMNS, _INSERT, connect
+
+    path = _tmp_dir() / "history.db"
+    if path.exists():
+        return path
+    conn = connect(path)
+    actions = ("HOLD",) * 8 + ("SWAP", "REQUEST_PENDING")
+    row = [None] * len(COLUMNS)
+    with conn:
+        conn.executemany(_INSERT, (
+            (1.7e9 + i * 10, f"0x{i % agents:040x}", i, "LIVE", "running", actions[i * 7 % 10], "bench",
+             *row[7:])
+            for i in range(rows)
+        ))
+    conn.close()
+    return path
+
+
+@benchmark("history.query.1m")
+def bench_history_query():
+    from history import HistoryStore
+
+    store = HistoryStore(_history_db())
+    agent = f"0x{44:040x}"  # every 10th row is a SWAP; this agent's rows all are
+    # One agent's SWAPs in a week (~60 of a million rows)
+    return lambda: store.query(agent=agent, action="SWAP", since=1.7e9 + 5e6, until=1.7e9 + 5e6 + 604800)
+
+
+@benchmark("history.query.1m.page")
+def bench_history_query_page():
+    from history import HistoryStore
+
+    store = HistoryStore(_history_db())
+    cursor = store.query(limit=1000)["next"]
+    # A deep page of the unfiltered timeline: a cursor seek, not an OFFSET scan
+    return lambda: store.query(limit=100, cursor=cursor)
+
+
+_AGENT_DIR = Path(__file__).resolve().parent.parent
+
+
+@benchmark("startup.import")
+def bench_startup_import():
+    cmd = [sys.executable, "-c", "import loop_agent"]
+    return lambda: subprocess.run(cmd, cwd=_AGENT_DIR, check=True)
+
+
+@benchmark("startup.first_decision")
+def bench_startup_first_decision():
+    # New process to the first decision: loop_agent on the simulated vault,
+    # one iteration (deployment, config, registry, policy, decide, state.json)
+    env = dict(
+        os.environ,
+        VIRTUAL_CLOCK="1",
+        MAX_ITERATIONS="1",
+        AGENT_STATE_FILE=str(_tmp_dir() / "startup_state.json"),
+        AGENT_TOKEN_REGISTRY=str(_tmp_dir() / "startup_tokens.json"),
+        AGENT_HISTORY_DB=str(_tmp_dir() / "startup_history.db"),
+    )
+    cmd = [sys.executable, "loop_agent.py"]
+    return lambda: subprocess.run(cmd, cwd=_AGENT_DIR, env=env, check=True,
+                                  stdout=subprocess.DEVNULL)
@@ -0,0 +1,154 @@
+"""
+Minimal benchmark harness with stored baselines.
+
+Cases register themselves with @benchmark(name). Each case is a setup
+function returning a zero-argument callable; the harness auto-ranges the
+loop count (like timeit), takes several samples, and compares the median
+per-call time against a baseline JSON file. With memory=True it also
+records the bytes each call's result keeps alive (tracemalloc), which is
+what a tick loop or backtest that stores its intents pays per row.
+"""
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+# Registry: name -> setup function returning the callable to time
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a benchmark setup function under `name`."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def _autorange(fn, min_time):
+    """Find a loop count so one sample takes at least min_time seconds."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return number
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+
+def measure(fn, repeat=5, min_time=0.05):
+    """
+    Time a callable.
+
+    Args:
+        fn: Zero-argument callable
+        repeat: Number of samples
+        min_time: Minimum duration of each sample (seconds)
+
+    Returns:
+        dict: min_us / median_us per call, loops per sample, samples
+    """
+    number = _autorange(fn, min_time)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number * 1e6)
+    return {
+        "min_us": round(min(samples), 4),
+        "median_us": round(statistics.median(samples), 4),
+        "loops": number,
+        "samples": repeat,
+    }
+
+
+def measure_memory(fn, calls=1000):
+    """
+    Bytes retained per call when every result is kept.
+
+    Returns:
+        float: Traced memory growth / calls (0 for shared/cached results)
+    """
+    fn()  # warm caches outside the trace
+    kept = []
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        for _ in range(calls):
+            kept.append(fn())
+        # The list itself is harness overhead, not the result's
+        retained = tracemalloc.get_traced_memory()[0] - start - (len(kept) * 8)
+    finally:
+        tracemalloc.stop()
+    return round(max(retained, 0) / calls, 1)
+
+
+def run(pattern=None, repeat=5, min_time=0.05, memory=False):
+    """Run registered benchmarks (optionally filtered by substring)."""
+    results = {}
+    for name in sorted(BENCHMARKS):
+        if pattern and pattern not in name:
+            continue
+        fn = BENCHMARKS[name]()
+        results[name] = measure(fn, repeat=repeat, min_time=min_time)
+        if memory:
+            results[name]["bytes_per_call"] = measure_memory(fn)
+    return results
+
+
+def load_baseline(path=BASELINE_PATH):
+    """Load stored baseline results ({} if none)."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, "r") as f:
+        return json.load(f).get("results", {})
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    """Store results as the new baseline (merged with existing entries)."""
+    path = Path(path)
+    merged = load_baseline(path)
+    merged.update(results)
+    data = {
+        "meta": {
+            "saved_at": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "results": merged,
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def compare(results, baseline, threshold=0.25):
+    """
+    Compare results against a baseline.
+
+    Args:
+        results: Current results from run()
+        baseline: Baseline results from load_baseline()
+        threshold: Allowed slowdown as a fraction (0.25 = +25%)
+
+    Returns:
+        list: (name, current_us, baseline_us or None, delta or None, regressed)
+    """
+    rows = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if base is None:
+            rows.append((name, res["median_us"], None, None, False))
+            continue
+        delta = res["median_us"] / base["median_us"] - 1.0 if base["median_us"] else 0.0
+        rows.append((name, res["median_us"], base["median_us"], delta, delta > threshold))
+    return rows
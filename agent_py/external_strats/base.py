@@ -2,12 +2,18 @@
 Base types for external strategy scripts (sniper.py, ou_arb.py).
 
 These are minimal implementations to support the original strategy logic.
+MarketData and OrderInstruction are slotted (no per-instance __dict__);
+they are built on every tick.
 """
 from dataclasses import dataclass
-from typing import Dict, Any, List, Optional
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional
 
+# Shared read-only default for MarketData.extra
+_NO_EXTRA: Mapping[str, Any] = MappingProxyType({})
 
-@dataclass
+
+@dataclass(slots=True)
 class MarketData:
     """
     Market data snapshot for strategy evaluation.
@@ -15,18 +21,32 @@ class MarketData:
     Attributes:
         best_bid: Best bid price (float)
         best_ask: Best ask price (float)
-        extra: Additional market data (dict)
+        extra: Additional market data (the signal dict itself, by reference;
+            read-only empty mapping if not given)
     """
     best_bid: float
     best_ask: float
-    extra: Dict[str, Any] = None
+    extra: Optional[Mapping[str, Any]] = None
 
     def __post_init__(self):
         if self.extra is None:
-            self.extra = {}
+            self.extra = _NO_EXTRA
+
+    @classmethod
+    def from_signal(cls, signal: Dict[str, Any]) -> "MarketData":
+        """
+        Parse a signals.json dict (best_bid/best_ask, or op_bid/pm_ask).
+
+        Missing prices default to 1.0; callers check for a usable signal first.
+        """
+        return cls(
+            best_bid=signal.get("best_bid", signal.get("op_bid", 1.0)),
+            best_ask=signal.get("best_ask", signal.get("pm_ask", 1.0)),
+            extra=signal
+        )
 
 
-@dataclass
+@dataclass(slots=True)
 class OrderInstruction:
     """
     Order instruction from external strategy.
@@ -0,0 +1,86 @@
+"""
+Order-book depth ladder with prefix sums for O(log n) fill sizing.
+
+Levels arrive in the signal as "asks": [[price, size], ...] (or
+[{"price": p, "size": s}, ...]), price in token0 per token1 and size in
+token1 units. The ladder sorts them once, precomputes cumulative quantity,
+cumulative cost and the VWAP of filling through each level, then answers
+sizing queries with a binary search.
+"""
+from bisect import bisect_right
+from typing import Any, List, Tuple
+
+
+def _parse_levels(levels: List[Any]) -> List[Tuple[float, float]]:
+    parsed = []
+    for level in levels:
+        if isinstance(level, dict):
+            price, size = level.get("price"), level.get("size")
+        else:
+            price, size = level[0], level[1]
+        price, size = float(price), float(size)
+        if price > 0 and size > 0:
+            parsed.append((price, size))
+    parsed.sort()
+    return parsed
+
+
+class DepthLadder:
+    """
+    Ask-side depth ladder.
+
+    Attributes:
+        prices: Level prices, ascending
+        cum_qty: Quantity available through level i (token1)
+        cum_cost: Cost of buying through level i (token0)
+        vwap: Volume-weighted price of buying through level i
+            (non-decreasing, so it can be binary searched)
+    """
+
+    __slots__ = ("prices", "cum_qty", "cum_cost", "vwap")
+
+    def __init__(self, levels: List[Any]):
+        self.prices = []
+        self.cum_qty = []
+        self.cum_cost = []
+        self.vwap = []
+        qty = cost = 0.0
+        for price, size in _parse_levels(levels):
+            qty += size
+            cost += price * size
+            self.prices.append(price)
+            self.cum_qty.append(qty)
+            self.cum_cost.append(cost)
+            self.vwap.append(cost / qty)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def max_fill_under(self, target: float) -> Tuple[float, float, float]:
+        """
+        Largest buy whose volume-weighted price stays at or below target.
+
+        Binary search for the deepest full level with VWAP <= target, then
+        take the part of the next level that keeps the VWAP at the target:
+            (C + p * q) / (Q + q) <= T  =>  q <= (T * Q - C) / (p - T)
+
+        Args:
+            target: Maximum acceptable VWAP
+
+        Returns:
+            tuple: (amount_in in token0, quantity out in token1, vwap);
+                (0.0, 0.0, 0.0) if even the best level is above target
+        """
+        k = bisect_right(self.vwap, target)
+        if k == 0:
+            # First level above target: no partial fill can average below it
+            return 0.0, 0.0, 0.0
+        cost, qty = self.cum_cost[k - 1], self.cum_qty[k - 1]
+        if k < len(self.prices):
+            # prices[k] >= vwap[k] > target, so the denominator is positive
+            price = self.prices[k]
+            partial = min((target * qty - cost) / (price - target), self.cum_qty[k] - qty)
+            if partial > 0:
+                cost += price * partial
+                qty += partial
+        return cost, qty, cost / qty
@@ -1,11 +1,189 @@
 """
-OU Arbitrage strategy - placeholder implementation.
+OU Arbitrage strategy.
 
-This is a minimal arbitrage strategy that can be replaced with the actual
-ou_arb.py implementation. It demonstrates the expected interface.
+Models the relative spread (best_ask - best_bid) / best_bid as an
+Ornstein-Uhlenbeck process and trades its mean reversion. The OU parameters
+are estimated online from exponentially weighted sufficient statistics of
+the AR(1) regression x[t] = a + b * x[t-1] + e, kept in strategy_state["ou"]
+and updated in O(1) per tick:
+    b = exp(-theta)                 (theta per tick)
+    mu = a / (1 - b)
+    sigma_eq^2 = var(e) / (1 - b^2) (stationary variance)
+    sigma^2 = 2 * theta * sigma_eq^2
+Entries and exits use the z-score (x - mu) / sigma_eq.
 """
+import math
 from .base import BaseStrategy, MarketData, OrderInstruction
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+
+def new_ou_stats() -> Dict[str, Any]:
+    """Empty sufficient statistics (JSON-serializable, lives in strategy_state)."""
+    return {
+        "n": 0,            # observations (x[t-1], x[t]) pairs seen
+        "w": 0.0,          # sum of decayed weights
+        "mx": 0.0,         # EW mean of x[t-1]
+        "my": 0.0,         # EW mean of x[t]
+        "cxx": 0.0,        # EW co-moment sums (divide by w for covariances)
+        "cxy": 0.0,
+        "cyy": 0.0,
+        "last": None,      # previous spread
+        "last_key": None,  # seq/timestamp of the last tick used
+        "in_position": False,
+        "position": 0,     # token1 held by the sent BUYs (wei)
+        "undo": None,      # [in_position, position] before this tick's commit()
+    }
+
+
+def ou_update(stats: Dict[str, Any], x: float, decay: float) -> None:
+    """
+    Add one spread observation to the statistics.
+
+    Exponentially weighted Welford-style recursions: O(1) time and memory,
+    no history is kept or rescanned.
+
+    Args:
+        stats: Statistics from new_ou_stats() (mutated)
+        x: Current spread
+        decay: Per-tick weight decay (1 - 1 / effective window)
+    """
+    prev = stats["last"]
+    stats["last"] = x
+    if prev is None:
+        return
+
+    w = stats["w"] * decay + 1.0
+    r = 1.0 / w
+    dx = prev - stats["mx"]
+    dy = x - stats["my"]
+    stats["mx"] += dx * r
+    stats["my"] += dy * r
+    stats["cxx"] = stats["cxx"] * decay + dx * (prev - stats["mx"])
+    stats["cxy"] = stats["cxy"] * decay + dx * (x - stats["my"])
+    stats["cyy"] = stats["cyy"] * decay + dy * (x - stats["my"])
+    stats["w"] = w
+    stats["n"] += 1
+
+
+def ou_params(stats: Dict[str, Any], min_samples: int = 50) -> Optional[Dict[str, float]]:
+    """
+    Current OU estimates, or None while warming up / not mean reverting.
+
+    Returns:
+        dict: mu, theta (per tick), sigma (per sqrt tick), sigma_eq,
+            half_life (ticks)
+    """
+    if stats["n"] < min_samples or stats["cxx"] <= 0.0:
+        return None
+    b = stats["cxy"] / stats["cxx"]
+    if not 0.0 < b < 1.0:
+        return None
+    resid_var = (stats["cyy"] - b * stats["cxy"]) / stats["w"]
+    if resid_var <= 0.0:
+        return None
+    a = stats["my"] - b * stats["mx"]
+    theta = -math.log(b)
+    sigma_eq = math.sqrt(resid_var / (1.0 - b * b))
+    return {
+        "mu": a / (1.0 - b),
+        "theta": theta,
+        "sigma": sigma_eq * math.sqrt(2.0 * theta),
+        "sigma_eq": sigma_eq,
+        "half_life": math.log(2.0) / theta,
+    }
+
+
+def _decayed_cumsum(v, init: float, decay: float):
+    """s[t] = decay * s[t-1] + v[t] for every t (s[-1] = init), without a Python loop."""
+    import numpy as np
+
+    k = len(v)
+    rate = -math.log2(decay) if decay > 0.0 else math.inf  # halvings per tick
+    if k == 0:
+        return np.array(v, dtype=np.float64)
+    if rate > 256.0:
+        # decay ** 2 is below float64 resolution
+        v = np.asarray(v, dtype=np.float64)
+        return v + decay * np.concatenate(([init], v[:-1]))
+    # Cumulative sums of v[t] * decay ** -t within blocks; the largest scale
+    # factor, decay ** -block, stays below 2 ** 512
+    block = k if rate == 0.0 else max(2, min(k, int(min(max(8.0 / rate, 64.0), 512.0 / rate))))
+    blocks = -(-k // block)
+    padded = np.zeros(blocks * block)
+    padded[:k] = v
+    j = np.arange(block)
+    within = np.cumsum(padded.reshape(blocks, block) * decay ** -j, axis=1)
+    # Block-end sums from a zero start, carried across blocks by the same filter
+    tails = within[:, -1] * decay ** (block - 1)
+    starts = np.empty(blocks)
+    starts[0] = init
+    if blocks > 1:
+        starts[1:] = _decayed_cumsum(tails[:-1], init, decay ** block)
+    return ((within + decay * starts[:, None]) * decay ** j).ravel()[:k]
+
+
+def ou_zscores(stats: Dict[str, Any], x, decay: float, min_samples: int = 50):
+    """
+    ou_update() and ou_params() over a column of spreads at once.
+
+    Every EW sum behind the statistics is a linear filter,
+    s[t] = decay * s[t-1] + v[t], so the weights, means and co-moments of
+    all ticks come from decayed cumulative sums (moments taken about the
+    first spread, which keeps them well conditioned). Matches the
+    recursions up to float rounding.
+
+    Args:
+        stats: Statistics from new_ou_stats() (mutated: left as after the
+            last ou_update())
+        x: Array of spreads, one per tick
+        decay: Per-tick weight decay
+        min_samples: As in ou_params()
+
+    Returns:
+        numpy array: z-score (x - mu) / sigma_eq per tick, NaN where
+            ou_params() gives None
+    """
+    import numpy as np
+
+    x = np.asarray(x, dtype=np.float64)
+    z = np.full(len(x), np.nan)
+    if len(x) == 0:
+        return z
+    if stats["last"] is None:
+        first, prev = 1, x[:-1]
+    else:
+        first, prev = 0, np.concatenate(([stats["last"]], x[:-1]))
+    stats["last"] = float(x[-1])
+    if first >= len(x):
+        return z
+
+    shift = float(x[first])
+    px, py = prev - shift, x[first:] - shift
+    w0 = stats["w"]
+    mx0, my0 = stats["mx"] - shift, stats["my"] - shift
+    w = _decayed_cumsum(np.ones(len(py)), w0, decay)
+    sx = _decayed_cumsum(px, w0 * mx0, decay)
+    sy = _decayed_cumsum(py, w0 * my0, decay)
+    mx, my = sx / w, sy / w
+    cxx = _decayed_cumsum(px * px, stats["cxx"] + w0 * mx0 * mx0, decay) - sx * mx
+    cxy = _decayed_cumsum(px * py, stats["cxy"] + w0 * mx0 * my0, decay) - sx * my
+    cyy = _decayed_cumsum(py * py, stats["cyy"] + w0 * my0 * my0, decay) - sy * my
+    n = stats["n"] + np.arange(1, len(py) + 1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        b = cxy / cxx
+        resid_var = (cyy - b * cxy) / w
+        fit = (n >= min_samples) & (cxx > 0.0) & (b > 0.0) & (b < 1.0) & (resid_var > 0.0)
+        mu = (my - b * mx) / (1.0 - b)
+        sigma_eq = np.sqrt(resid_var / (1.0 - b * b))
+        z[first:] = np.where(fit, (py - mu) / sigma_eq, np.nan)
+
+    stats.update(
+        n=int(n[-1]), w=float(w[-1]),
+        mx=float(mx[-1]) + shift, my=float(my[-1]) + shift,
+        cxx=float(cxx[-1]), cxy=float(cxy[-1]), cyy=float(cyy[-1]),
+    )
+    return z
 
 
 class OUArbStrategy(BaseStrategy):
@@ -13,14 +191,75 @@ class OUArbStrategy(BaseStrategy):
     Ornstein-Uhlenbeck Arbitrage strategy.
 
     Parameters:
-        threshold: Minimum spread threshold for arbitrage (float)
+        threshold: Minimum spread to enter, a floor on the edge (float)
+        entry_z: Enter (BUY) when the spread z-score reaches this (float)
+        exit_z: Exit (SELL) an open position when z falls to this (float)
+        halflife: Half-life of the estimator weights in ticks (float)
+        min_samples: Ticks before the estimates are used (int)
         size: Order size in tokens (float)
+
+    The position (token1 wei, in strategy_state) only changes through
+    commit(), which the caller applies to the orders it actually sends.
+    Repeated reads of the same tick (same "seq" or "timestamp") update the
+    estimates once.
     """
 
     def __init__(self, params: Dict[str, Any] = None):
         super().__init__(params)
         self.threshold = self.params.get("threshold", 0.01)  # 1% spread
+        self.entry_z = self.params.get("entry_z", 2.0)
+        self.exit_z = self.params.get("exit_z", 0.0)
+        self.halflife = self.params.get("halflife", 500.0)
+        self.min_samples = self.params.get("min_samples", 50)
         self.size = self.params.get("size", 10.0)
+        self.decay = 0.5 ** (1.0 / self.halflife)
+
+    def observe(self, stats: Dict[str, Any], spread: float, key: Any = None) -> Optional[Dict[str, float]]:
+        """Update the estimates with one tick (deduplicated by key) and return them."""
+        if key is None or key != stats["last_key"]:
+            ou_update(stats, spread, self.decay)
+            stats["last_key"] = key
+        return ou_params(stats, self.min_samples)
+
+    def signal_side(self, stats: Dict[str, Any], spread: float, fit: Optional[Dict[str, float]]):
+        """
+        Entry/exit signal for the current spread (the position is not changed).
+
+        Returns:
+            tuple: (side or None, z-score or None)
+        """
+        if fit is None:
+            return None, None
+        z = (spread - fit["mu"]) / fit["sigma_eq"]
+        if not stats["in_position"]:
+            if z >= self.entry_z and spread > self.threshold:
+                return "BUY", z
+        elif z <= self.exit_z:
+            return "SELL", z
+        return None, z
+
+    @staticmethod
+    def commit(stats: Dict[str, Any], side: str, amount_in: int, amount_out: int) -> None:
+        """
+        Book a sent order: a BUY adds amount_out of token1, a SELL removes amount_in.
+
+        The position stays open while any token1 is left, so an exit capped
+        by the per-trade limit is repeated on the next exit signal. The
+        previous position is kept for rollback() until the next tick.
+        """
+        stats["undo"] = [stats["in_position"], stats["position"]]
+        if side == "BUY":
+            stats["position"] += amount_out
+        else:
+            stats["position"] = max(0, stats["position"] - amount_in)
+        stats["in_position"] = stats["position"] > 0
+
+    @staticmethod
+    def rollback(stats: Dict[str, Any]) -> None:
+        """Undo this tick's commit() (the order was not sent after all)."""
+        if stats.get("undo") is not None:
+            stats["in_position"], stats["position"] = stats["undo"]
+            stats["undo"] = None
 
     def evaluate(self, market: MarketData, state: Dict[str, Any]) -> List[OrderInstruction]:
         """
@@ -28,29 +267,44 @@ class OUArbStrategy(BaseStrategy):
 
         Logic:
         - Calculate spread = (best_ask - best_bid) / best_bid
-        - If spread > threshold, generate BUY order (expecting mean reversion)
-        - Otherwise, no action
+        - Update the OU estimates and compute z = (spread - mu) / sigma_eq
+        - Flat and z >= entry_z (and spread > threshold): BUY, expecting the
+          spread to revert
+        - In position and z <= exit_z: SELL
+        - Otherwise (or while warming up), no action
+
+        Orders are candidates: the caller commit()s the ones it sends.
         """
         orders = []
 
-        # Calculate spread
-        if market.best_bid > 0:
-            spread = (market.best_ask - market.best_bid) / market.best_bid
-
-            # Check for arbitrage opportunity
-            if spread > self.threshold:
-                # Buy when spread is wide (expecting mean reversion)
-                orders.append(OrderInstruction(
-                    side="BUY",
-                    size=self.size,
-                    price=market.best_ask,
-                    meta={
-                        "reason": f"arb_spread_{spread:.4f}",
-                        "threshold": self.threshold,
-                        "spread": spread,
-                        "pm_ask": market.best_ask,
-                        "op_bid": market.best_bid
-                    }
-                ))
+        if market.best_bid <= 0:
+            return orders
+
+        spread = (market.best_ask - market.best_bid) / market.best_bid
+        stats = state.get("ou")
+        if stats is None:
+            stats = state["ou"] = new_ou_stats()
+        key = market.extra.get("seq", market.extra.get("timestamp"))
+        fit = self.observe(stats, spread, key)
+        side, z = self.signal_side(stats, spread, fit)
+
+        if side is not None:
+            orders.append(OrderInstruction(
+                side=side,
+                size=self.size,
+                price=market.best_ask if side == "BUY" else market.best_bid,
+                meta={
+                    "reason": f"ou_{'entry' if side == 'BUY' else 'exit'}_z_{z:.2f}",
+                    "z": z,
+                    "mu": fit["mu"],
+                    "theta": fit["theta"],
+                    "sigma": fit["sigma"],
+                    "half_life": fit["half_life"],
+                    "threshold": self.threshold,
+                    "spread": spread,
+                    "pm_ask": market.best_ask,
+                    "op_bid": market.best_bid
+                }
+            ))
 
         return orders
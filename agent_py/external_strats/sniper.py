@@ -5,6 +5,7 @@ This is a minimal sniper strategy that can be replaced with the actual
 sniper.py implementation. It demonstrates the expected interface.
 """
 from .base import BaseStrategy, MarketData, OrderInstruction
+from .depth import DepthLadder
 from typing import Dict, Any, List
 
 
@@ -15,12 +16,30 @@ class SniperStrategy(BaseStrategy):
     Parameters:
         target_price: Target entry price (float)
         size: Order size in tokens (float)
+
+    If the signal carries ask depth ("asks": [[price, size], ...]), the
+    order is sized to the largest fill whose VWAP stays at or below
+    target_price and meta["max_amount_in"] (token0 units) caps the trade.
     """
 
     def __init__(self, params: Dict[str, Any] = None):
         super().__init__(params)
         self.target_price = self.params.get("target_price", 1.0)
         self.size = self.params.get("size", 10.0)
+        # Ladder of the last tick, reused while the same tick is re-read
+        self._ladder = None
+        self._ladder_key = None
+
+    def ladder(self, market: MarketData):
+        """DepthLadder for the signal's asks (None without depth)."""
+        levels = market.extra.get("asks")
+        if not levels:
+            return None
+        key = market.extra.get("seq", market.extra.get("timestamp"))
+        if key is None or key != self._ladder_key or self._ladder is None:
+            self._ladder = DepthLadder(levels)
+            self._ladder_key = key
+        return self._ladder
 
     def evaluate(self, market: MarketData, state: Dict[str, Any]) -> List[OrderInstruction]:
         """
@@ -28,21 +47,34 @@ class SniperStrategy(BaseStrategy):
 
         Logic:
         - If best_ask <= target_price, generate BUY order
+        - With depth, size it to the largest fill with VWAP <= target_price
+          (binary search over prefix sums, O(log levels))
         - Otherwise, no action
         """
         orders = []
 
         # Check if we can snipe at target price
         if market.best_ask <= self.target_price:
+            meta = {
+                "reason": f"snipe_at_{market.best_ask:.4f}",
+                "target": self.target_price,
+                "spread": market.best_ask - market.best_bid
+            }
+            size, price = self.size, market.best_ask
+
+            ladder = self.ladder(market)
+            if ladder is not None:
+                cost, qty, vwap = ladder.max_fill_under(self.target_price)
+                if qty <= 0:
+                    return orders
+                size, price = qty, vwap
+                meta.update({"max_amount_in": cost, "depth_vwap": vwap, "depth_levels": len(ladder)})
+
             orders.append(OrderInstruction(
                 side="BUY",
-                size=self.size,
-                price=market.best_ask,
-                meta={
-                    "reason": f"snipe_at_{market.best_ask:.4f}",
-                    "target": self.target_price,
-                    "spread": market.best_ask - market.best_bid
-                }
+                size=size,
+                price=price,
+                meta=meta
             ))
 
         return orders
@@ -0,0 +1,226 @@
+"""
+Fleet view over the latest state record of every agent, for status_server.
+
+FleetIndex keeps one summary row per agent (keyed by agent address) and
+secondary indexes that are updated incrementally on every published state
+record, so a dashboard query never scans or downloads the whole fleet:
+
+    equality  status, strategy, enabled, action  -> set of addresses
+    sorted    pnl, last_decision, address        -> sorted (value, address) list
+
+query() intersects the equality sets (smallest first), then either walks
+the sorted index in order or, when the filters leave a small candidate set,
+sorts just those. Pagination uses keyset cursors: the cursor encodes the
+(sort value, address) of the last row returned, so pages stay stable while
+agents keep publishing (an agent whose sort value changed moves, nothing
+is skipped or repeated among unchanged agents).
+
+Usage:
+    GET /fleet?status=AWAITING_APPROVAL
+    GET /fleet?sort=pnl&order=desc&limit=10
+    GET /fleet?strategy=arb&cursor=<next from the previous page>
+"""
+import base64
+import bisect
+import json
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+EQUALITY_FIELDS = ("status", "strategy", "enabled", "action")
+SORT_FIELDS = ("pnl", "last_decision", "address")
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# Below this share of the fleet, sorting the candidates beats walking the index
+_SORT_CANDIDATES_RATIO = 8
+
+
+def summarize(state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Summary row of one agent's state record (None if it names no agent)."""
+    agent = state.get("agent") or {}
+    address = agent.get("address")
+    if not address or address == "unknown":
+        return None
+    decision = state.get("decision") or {}
+    pnl = state.get("pnl")
+    return {
+        "address": address.lower(),
+        "ensName": agent.get("ensName"),
+        "strategy": agent.get("strategy"),
+        "enabled": bool(agent.get("enabled", True)),
+        "status": state.get("status"),
+        "action": decision.get("action"),
+        "reason": decision.get("reason"),
+        "last_decision": state.get("last_update") or "",
+        "pnl": float(pnl) if isinstance(pnl, (int, float)) else 0.0,
+        "loop_count": state.get("loop_count"),
+        "total_trades": state.get("total_trades"),
+    }
+
+
+def encode_cursor(value: Any, address: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, address]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    try:
+        value, address = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return value, str(address)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+class FleetIndex:
+    """
+    Latest state per agent with incrementally maintained secondary indexes.
+
+    upsert() may be called from any thread; query() takes a consistent
+    view under the same lock.
+    """
+
+    def __init__(self):
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.states: Dict[str, Dict[str, Any]] = {}
+        self._equality: Dict[str, Dict[Any, Set[str]]] = {field: {} for field in EQUALITY_FIELDS}
+        self._sorted: Dict[str, List[Tuple[Any, str]]] = {field: [] for field in SORT_FIELDS}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def upsert(self, state: Dict[str, Any]) -> Optional[str]:
+        """Apply one agent state record; returns the agent address (None if ignored)."""
+        row = summarize(state)
+        if row is None:
+            return None
+        address = row["address"]
+        with self._lock:
+            old = self.rows.get(address)
+            for field in EQUALITY_FIELDS:
+                if old is not None and old[field] == row[field]:
+                    continue
+                if old is not None:
+                    members = self._equality[field][old[field]]
+                    members.discard(address)
+                    if not members:
+                        del self._equality[field][old[field]]
+                self._equality[field].setdefault(row[field], set()).add(address)
+            for field in SORT_FIELDS:
+                if old is not None and old[field] == row[field]:
+                    continue
+                keys = self._sorted[field]
+                if old is not None:
+                    del keys[bisect.bisect_left(keys, (old[field], address))]
+                bisect.insort(keys, (row[field], address))
+            self.rows[address] = row
+            self.states[address] = state
+        return address
+
+    def remove(self, address: str) -> bool:
+        address = address.lower()
+        with self._lock:
+            row = self.rows.pop(address, None)
+            if row is None:
+                return False
+            self.states.pop(address, None)
+            for field in EQUALITY_FIELDS:
+                members = self._equality[field][row[field]]
+                members.discard(address)
+                if not members:
+                    del self._equality[field][row[field]]
+            for field in SORT_FIELDS:
+                keys = self._sorted[field]
+                del keys[bisect.bisect_left(keys, (row[field], address))]
+        return True
+
+    def get(self, address: str) -> Optional[Dict[str, Any]]:
+        """Full latest state record of one agent."""
+        return self.states.get(address.lower())
+
+    def stats(self) -> Dict[str, Any]:
+        """Agent counts per value of every equality index."""
+        with self._lock:
+            return {
+                "agents": len(self.rows),
+                **{field: {str(value): len(members) for value, members in index.items()}
+                   for field, index in self._equality.items()},
+            }
+
+    def query(self, filters: Optional[Dict[str, Any]] = None, sort: str = "address", order: str = "asc",
+              limit: int = DEFAULT_LIMIT, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Filtered, sorted, cursor-paginated summary rows.
+
+        Args:
+            filters: Equality filters, e.g. {"status": "AWAITING_APPROVAL"}
+                (None values are ignored)
+            sort: One of SORT_FIELDS (ties are broken by address)
+            order: "asc" or "desc"
+            limit: Page size (capped at MAX_LIMIT)
+            cursor: "next" of the previous page
+
+        Returns:
+            {"agents": [...], "next": cursor or None, "total": matching agents}
+
+        Raises:
+            ValueError: Unknown filter/sort field, bad order or cursor
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort field '{sort}' (expected one of {SORT_FIELDS})")
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Unknown order '{order}' (expected asc or desc)")
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        after = decode_cursor(cursor) if cursor else None
+        filters = {field: value for field, value in (filters or {}).items() if value is not None}
+        for field in filters:
+            if field not in EQUALITY_FIELDS:
+                raise ValueError(f"Unknown filter '{field}' (expected one of {EQUALITY_FIELDS})")
+        descending = order == "desc"
+
+        with self._lock:
+            candidates = self._candidates(filters)
+            total = len(self.rows) if candidates is None else len(candidates)
+            keys = self._sorted[sort]
+            if candidates is not None and len(candidates) * _SORT_CANDIDATES_RATIO < len(keys):
+                keys = sorted((self.rows[address][sort], address) for address in candidates)
+                candidates = None  # already filtered
+
+            try:
+                if descending:
+                    end = len(keys) if after is None else bisect.bisect_left(keys, after)
+                    walk = (keys[i] for i in range(end - 1, -1, -1))
+                else:
+                    start = 0 if after is None else bisect.bisect_right(keys, after)
+                    walk = (keys[i] for i in range(start, len(keys)))
+            except TypeError:
+                raise ValueError(f"Cursor does not belong to sort '{sort}'")
+
+            page = []
+            for key in walk:
+                if candidates is None or key[1] in candidates:
+                    page.append(key)
+                    if len(page) > limit:
+                        break
+            more = len(page) > limit
+            page = page[:limit]
+            agents = [dict(self.rows[address]) for _, address in page]
+
+        return {
+            "agents": agents,
+            "next": encode_cursor(*page[-1]) if more else None,
+            "total": total,
+        }
+
+    def _candidates(self, filters: Dict[str, Any]) -> Optional[Set[str]]:
+        if not filters:
+            return None
+        sets = []
+        for field, value in filters.items():
+            members = self._equality[field].get(value)
+            if not members:
+                return set()
+            sets.append(members)
+        sets.sort(key=len)
+        # A single index set is read under the lock, never modified
+        return set.intersection(*sets) if len(sets) > 1 else sets[0]
@@ -0,0 +1,323 @@
+"""
+Decision history in SQLite: one row per recorded iteration of every agent.
+
+loop_agent records each write_state() call (decision, intent, snapshot
+balances, tx outcome) through HistoryWriter, which queues rows and inserts
+them in batches from a background thread, one transaction per batch, so
+the loop never waits on the disk. The database runs in WAL mode: several
+agents can write to the same file while status_server reads it.
+
+status_server answers time-range / per-agent / per-action queries through
+HistoryStore. Every query shape is served by an index
+
+    (agent, action, ts)   SWAPs of agent X last week
+    (agent, ts)           everything agent X did in a range
+    (action, ts)          all SWAPs in a range
+    (ts)                  everything in a range
+
+and pages are cut with a (ts, id) keyset cursor and a capped limit, so a
+query reads O(log n + limit) rows however large the table grows.
+
+Amounts and balances are stored as decimal strings (uint256 does not fit
+SQLite's int64). AGENT_HISTORY_DB sets the database path ("off" disables
+recording); the default, data/history.db under the project root, is kept
+out of agent_py/, which tools/server.py serves to any origin.
+
+Usage:
+    GET /history?agent=0x3c44...&action=SWAP&since=2026-10-12
+    GET /history?since=1760000000&limit=500&cursor=<next>
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / "data" / "history.db"
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+COLUMNS = (
+    "ts", "agent", "iteration", "mode", "status", "action", "reason",
+    "zero_for_one", "amount_in", "min_amount_out",
+    "sub_balance", "spent", "vault_balance",
+    "tx_hash", "tx_status", "gas_used", "block", "error", "meta",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    agent TEXT NOT NULL,
+    iteration INTEGER,
+    mode TEXT,
+    status TEXT,
+    action TEXT NOT NULL,
+    reason TEXT,
+    zero_for_one INTEGER,
+    amount_in TEXT,
+    min_amount_out TEXT,
+    sub_balance TEXT,
+    spent TEXT,
+    vault_balance TEXT,
+    tx_hash TEXT,
+    tx_status TEXT,
+    gas_used INTEGER,
+    block INTEGER,
+    error TEXT,
+    meta TEXT
+);
+CREATE INDEX IF NOT EXISTS decisions_agent_action_ts ON decisions(agent, action, ts);
+CREATE INDEX IF NOT EXISTS decisions_agent_ts ON decisions(agent, ts);
+CREATE INDEX IF NOT EXISTS decisions_action_ts ON decisions(action, ts);
+CREATE INDEX IF NOT EXISTS decisions_ts ON decisions(ts);
+"""
+
+_INSERT = f"INSERT INTO decisions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+
+def history_path() -> Optional[Path]:
+    """AGENT_HISTORY_DB (default data/history.db; "off" -> None)."""
+    value = os.getenv("AGENT_HISTORY_DB", "").strip()
+    if value.lower() in ("0", "off", "none"):
+        return None
+    return Path(value) if value else DEFAULT_PATH
+
+
+def connect(path, readonly: bool = False) -> sqlite3.Connection:
+    """Connection in WAL mode with the schema in place (read-only if asked)."""
+    if readonly:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(str(path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL: durable across app crashes, a commit costs no fsync
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def decision_row(ts: float, state: Dict[str, Any], mode: Optional[str] = None, receipt=None) -> Tuple:
+    """
+    Row for one write_state() record.
+
+    Args:
+        ts: Unix seconds (the agent's clock)
+        state: The state dict write_state() builds
+        mode: 'DRY_RUN' or 'LIVE'
+        receipt: Transaction receipt of a request sent this iteration
+    """
+    agent = state.get("agent") or {}
+    decision = state.get("decision") or {}
+    snapshot = state.get("snapshot") or {}
+    intent = state.get("intent") or {}
+    error = state.get("last_error") or {}
+
+    tx_hash = tx_status = gas_used = block = None
+    if receipt is not None:
+        tx_hash = receipt.get("transactionHash")
+        tx_hash = tx_hash.hex() if hasattr(tx_hash, "hex") else tx_hash
+        tx_status = "success" if receipt.get("status", 1) == 1 else "reverted"
+        gas_used = receipt.get("gasUsed")
+        block = receipt.get("blockNumber")
+    elif decision.get("action") == "REQUEST_PENDING" and mode == "DRY_RUN":
+        tx_status = "dry_run"
+    elif decision.get("action") == "ERROR":
+        tx_status = "failed"
+
+    zero_for_one = intent.get("zeroForOne")
+    meta = intent.get("meta")
+    return (
+        ts,
+        str(agent.get("address", "unknown")).lower(),
+        state.get("loop_count"),
+        mode,
+        state.get("status"),
+        decision.get("action") or "UNKNOWN",
+        decision.get("reason"),
+        None if zero_for_one is None else int(zero_for_one),
+        intent.get("amountIn"),
+        intent.get("minOut"),
+        snapshot.get("agent_sub_balance"),
+        snapshot.get("agent_spent"),
+        snapshot.get("vault_balance"),
+        tx_hash,
+        tx_status,
+        gas_used,
+        block,
+        error.get("message"),
+        json.dumps(meta, default=str) if meta else None,
+    )
+
+
+class HistoryWriter:
+    """
+    Batched, fire-and-forget inserts into the history database.
+
+    record() only enqueues a row (built by the caller, see decision_row());
+    a daemon thread inserts everything queued, up to `batch_size` rows per
+    transaction, at least every `flush_interval` seconds.
+    """
+
+    def __init__(self, path, batch_size: int = 500, flush_interval: float = 1.0):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.failed = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = connect(self.path)
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._closing = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, row: Tuple) -> None:
+        self._queue.put(row)
+
+    def record_state(self, ts: float, state: Dict[str, Any], mode: Optional[str] = None, receipt=None) -> None:
+        """record() the row of one write_state() record (see decision_row())."""
+        self._queue.put(decision_row(ts, state, mode, receipt))
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Insert what is queued and stop the thread."""
+        self._closing.set()
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._conn.close()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is not None and self.flush_interval > 0:
+                # Let a burst accumulate into one transaction (close() cuts the wait short)
+                self._closing.wait(self.flush_interval)
+            batch = []
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self._insert(batch)
+                    batch = []
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._insert(batch)
+            if item is None:
+                return
+
+    def _insert(self, batch: List[Tuple]) -> None:
+        try:
+            with self._conn:
+                self._conn.executemany(_INSERT, batch)
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            self.failed += len(batch)
+            print(f"  [Warning: Failed to write {len(batch)} history rows to {self.path}: {e}]")
+
+
+def parse_time(value) -> Optional[float]:
+    """Unix seconds from a number or an ISO date/time (naive = UTC)."""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid time: {value!r} (unix seconds or ISO 8601)")
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class HistoryStore:
+    """Read side: indexed, keyset-paginated queries (one connection per thread)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path, readonly=True)
+        return conn
+
+    def query(self, agent: Optional[str] = None, action: Optional[str] = None, since=None, until=None,
+              limit: int = DEFAULT_LIMIT, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Newest-first decisions matching the filters.
+
+        Args:
+            agent: Agent address (any case)
+            action: HOLD, SWAP, REQUEST_PENDING, ERROR, ...
+            since, until: Time range (unix seconds or ISO 8601), inclusive
+            limit: Page size (capped at MAX_LIMIT)
+            cursor: "next" of the previous page
+
+        Returns:
+            {"rows": [...], "next": cursor or None}
+
+        Raises:
+            ValueError: Bad time or cursor
+            FileNotFoundError: No history recorded yet
+        """
+        if not self.path.exists():
+            raise FileNotFoundError(f"No history database at {self.path}")
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        sql, params = build_query(agent, action, parse_time(since), parse_time(until), limit, cursor)
+        rows = [dict(row) for row in self._conn().execute(sql, params)]
+        more = len(rows) > limit
+        rows = rows[:limit]
+        for row in rows:
+            if row["meta"]:
+                row["meta"] = json.loads(row["meta"])
+            if row["zero_for_one"] is not None:
+                row["zero_for_one"] = bool(row["zero_for_one"])
+        return {
+            "rows": rows,
+            "next": f"{rows[-1]['ts']!r}:{rows[-1]['id']}" if more else None,
+        }
+
+
+def build_query(agent, action, since, until, limit, cursor) -> Tuple[str, List[Any]]:
+    """SELECT for HistoryStore.query() (one of the indexes covers every WHERE)."""
+    where, params = [], []
+    if agent:
+        where.append("agent = ?")
+        params.append(agent.lower())
+    if action:
+        where.append("action = ?")
+        params.append(action.upper())
+    if since is not None:
+        where.append("ts >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("ts <= ?")
+        params.append(until)
+    if cursor:
+        try:
+            ts, _, row_id = cursor.rpartition(":")
+            ts, row_id = float(ts), int(row_id)
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+        # Row-after-cursor in (ts DESC, id DESC) order; the plain ts bound
+        # keeps it an index range
+        where.append("ts <= ? AND (ts < ? OR id < ?)")
+        params.extend([ts, ts, row_id])
+    sql = "SELECT * FROM decisions"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY ts DESC, id DESC LIMIT ?"
+    params.append(limit + 1)
+    return sql, params
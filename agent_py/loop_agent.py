@@ -3,23 +3,39 @@ Main agent loop with modular strategy support.
 
 Polls vault state periodically and executes swaps based on strategy decisions.
 Supports DRY_RUN mode, STOP_AFTER_N_TRADES limit, and dynamic strategy loading.
+Set TRACE_FILE to record per-iteration spans (see tracing.py); send SIGUSR1
+or POST /profile to status_server to profile the next N iterations
+(see profiler.py). VIRTUAL_CLOCK=1 runs against an in-process fake vault with
+instant sleeps for soak tests (see simulation.py). The allowed routes' pools
+are mirrored locally to quote min_amount_out and plan routing (see
+pool_mirror.py and router.py; POOL_MIRROR=0 disables).
 """
 import os
 import sys
-import time
+import contextlib
 import json
+from dataclasses import replace
 from pathlib import Path
-from datetime import datetime
 from utils import (
-    create_web3_instance,
+    connect,
+    load_env,
     load_deployment_info,
-    get_vault_contract,
     get_agent_account,
     parse_token_amount,
     format_token_amount
 )
 from snapshot import get_vault_snapshot
-from strategies import build_policy, SwapIntent
+from router import Router
+from amounts import TOKENS, apply_bps, format_units, parse_units, to_decimal
+from scheduler import ExecutionScheduler
+from strategies import build_policy, SwapIntent, INDICATORS
+import tracing
+from tracing import span
+from profiler import PROFILER
+from simulation import SystemClock, silence_prints
+
+# Entry point: .env may set any of the settings read below and in main()
+load_env()
 
 # ========== 全局状态 ==========
 PNL = 0.0
@@ -27,11 +43,24 @@ PNL_HISTORY = []
 LOGS = []
 BALANCE_HISTORY = []  # Track last 20 balance snapshots for frontend chart
 
+# Time source for sleeps and timestamps (VirtualClock in VIRTUAL_CLOCK mode)
+CLOCK = SystemClock()
+
+# Push channel to status_server (state_push: STATE_BUS_SOCKET or STATUS_PUSH_URL)
+PUBLISHER = None
+
+# Batched SQLite recorder of every write_state() (history.HistoryWriter, AGENT_HISTORY_DB)
+HISTORY = None
+
 # Project root directory (independent of cwd)
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 
-# Absolute path to state file (anchored to project root)
-STATE_FILE = PROJECT_ROOT / "agent_py" / "state.json"
+# Absolute path to state file (anchored to project root, AGENT_STATE_FILE overrides)
+STATE_FILE = Path(os.getenv("AGENT_STATE_FILE", PROJECT_ROOT / "agent_py" / "state.json"))
+
+# state.json is a mirror of what is published to status_server; with the
+# state bus in use it can be turned off (STATE_FILE_MIRROR=0)
+STATE_FILE_MIRROR = os.getenv("STATE_FILE_MIRROR", "1") != "0"
 
 # Path to agents configuration
 AGENTS_CONFIG_PATH = PROJECT_ROOT / "deployments" / "agents.local.json"
@@ -48,12 +77,15 @@ MAX_BALANCE_HISTORY = 20  # Keep last 20 balance snapshots for frontend chart
 def add_log(level, msg):
     """Add log entry and maintain size limit."""
     global LOGS
-    now = datetime.utcnow().isoformat() + "Z"
-    LOGS.append({
+    now = CLOCK.utcnow().isoformat() + "Z"
+    entry = {
         "ts": now,
         "level": level,
         "msg": msg
-    })
+    }
+    LOGS.append(entry)
+    if PUBLISHER is not None:
+        PUBLISHER.publish_log(entry)
     # Keep only last MAX_LOGS entries
     if len(LOGS) > MAX_LOGS:
         LOGS = LOGS[-MAX_LOGS:]
@@ -63,7 +95,7 @@ def update_pnl(delta):
     """Update PnL and history."""
     global PNL, PNL_HISTORY
     PNL += delta
-    now = datetime.utcnow().isoformat() + "Z"
+    now = CLOCK.utcnow().isoformat() + "Z"
     PNL_HISTORY.append({
         "timestamp": now,
         "pnl": round(PNL, 4)
@@ -85,10 +117,11 @@ def record_balance(snapshot):
 
     # Extract vault balance and convert to float (in tokens, not wei)
     vault_balance_wei = snapshot.get('vault_balance', 0)
-    vault_balance = float(vault_balance_wei) / 1e18
+    asset = snapshot.get('default_route', {}).get('token0')
+    vault_balance = float(to_decimal(vault_balance_wei, TOKENS.decimals(asset)))
 
     # Create data point with current time and balance
-    now = datetime.now().strftime("%H:%M:%S")
+    now = CLOCK.now().strftime("%H:%M:%S")
     data_point = {
         "time": now,
         "balance": round(vault_balance, 4)
@@ -102,6 +135,34 @@ def record_balance(snapshot):
         BALANCE_HISTORY.pop(0)
 
 
+def _load_json_cached(path):
+    """
+    json.load() a file, reusing the parsed value while its inode, mtime and size
+    are unchanged (both config files are re-read every iteration).
+
+    Returns:
+        The parsed value, or None when the file does not exist
+
+    Raises:
+        json.JSONDecodeError / OSError as json.load() and open() do
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+    cached = _JSON_CACHE.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with open(path, 'r') as f:
+        value = json.load(f)
+    _JSON_CACHE[path] = (stamp, value)
+    return value
+
+
+_JSON_CACHE = {}
+
+
 def load_agents_config():
     """
     Load agents configuration from deployments/agents.local.json.
@@ -109,17 +170,15 @@ def load_agents_config():
     Returns:
         dict: Agents configuration with 'agents' list
     """
-    if not AGENTS_CONFIG_PATH.exists():
-        print(f"  [Warning: Agents config not found at {AGENTS_CONFIG_PATH}]")
-        return {"agents": []}
-
     try:
-        with open(AGENTS_CONFIG_PATH, 'r') as f:
-            config = json.load(f)
-        return config
+        config = _load_json_cached(AGENTS_CONFIG_PATH)
     except Exception as e:
         print(f"  [Warning: Failed to load agents config: {e}]")
         return {"agents": []}
+    if config is None:
+        print(f"  [Warning: Agents config not found at {AGENTS_CONFIG_PATH}]")
+        return {"agents": []}
+    return config
 
 
 def load_signals():
@@ -129,13 +188,8 @@ def load_signals():
     Returns:
         tuple: (signal_dict, error_message or None)
     """
-    if not SIGNALS_PATH.exists():
-        return {}, None
-
     try:
-        with open(SIGNALS_PATH, 'r') as f:
-            signals = json.load(f)
-        return signals, None
+        signals = _load_json_cached(SIGNALS_PATH)
     except json.JSONDecodeError as e:
         error_msg = f"signals.json parse error: {str(e)}"
         print(f"  [Warning: {error_msg}]")
@@ -144,6 +198,9 @@ def load_signals():
         error_msg = f"Failed to load signals: {str(e)}"
         print(f"  [Warning: {error_msg}]")
         return {}, error_msg
+    if signals is None:
+        return {}, None
+    return signals, None
 
 
 def find_agent_config(agents_config, agent_address):
@@ -177,10 +234,22 @@ def find_agent_config(agents_config, agent_address):
     }
 
 
-def write_state(action, reason, snapshot, trade_count, iteration, agent_config, mode, intent=None, last_trade=None, error=None, status=None):
+def sleep_until_next_iteration(poll_interval):
+    """Close the traced iteration (so idle time is not counted) and sleep."""
+    tracing.end_iteration()
+    PROFILER.end_iteration()
+    print(f"Sleeping for {poll_interval}s...")
+    CLOCK.sleep(poll_interval)
+
+
+def write_state(action, reason, snapshot, trade_count, iteration, agent_config, mode, intent=None, last_trade=None, error=None, status=None, receipt=None):
     """
     Write current agent state to state.json (frontend-compatible format).
     Uses atomic write (tmp file + rename) to prevent partial reads.
+    The same record goes to status_server first when a publisher is set;
+    STATE_FILE_MIRROR=0 then skips the file. STATE_FILE is None in soak
+    runs without AGENT_STATE_FILE, which skips the file (and the encoding
+    when nothing is published either).
 
     Args:
         action: 'HOLD', 'SWAP', 'REQUEST_PENDING', or 'ERROR'
@@ -194,11 +263,12 @@ def write_state(action, reason, snapshot, trade_count, iteration, agent_config,
         last_trade: Optional dict with trade details
         error: Optional error message
         status: Optional status override (default: 'running' or 'AWAITING_APPROVAL' if action is REQUEST_PENDING)
+        receipt: Optional receipt of the request sent this iteration (history only)
     """
     global BALANCE_HISTORY
     # Use YYYY-MM-DD HH:MM:SS format (no timezone suffix) so that
     # the frontend's `new Date(...)` parses it reliably across browsers.
-    now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+    now = CLOCK.utcnow().strftime("%Y-%m-%d %H:%M:%S")
 
     # Determine status based on action if not explicitly provided
     if status is None:
@@ -213,6 +283,7 @@ def write_state(action, reason, snapshot, trade_count, iteration, agent_config,
         "last_update": now,
         "loop_count": iteration,
         "total_trades": trade_count,
+        "pnl": round(PNL, 4),
 
         "agent": {
             "address": agent_config.get("address", "unknown"),
@@ -249,18 +320,22 @@ def write_state(action, reason, snapshot, trade_count, iteration, agent_config,
             "meta": intent.meta or {}
         }
 
-        # Add human-readable fields for frontend display
+        # Add human-readable fields for frontend display (input token of the
+        # default route, metadata from the token registry)
         if intent.amount_in is not None:
-            intent_data["amount"] = f"{format_token_amount(intent.amount_in):.2f}"
-            intent_data["token"] = "USDC"  # TODO: Make this dynamic based on token config
+            route = snapshot.get('default_route', {})
+            token_in = route.get('token1') if intent.zero_for_one is False else route.get('token0')
+            intent_data["amount"] = format_units(intent.amount_in, TOKENS.decimals(token_in), places=2)
+            intent_data["token"] = TOKENS.symbol(token_in, "USDC")
 
         intent_data["strategy"] = agent_config.get("strategy", "unknown")
         intent_data["target"] = "Uniswap V4 Pool"  # TODO: Make this dynamic based on route
 
-        # Calculate slippage percentage
-        if intent.amount_in and intent.min_amount_out:
-            slippage = ((intent.amount_in - intent.min_amount_out) / intent.amount_in * 100)
-            intent_data["slippage"] = f"{slippage:.2f}%"
+        # Calculate slippage percentage (against the pool quote when there is one)
+        expected_out = (intent.meta or {}).get("quoted_out") or intent.amount_in
+        if expected_out and intent.min_amount_out:
+            hundredths = (expected_out - intent.min_amount_out) * 10000 // expected_out
+            intent_data["slippage"] = f"{format_units(hundredths, 2, places=2)}%"
 
         state["intent"] = intent_data
 
@@ -271,8 +346,8 @@ def write_state(action, reason, snapshot, trade_count, iteration, agent_config,
             "gas_used": last_trade.get("gas_used"),
             "timestamp": now,
             "event": {
-                "amountIn": str(int(last_trade.get("amount_in", 0) * 1e18)),
-                "amountOut": str(int(last_trade.get("amount_out", 0) * 1e18))
+                "amountIn": str(parse_units(last_trade.get("amount_in", 0))),
+                "amountOut": str(parse_units(last_trade.get("amount_out", 0)))
             }
         }
 
@@ -282,16 +357,32 @@ def write_state(action, reason, snapshot, trade_count, iteration, agent_config,
             "timestamp": now
         }
 
+    if HISTORY is not None:
+        HISTORY.record_state(CLOCK.time(), state, mode, receipt)
+
+    # No file (soak run without AGENT_STATE_FILE) and no push: nothing to encode
+    write_file = STATE_FILE is not None and (PUBLISHER is None or STATE_FILE_MIRROR)
+    if PUBLISHER is None and not write_file:
+        return
+
+    # Encoded once, for state.json and the status_server push
+    payload = json.dumps(state, indent=2, ensure_ascii=False)
+    if PUBLISHER is not None:
+        PUBLISHER.publish_state(payload)
+    if not write_file:
+        return
+
     # Atomic write: write to .tmp then rename
     try:
         STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
         tmp_path = STATE_FILE.with_suffix('.json.tmp')
 
-        with open(tmp_path, 'w') as f:
-            json.dump(state, f, indent=2, ensure_ascii=False)
+        with span("write_state", action=action):
+            with open(tmp_path, 'w') as f:
+                f.write(payload)
 
-        # Atomic rename (overwrites existing file)
-        tmp_path.replace(STATE_FILE)
+            # Atomic rename (overwrites existing file)
+            tmp_path.replace(STATE_FILE)
 
         print(f"  [State written to {STATE_FILE}]")
     except Exception as e:
@@ -304,6 +395,18 @@ def write_state(action, reason, snapshot, trade_count, iteration, agent_config,
             pass
 
 
+def reconcile_child(scheduler, strategy_state, vault, agent_address, now):
+    """Settle the scheduler's outstanding child request against pendingRequest()."""
+    if scheduler.state(strategy_state)["child"] is None:
+        return
+    try:
+        pending_request = vault.functions.pendingRequest().call()
+    except Exception as e:
+        print(f"  [Warning: Could not read pendingRequest: {e}]")
+        pending_request = None
+    scheduler.reconcile(strategy_state, pending_request, agent_address, now)
+
+
 def execute_swap_tx(w3, vault, agent_account, user_address, route_id, zero_for_one, amount_in, min_amount_out, dry_run=False):
     """
     Execute swap transaction (or simulate if dry_run=True).
@@ -314,8 +417,8 @@ def execute_swap_tx(w3, vault, agent_account, user_address, route_id, zero_for_o
     if dry_run:
         print("  [DRY RUN] Would execute swap transaction")
         # Simulate PnL for demo purposes
-        simulated_out = amount_in * 0.995  # 0.5% slippage
-        delta = (simulated_out - amount_in) / 1e18
+        simulated_out = apply_bps(amount_in, 50)  # 0.5% slippage
+        delta = float(to_decimal(simulated_out - amount_in))
         update_pnl(delta)
         add_log("INFO", f"DRY_RUN swap: {delta:.4f} PnL")
         return None
@@ -338,14 +441,17 @@ def execute_swap_tx(w3, vault, agent_account, user_address, route_id, zero_for_o
     })
 
     # Sign and send
-    signed_tx = agent_account.sign_transaction(tx)
+    with span("tx.sign"):
+        signed_tx = agent_account.sign_transaction(tx)
     raw = signed_tx.raw_transaction if hasattr(signed_tx, 'raw_transaction') else signed_tx.rawTransaction
-    tx_hash = w3.eth.send_raw_transaction(raw)
+    with span("rpc.send_raw_transaction"):
+        tx_hash = w3.eth.send_raw_transaction(raw)
 
     print(f"  Transaction sent: {tx_hash.hex()}")
     print("  Waiting for confirmation...")
 
-    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    with span("rpc.wait_for_receipt"):
+        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
     print(f"  Confirmed in block: {receipt['blockNumber']}")
 
     # Calculate PnL (simplified)
@@ -359,23 +465,63 @@ def execute_swap_tx(w3, vault, agent_account, user_address, route_id, zero_for_o
 
 def main():
     """Main agent loop with modular strategy support."""
+    global CLOCK, PUBLISHER, HISTORY, STATE_FILE
+
     # Configuration from environment
     dry_run = os.getenv('DRY_RUN', '0') == '1'
     stop_after_n = os.getenv('STOP_AFTER_N_TRADES')
     poll_interval = int(os.getenv('POLL_INTERVAL', '10'))  # seconds
     simulate_approval = os.getenv('SIMULATE_APPROVAL', '0') == '1'  # Trigger approval request on iteration 5
+    virtual_clock = os.getenv('VIRTUAL_CLOCK', '0') == '1'  # Fake vault + instant sleeps (soak tests)
+    max_iterations = int(os.getenv('MAX_ITERATIONS', '0'))  # 0 = run forever
+    # Live runs stop after sending a request; soak runs (and scheduled
+    # executions, see below) keep going
+    exit_on_request = os.getenv('EXIT_ON_REQUEST')
 
     mode = "DRY_RUN" if dry_run else "LIVE"
 
     if stop_after_n:
         stop_after_n = int(stop_after_n)
 
+    tracer = tracing.configure_from_env()
+    PROFILER.install_signal_handler()
+    monitor = None
+    cleanup = contextlib.ExitStack()
+
+    from state_push import publisher_from_env
+    PUBLISHER = publisher_from_env()
+    if PUBLISHER is not None:
+        cleanup.callback(PUBLISHER.close)
+    from history import HistoryWriter, history_path
+    history_db = history_path()
+    if history_db is not None:
+        try:
+            HISTORY = HistoryWriter(history_db)
+            cleanup.callback(HISTORY.close)
+        except Exception as e:
+            print(f"  [Warning: History recording disabled ({history_db}): {e}]")
+
     try:
         # Setup
-        w3 = create_web3_instance()
-        deployment = load_deployment_info()
-        vault = get_vault_contract(w3)
-        agent_account = get_agent_account(w3)
+        if virtual_clock:
+            from simulation import build_simulation, SoakMonitor
+            sim = build_simulation(
+                load_deployment_info(),
+                approval_delay=float(os.getenv('SIM_APPROVAL_DELAY', '30')),
+                reenable_delay=float(os.getenv('SIM_REENABLE_DELAY', '60')),
+            )
+            CLOCK = sim.clock
+            w3, deployment, vault, agent_account = sim.w3, sim.deployment, sim.vault, sim.agent_account
+            monitor = SoakMonitor(CLOCK, every=int(os.getenv('SIM_REPORT_EVERY', '1000')))
+            mode = f"{mode}+VIRTUAL_CLOCK"
+            if "AGENT_STATE_FILE" not in os.environ:
+                # Encoding and writing state.json dominated a soak iteration;
+                # only do it when the run asks for a file
+                STATE_FILE = None
+        else:
+            chain = connect()
+            w3, deployment, vault = chain.w3, chain.deployment, chain.vault
+            agent_account = get_agent_account(w3)
 
         user_address = deployment['actors']['user']
         agent_address = deployment['actors']['agent']
@@ -389,6 +535,13 @@ def main():
         strategy_params = agent_config.get("strategyParams", {})
         slippage_bps = int(agent_config.get("config", {}).get("slippageTolerance", 0.5) * 100)
 
+        # Child-order execution of intents above the per-trade limit (optional)
+        execution_config = agent_config.get("execution")
+        scheduler = ExecutionScheduler(execution_config) if execution_config else None
+        if exit_on_request is None:
+            exit_on_request = '0' if (virtual_clock or scheduler) else '1'
+        exit_on_request = exit_on_request == '1'
+
         # Get cap (single source of truth for max trade size)
         cap = agent_config.get("config", {}).get("cap", "100")
         max_notional = cap  # Use cap as max_notional for backward compatibility
@@ -406,9 +559,15 @@ def main():
         print(f"Mode: {mode}")
         if stop_after_n:
             print(f"Stop after: {stop_after_n} trades")
+        if max_iterations:
+            print(f"Max iterations: {max_iterations}")
         print(f"Poll interval: {poll_interval}s")
-        print(f"State file: {STATE_FILE}")
+        print(f"State file: {STATE_FILE or 'off (set AGENT_STATE_FILE to write one)'}")
         print(f"Slippage: {slippage_bps} bps")
+        if scheduler:
+            print(f"Execution: {scheduler.config['algo']} child orders for intents above the cap")
+        if tracer.enabled:
+            print(f"Trace file: {tracer.writer.path} (sample rate {tracer.sample_rate})")
         print()
 
         add_log("INFO", f"Agent started in {mode} mode with strategy={strategy_name}")
@@ -418,33 +577,89 @@ def main():
         if policy is None:
             print(f"  [Warning: Unknown strategy '{strategy_name}', will HOLD]")
             add_log("WARN", f"Unknown strategy '{strategy_name}', defaulting to HOLD")
+        else:
+            cleanup.callback(policy.close)
 
         # Get default route
         default_route_id = vault.functions.defaultRouteId().call()
 
+        # Token metadata (decimals/symbol) of the route's tokens, read once and
+        # cached on disk; the vault asset is token0
+        asset_token = None
+        try:
+            route = vault.functions.routes(default_route_id).call()
+            asset_token = route[0]
+            TOKENS.ensure(w3, route[:2])
+        except Exception as e:
+            print(f"  [Warning: Could not read default route tokens: {e}]")
+        asset_decimals = TOKENS.decimals(asset_token)
+
+        # Local mirrors of the allowed routes' pools: exact quotes for
+        # min_amount_out (default route, which approveAndExecute swaps on) and a
+        # best-execution plan across routes, without an RPC call per decision
+        # (POOL_MIRROR=0 disables)
+        router = None
+        quoter = None
+        if not virtual_clock and os.getenv('POOL_MIRROR', '1') == '1':
+            try:
+                router = Router(w3, vault, deployment['addresses']['poolManager'],
+                                resync_every=int(os.getenv('POOL_MIRROR_RESYNC', '30')))
+                router.refresh([default_route_id] + list(vault.functions.getAllowedRoutes(agent_address).call()))
+                quoter = router.mirror_for(default_route_id)
+                print(f"Pool mirrors: {len(router.mirrors)} pool(s) across {len(router.routes)} route(s)")
+            except Exception as e:
+                router = None
+                print(f"  [Warning: Pool mirror unavailable, using amount-based min_out: {e}]")
+                add_log("WARN", f"Pool mirror unavailable: {str(e)[:100]}")
+
         # Main loop
         trade_count = 0
         iteration = 0
         strategy_state = {}  # Persistent state for strategy
 
+        if virtual_clock and os.getenv('SIM_VERBOSE', '0') != '1':
+            # Per-iteration output would dominate a soak run; keep soak reports only
+            print("Soak mode: per-iteration output suppressed (SIM_VERBOSE=1 to show)")
+            cleanup.enter_context(silence_prints(__name__, "snapshot"))
+            cleanup.enter_context(contextlib.redirect_stdout(cleanup.enter_context(open(os.devnull, 'w'))))
+
         while True:
+            if max_iterations and iteration >= max_iterations:
+                break
             iteration += 1
+            if monitor:
+                monitor.report(iteration, strategy_state, {
+                    "logs": LOGS, "pnl_history": PNL_HISTORY, "balance_history": BALANCE_HISTORY,
+                }, STATE_FILE)
+            tracing.begin_iteration(iteration)
+            PROFILER.begin_iteration(iteration)
             print(f"--- Iteration {iteration} (trades executed: {trade_count}) ---")
 
             # Reload agent config to get latest enabled/cap values
-            agents_config = load_agents_config()
+            with span("load_agents_config"):
+                agents_config = load_agents_config()
             agent_config = find_agent_config(agents_config, agent_address)
             enabled = agent_config.get("enabled", True)
             cap = agent_config.get("config", {}).get("cap", "100")
 
             # Get current state
-            snapshot = get_vault_snapshot(w3, vault, deployment)
+            with span("snapshot"):
+                snapshot = get_vault_snapshot(w3, vault, deployment)
 
             # Record balance for frontend chart
             record_balance(snapshot)
 
-            agent_balance = format_token_amount(snapshot['agent_sub_balance'])
-            agent_spent = format_token_amount(snapshot['agent_spent'])
+            if router:
+                try:
+                    with span("pool_mirror"):
+                        router.refresh([default_route_id] + list(snapshot['agent_config']['allowedRoutes']))
+                        router.poll()
+                    quoter = router.mirror_for(default_route_id)
+                except Exception as e:
+                    print(f"  [Warning: Pool mirror poll failed: {e}]")
+
+            agent_balance = format_token_amount(snapshot['agent_sub_balance'], asset_decimals)
+            agent_spent = format_token_amount(snapshot['agent_spent'], asset_decimals)
 
             print(f"Agent sub-balance: {agent_balance:.4f} tokens")
             print(f"Agent spent: {agent_spent:.4f} tokens")
@@ -455,17 +670,34 @@ def main():
             if not enabled:
                 print("Agent is disabled, skipping strategy execution")
                 add_log("INFO", f"Iteration {iteration} HOLD (agent disabled)")
-                write_state('HOLD', 'agent_disabled', snapshot, trade_count, iteration, agent_config, mode, error=None)
+                intent = None
+                if scheduler:
+                    # The vault auto-revokes after every executed child: still
+                    # settle it, and let the ttl cancel the parent's residual
+                    with span("scheduler"):
+                        now = CLOCK.time()
+                        reconcile_child(scheduler, strategy_state, vault, agent_address, now)
+                        scheduler.expire(strategy_state, now)
+                    if scheduler.state(strategy_state)["parent"] is not None:
+                        intent = scheduler.waiting(strategy_state, SwapIntent.hold("agent_disabled"))
+                write_state('HOLD', 'agent_disabled', snapshot, trade_count, iteration, agent_config, mode,
+                            intent=intent, error=None)
                 print()
-                print(f"Sleeping for {poll_interval}s...")
-                time.sleep(poll_interval)
+                sleep_until_next_iteration(poll_interval)
                 continue
 
             # Load signals (optional)
-            signals, signal_error = load_signals()
+            with span("load_signals"):
+                signals, signal_error = load_signals()
+
+            # Shared indicators, updated once per tick of the signal source
+            features = {}
+            if policy and policy.features:
+                with span("indicators"):
+                    features = INDICATORS.compute((policy,), signals)[0]
 
             # Build context for strategy
-            cap_wei = parse_token_amount(cap)
+            cap_wei = parse_token_amount(cap, asset_decimals)
             ctx = {
                 "signal": signals,
                 "sub_balance_wei": snapshot['agent_sub_balance'],
@@ -475,21 +707,45 @@ def main():
                 "slippage_bps": slippage_bps,
                 "agent_address": agent_address,
                 "user_address": user_address,
-                "strategy_state": strategy_state
+                "strategy_state": strategy_state,
+                "features": features,
+                "quoter": quoter,
+                "token_decimals": asset_decimals
             }
 
             # Make decision using strategy
             current_error = signal_error  # Track any errors for state.json
             if policy:
                 try:
-                    intent = policy.decide(ctx)
+                    with span("strategy.decide", strategy=strategy_name) as s:
+                        intent = policy.decide(ctx)
+                        s.set(action=intent.action, reason=intent.reason)
                 except Exception as e:
                     print(f"  [Error in strategy: {e}]")
                     add_log("ERROR", f"Strategy error: {str(e)[:100]}")
                     intent = SwapIntent(action="HOLD", reason=f"strategy_error:{str(e)[:50]}")
                     current_error = f"Strategy error: {str(e)}"
             else:
-                intent = SwapIntent(action="HOLD", reason="no_policy")
+                intent = SwapIntent.hold("no_policy")
+
+            # Work intents above the per-trade limit as child requests
+            if scheduler:
+                with span("scheduler"):
+                    now = CLOCK.time()
+                    reconcile_child(scheduler, strategy_state, vault, agent_address, now)
+                    scheduled = scheduler.step(strategy_state, intent, ctx, now)
+                if scheduled is not None:
+                    intent = scheduled
+                elif intent.action == 'SWAP':
+                    if policy:
+                        policy.unsent(strategy_state, intent)
+                    intent = scheduler.waiting(strategy_state, intent)
+
+            if router and intent.action == 'SWAP' and intent.amount_in:
+                with span("router.plan"):
+                    routing = router.plan(intent.amount_in, intent.zero_for_one, default_route_id)
+                if routing:
+                    intent = replace(intent, meta=dict(intent.meta or {}, routing=routing))
 
             print(f"Decision: {intent.action}")
             print(f"Reason: {intent.reason}")
@@ -536,8 +792,7 @@ def main():
 
                 # In a real implementation, we would wait for approval here
                 # For simulation, we'll just continue after showing the state
-                print(f"Sleeping for {poll_interval}s...")
-                time.sleep(poll_interval)
+                sleep_until_next_iteration(poll_interval)
                 continue
 
             if intent.action == 'SWAP':
@@ -545,7 +800,7 @@ def main():
                 amount_in = intent.amount_in
                 zero_for_one = intent.zero_for_one
 
-                amount_in_tokens = format_token_amount(amount_in)
+                amount_in_tokens = format_token_amount(amount_in, asset_decimals)
 
                 print(f"[Agent] Strategy triggered")
                 print(f"[Agent] Requesting execution: {amount_in_tokens:.4f} tokens ({amount_in} wei)")
@@ -554,20 +809,27 @@ def main():
                 try:
                     if not dry_run:
                         # Send requestExecution transaction
-                        tx = vault.functions.requestExecution(
-                            amount_in,
-                            zero_for_one
-                        ).build_transaction({
-                            'from': agent_address,
-                            'nonce': w3.eth.get_transaction_count(agent_address),
-                            'gas': 200000,
-                            'gasPrice': w3.eth.gas_price
-                        })
-
-                        signed_tx = agent_account.sign_transaction(tx)
+                        with span("tx.build"):
+                            tx = vault.functions.requestExecution(
+                                amount_in,
+                                zero_for_one
+                            ).build_transaction({
+                                'from': agent_address,
+                                'nonce': w3.eth.get_transaction_count(agent_address),
+                                'gas': 200000,
+                                'gasPrice': w3.eth.gas_price
+                            })
+
+                        with span("tx.sign"):
+                            signed_tx = agent_account.sign_transaction(tx)
                         raw = signed_tx.raw_transaction if hasattr(signed_tx, 'raw_transaction') else signed_tx.rawTransaction
-                        tx_hash = w3.eth.send_raw_transaction(raw)
-                        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+                        with span("rpc.send_raw_transaction"):
+                            tx_hash = w3.eth.send_raw_transaction(raw)
+                        with span("rpc.wait_for_receipt"):
+                            receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+                        if receipt.get('status', 1) != 1:
+                            # e.g. REQUEST_EXISTS: nothing was requested
+                            raise RuntimeError(f"requestExecution reverted: {tx_hash.hex()}")
 
                         print(f"  Request sent: {tx_hash.hex()}")
                         print(f"  Gas used: {receipt['gasUsed']}")
@@ -576,15 +838,22 @@ def main():
                         receipt = None
 
                     print("[Agent] Waiting for owner approval...")
+                    if scheduler:
+                        scheduler.sent(strategy_state, intent, CLOCK.time(), filled=dry_run)
 
                     # Write state showing request pending
-                    write_state('REQUEST_PENDING', intent.reason, snapshot, trade_count, iteration, agent_config, mode, intent=intent, error=current_error)
+                    write_state('REQUEST_PENDING', intent.reason, snapshot, trade_count, iteration, agent_config, mode, intent=intent, error=current_error, receipt=receipt)
 
                     # Stop after sending request (wait for approval)
-                    break
+                    if exit_on_request:
+                        break
 
                 except Exception as e:
                     print(f"  Error requesting execution: {e}")
+                    if policy:
+                        policy.unsent(strategy_state, intent)
+                    if scheduler:
+                        scheduler.failed(strategy_state, intent, str(e), CLOCK.time())
                     add_log("ERROR", f"Request failed: {str(e)[:100]}")
                     write_state('ERROR', intent.reason, snapshot, trade_count, iteration, agent_config, mode, intent=intent, error=str(e))
 
@@ -599,8 +868,12 @@ def main():
             if stop_after_n and trade_count >= stop_after_n:
                 break
 
-            print(f"Sleeping for {poll_interval}s...")
-            time.sleep(poll_interval)
+            sleep_until_next_iteration(poll_interval)
+
+        if monitor:
+            monitor.report(iteration, strategy_state, {
+                "logs": LOGS, "pnl_history": PNL_HISTORY, "balance_history": BALANCE_HISTORY,
+            }, STATE_FILE, force=True)
 
     except KeyboardInterrupt:
         print("\n\nAgent loop stopped by user.")
@@ -614,6 +887,11 @@ def main():
         traceback.print_exc()
         return 1
 
+    finally:
+        cleanup.close()
+        tracer.close()
+        PROFILER.stop()
+
     return 0
 
 
@@ -2,12 +2,20 @@
 Manual swap execution script.
 
 Execute a single swap transaction through SafeAgentVault.executeSwap().
+
+Usage:
+    python manual_swap.py                       # 50 tokens on the default route
+    python manual_swap.py --amount 80 --route best
+    python manual_swap.py --amount 80 --route split --slippage-bps 50
+
+--route best picks the allowed route with the highest quoted output and
+--route split sends one executeSwap per leg of the router's split (see
+router.py); both set min_amount_out from the local quote.
 """
+import argparse
 import sys
 from utils import (
-    create_web3_instance,
-    load_deployment_info,
-    get_vault_contract,
+    connect,
     get_agent_account,
     parse_token_amount,
     format_token_amount
@@ -70,13 +78,45 @@ def parse_swap_event(vault, receipt):
             continue
     return None
 
-def main():
+def plan_legs(w3, vault, deployment, agent_address, default_route_id, route_mode, amount_in,
+              zero_for_one, slippage_bps):
+    """
+    (route id, amount in, min amount out) per executeSwap to send.
+
+    The default route keeps the fixed 1-token minimum; best / split quote
+    every allowed route locally and apply slippage to the quoted output.
+    """
+    if route_mode == "default":
+        return [(default_route_id, amount_in, parse_token_amount("1"))]
+
+    from router import Router
+
+    router = Router(w3, vault, deployment['addresses']['poolManager'], resync_every=0)
+    router.refresh([default_route_id] + list(vault.functions.getAllowedRoutes(agent_address).call()))
+    if route_mode == "best":
+        best = router.best(amount_in, zero_for_one)
+        legs = [(best[0], amount_in, best[1])] if best else []
+    else:
+        legs = router.split(amount_in, zero_for_one)
+    if not legs:
+        raise RuntimeError("No quotable route for this pair")
+    return [(route_id, leg_in, leg_out * (10000 - slippage_bps) // 10000)
+            for route_id, leg_in, leg_out in legs]
+
+def main(argv=None):
     """Main entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--amount", default="50", help="Amount in, in tokens (default 50)")
+    parser.add_argument("--route", choices=("default", "best", "split"), default="default")
+    parser.add_argument("--slippage-bps", type=int, default=50,
+                        help="Slippage on quoted output for --route best/split (default 50)")
+    parser.add_argument("--one-for-zero", action="store_true", help="Swap token1 -> token0")
+    args = parser.parse_args(argv)
+
     try:
         # Setup
-        w3 = create_web3_instance()
-        deployment = load_deployment_info()
-        vault = get_vault_contract(w3)
+        chain = connect()
+        w3, deployment, vault = chain.w3, chain.deployment, chain.vault
         agent_account = get_agent_account(w3)
 
         user_address = deployment['actors']['user']
@@ -109,37 +149,40 @@ def main():
         print()
 
         # Execute swap
-        amount_in = parse_token_amount("50")  # 50 tokens
-        min_amount_out = parse_token_amount("1")  # 1 token minimum
-        zero_for_one = True
-
-        print(f"Executing swap:")
-        print(f"  Amount in: {format_token_amount(amount_in):.4f} tokens")
-        print(f"  Direction: {'token0 -> token1' if zero_for_one else 'token1 -> token0'}")
-        print(f"  Min amount out: {format_token_amount(min_amount_out):.4f} tokens")
-        print()
+        amount_in = parse_token_amount(args.amount)
+        zero_for_one = not args.one_for_zero
+        legs = plan_legs(w3, vault, deployment, agent_address, default_route_id, args.route,
+                         amount_in, zero_for_one, args.slippage_bps)
+
+        for route_id, leg_in, min_amount_out in legs:
+            print(f"Executing swap:")
+            print(f"  Route ID: {route_id.hex()}")
+            print(f"  Amount in: {format_token_amount(leg_in):.4f} tokens")
+            print(f"  Direction: {'token0 -> token1' if zero_for_one else 'token1 -> token0'}")
+            print(f"  Min amount out: {format_token_amount(min_amount_out):.4f} tokens")
+            print()
 
-        receipt = execute_swap(
-            w3, vault, agent_account,
-            user_address, default_route_id,
-            zero_for_one, amount_in, min_amount_out
-        )
+            receipt = execute_swap(
+                w3, vault, agent_account,
+                user_address, route_id,
+                zero_for_one, leg_in, min_amount_out
+            )
 
-        print(f"Transaction confirmed in block: {receipt['blockNumber']}")
-        print(f"Gas used: {receipt['gasUsed']}")
-        print()
-
-        # Parse event
-        event_args = parse_swap_event(vault, receipt)
-        if event_args:
-            print("AgentSwapExecuted event:")
-            print(f"  Agent: {event_args['agent']}")
-            print(f"  User: {event_args['user']}")
-            print(f"  Route ID: {event_args['routeId'].hex()}")
-            print(f"  Amount in: {format_token_amount(event_args['amountIn']):.4f} tokens")
-            print(f"  Amount out: {format_token_amount(event_args['amountOut']):.4f} tokens")
+            print(f"Transaction confirmed in block: {receipt['blockNumber']}")
+            print(f"Gas used: {receipt['gasUsed']}")
             print()
 
+            # Parse event
+            event_args = parse_swap_event(vault, receipt)
+            if event_args:
+                print("AgentSwapExecuted event:")
+                print(f"  Agent: {event_args['agent']}")
+                print(f"  User: {event_args['user']}")
+                print(f"  Route ID: {event_args['routeId'].hex()}")
+                print(f"  Amount in: {format_token_amount(event_args['amountIn']):.4f} tokens")
+                print(f"  Amount out: {format_token_amount(event_args['amountOut']):.4f} tokens")
+                print()
+
         # Check balances after
         agent_balance_after = vault.functions.agentBalances(user_address, agent_address).call()
         agent_spent_after = vault.functions.agentSpent(user_address, agent_address).call()
@@ -96,13 +96,12 @@ class TradingPolicy:
 def main():
     """Test policy with mock snapshot."""
     from snapshot import get_vault_snapshot
-    from utils import create_web3_instance, load_deployment_info, get_vault_contract
+    from utils import connect
 
     try:
         # Setup
-        w3 = create_web3_instance()
-        deployment = load_deployment_info()
-        vault = get_vault_contract(w3)
+        chain = connect()
+        w3, deployment, vault = chain.w3, chain.deployment, chain.vault
 
         # Get snapshot
         snapshot = get_vault_snapshot(w3, vault, deployment)
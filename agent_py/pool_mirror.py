@@ -0,0 +1,265 @@
+"""
+Local mirror of the default route's pool and an off-chain swap quoter.
+
+The PoolManager in this repo (contracts/uniswap-v4/PoolManager.sol) is a
+constant-product pool: per-pool reserves plus a fee in hundredths of a bip.
+PoolMirror keeps those reserves in memory, seeded once from getPool() and
+advanced by the pool's Swap events (amount0/amount1 are the signed reserve
+deltas), and quotes swaps with the exact integer math of PoolManager.swap,
+so a quote equals what the swap returns at the mirrored state, without an
+RPC call per decision.
+
+addLiquidity emits no event, so poll() also re-reads getPool() every
+`resync_every` polls (and whenever reading the logs fails).
+
+For the v4 view of the same state the mirror exposes sqrt_price_x96 and
+liquidity of the equivalent full-range position (a single range: there are
+no initialized ticks to cross).
+
+Usage:
+    mirror = PoolMirror.from_route(w3, deployment['addresses']['poolManager'],
+                                   snapshot['default_route'])
+    mirror.poll()
+    amount_out = mirror.quote(amount_in, zero_for_one=True)
+"""
+import math
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+FEE_DENOMINATOR = 1_000_000
+Q96 = 1 << 96
+
+SWAP_EVENT = "Swap(bytes32,address,bool,int256,int256)"
+
+# Minimal PoolManager ABI: the getPool() view
+POOL_MANAGER_ABI = [
+    {
+        "inputs": [{
+            "components": [
+                {"name": "token0", "type": "address"},
+                {"name": "token1", "type": "address"},
+                {"name": "fee", "type": "uint24"}
+            ],
+            "name": "key",
+            "type": "tuple"
+        }],
+        "name": "getPool",
+        "outputs": [{
+            "components": [
+                {"name": "initialized", "type": "bool"},
+                {"name": "reserve0", "type": "uint256"},
+                {"name": "reserve1", "type": "uint256"},
+                {"name": "fee", "type": "uint24"}
+            ],
+            "name": "",
+            "type": "tuple"
+        }],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+
+def pool_id(token0: str, token1: str, fee: int) -> bytes:
+    """keccak256(abi.encode(token0, token1, fee)), as PoolManager computes it."""
+    from web3 import Web3
+
+    encoded = b"".join(bytes.fromhex(address[2:]).rjust(32, b"\0") for address in (token0, token1))
+    return bytes(Web3.keccak(encoded + int(fee).to_bytes(32, "big")))
+
+
+def quote_exact_in(amount_in: int, reserve_in: int, reserve_out: int, fee: int) -> int:
+    """
+    PoolManager.swap output for an exact input (integer math, same rounding).
+
+    Returns:
+        int: Amount out in wei; 0 where the swap would revert
+            (no liquidity or "insufficient output")
+    """
+    if amount_in <= 0 or reserve_in <= 0 or reserve_out <= 0:
+        return 0
+    amount_in_with_fee = amount_in * (FEE_DENOMINATOR - fee) // FEE_DENOMINATOR
+    return reserve_out * amount_in_with_fee // (reserve_in + amount_in_with_fee)
+
+
+@lru_cache(maxsize=None)
+def swap_topic() -> str:
+    """topic0 of PoolManager's Swap event."""
+    from web3 import Web3
+
+    return "0x" + Web3.keccak(text=SWAP_EVENT).hex().removeprefix("0x")
+
+
+def hex_topic(topic) -> str:
+    """Normalize a log topic (HexBytes, bytes or str) to a 0x-prefixed lowercase string."""
+    if isinstance(topic, str):
+        return "0x" + topic.lower().removeprefix("0x")
+    return "0x" + bytes(topic).hex()
+
+
+def decode_swap(log) -> tuple:
+    """(amount0, amount1) reserve deltas of a Swap event log."""
+    data = log["data"]
+    data = bytes.fromhex(data[2:]) if isinstance(data, str) else bytes(data)
+    # data: zeroForOne, amount0, amount1
+    return tuple(int.from_bytes(data[32 * i:32 * (i + 1)], "big", signed=True) for i in (1, 2))
+
+
+class PoolMirror:
+    """
+    In-memory reserves of one PoolManager pool.
+
+    Attributes:
+        token0, token1, fee: Pool key
+        reserve0, reserve1: Mirrored reserves (wei)
+        block: Last block the mirror reflects (None before the first sync)
+    """
+
+    def __init__(self, token0: str, token1: str, fee: int, reserve0: int = 0, reserve1: int = 0,
+                 resync_every: int = 30):
+        self.token0 = token0
+        self.token1 = token1
+        self.fee = int(fee)
+        self.reserve0 = int(reserve0)
+        self.reserve1 = int(reserve1)
+        self.resync_every = resync_every
+        self.block = None
+        self.swaps_applied = 0
+        self._polls = 0
+        self.pool_topic = None  # pool id as a log topic (set by from_route)
+        self._w3 = None
+        self._contract = None
+
+    @classmethod
+    def from_route(cls, w3, pool_manager_address: str, route: Dict[str, Any], resync_every: int = 30):
+        """
+        Mirror the pool of a vault route (snapshot['default_route']) and sync it.
+
+        Args:
+            w3: Web3 instance
+            pool_manager_address: PoolManager address (deployment['addresses']['poolManager'])
+            route: Dict with token0, token1 and fee
+            resync_every: Polls between full getPool() re-reads
+        """
+        from web3 import Web3
+
+        mirror = cls(route['token0'], route['token1'], route['fee'], resync_every=resync_every)
+        address = Web3.to_checksum_address(pool_manager_address)
+        mirror._w3 = w3
+        mirror._contract = w3.eth.contract(address=address, abi=POOL_MANAGER_ABI)
+        mirror.pool_topic = "0x" + pool_id(mirror.token0, mirror.token1, mirror.fee).hex()
+        mirror.sync()
+        return mirror
+
+    def __getstate__(self):
+        # Quoting needs only the reserves; drop the web3 handles so the mirror
+        # can cross process boundaries (ensemble process members)
+        state = self.__dict__.copy()
+        state.update(_w3=None, _contract=None)
+        return state
+
+    # ----- chain sync -----
+
+    def sync(self) -> None:
+        """Re-read the reserves with getPool() at the current block."""
+        block = self._w3.eth.block_number
+        pool = self._contract.functions.getPool((self.token0, self.token1, self.fee)).call(
+            block_identifier=block)
+        self.reserve0, self.reserve1 = int(pool[1]), int(pool[2])
+        self.block = block
+
+    def apply_swap(self, amount0: int, amount1: int) -> None:
+        """Apply one Swap event (signed deltas: positive into the pool)."""
+        self.reserve0 += amount0
+        self.reserve1 += amount1
+        self.swaps_applied += 1
+
+    def poll(self) -> int:
+        """
+        Catch up with the chain: apply Swap events since the last block.
+
+        Returns:
+            int: Number of Swap events applied (-1 after a full resync)
+        """
+        self._polls += 1
+        if self.block is None or (self.resync_every and self._polls % self.resync_every == 0):
+            self.sync()
+            return -1
+
+        head = self._w3.eth.block_number
+        if head <= self.block:
+            return 0
+        try:
+            logs = self._w3.eth.get_logs({
+                "address": self._contract.address,
+                "topics": [swap_topic(), self.pool_topic],
+                "fromBlock": self.block + 1,
+                "toBlock": head,
+            })
+        except Exception as e:
+            print(f"  [Warning: pool mirror log read failed, resyncing: {e}]")
+            self.sync()
+            return -1
+
+        for log in logs:
+            self.apply_swap(*decode_swap(log))
+        self.block = head
+        return len(logs)
+
+    # ----- quoting -----
+
+    def quote(self, amount_in: int, zero_for_one: bool) -> int:
+        """Exact output of swapping amount_in (wei) at the mirrored state."""
+        if zero_for_one:
+            return quote_exact_in(amount_in, self.reserve0, self.reserve1, self.fee)
+        return quote_exact_in(amount_in, self.reserve1, self.reserve0, self.fee)
+
+    def quote_many(self, amounts_in, zero_for_one: bool):
+        """
+        Vectorized quote() over many candidate sizes (numpy float64).
+
+        Same formula in floating point: matches quote() to float rounding,
+        meant for sizing searches; use quote() for the amount actually sent.
+        """
+        import numpy as np
+
+        reserve_in, reserve_out = ((self.reserve0, self.reserve1) if zero_for_one
+                                   else (self.reserve1, self.reserve0))
+        amounts = np.asarray(amounts_in, dtype=np.float64)
+        if reserve_in <= 0 or reserve_out <= 0:
+            return np.zeros_like(amounts)
+        with_fee = np.floor(amounts * ((FEE_DENOMINATOR - self.fee) / FEE_DENOMINATOR))
+        out = np.floor(float(reserve_out) * with_fee / (float(reserve_in) + with_fee))
+        return np.where(amounts > 0, out, 0.0)
+
+    # ----- v4 view -----
+
+    @property
+    def price(self) -> Optional[float]:
+        """Marginal price of token0 in token1 (before fees)."""
+        return self.reserve1 / self.reserve0 if self.reserve0 > 0 else None
+
+    @property
+    def sqrt_price_x96(self) -> int:
+        """sqrt(reserve1 / reserve0) in Q64.96, as slot0 would report it."""
+        if self.reserve0 <= 0:
+            return 0
+        return math.isqrt((self.reserve1 << 192) // self.reserve0)
+
+    @property
+    def liquidity(self) -> int:
+        """Liquidity of the equivalent full-range position: sqrt(reserve0 * reserve1)."""
+        return math.isqrt(self.reserve0 * self.reserve1)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """JSON-friendly summary (amounts as strings, like state.json)."""
+        return {
+            "token0": self.token0,
+            "token1": self.token1,
+            "fee": self.fee,
+            "reserve0": str(self.reserve0),
+            "reserve1": str(self.reserve1),
+            "sqrtPriceX96": str(self.sqrt_price_x96),
+            "liquidity": str(self.liquidity),
+            "block": self.block,
+        }
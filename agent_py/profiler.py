@@ -0,0 +1,273 @@
+"""
+Runtime-toggled sampling profiler and allocation tracker for loop_agent.
+
+A profiling session covers the next N loop iterations and can be started
+while the agent keeps running, either by:
+    - sending SIGUSR1 to the agent process (sending it again stops early), or
+    - POST /profile on status_server (writes PROFILE_TRIGGER, polled once
+      per iteration).
+
+During a session a daemon thread samples the loop thread's stack every
+PROFILE_INTERVAL_MS and tracemalloc snapshots are taken at the boundaries
+of each top-level phase (the tracing.span names used by loop_agent). At the
+end of the session two files are written to PROFILE_DIR:
+    - profile-<ts>.folded: collapsed stacks ("a;b;c count"), loadable by
+      flamegraph.pl, speedscope or inferno
+    - alloc-<ts>.txt: top allocation sites per phase
+
+Environment:
+    PROFILE_ITERATIONS: Iterations per session (default: 50)
+    PROFILE_INTERVAL_MS: Stack sampling interval (default: 5)
+    PROFILE_TOP: Allocation sites reported per phase (default: 15)
+    PROFILE_DIR: Output directory (default: agent_py/profiles)
+"""
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import tracing
+
+AGENT_DIR = Path(__file__).resolve().parent
+
+# Trigger file polled by the loop (written by status_server POST /profile)
+PROFILE_TRIGGER = AGENT_DIR / "profile.trigger"
+
+DEFAULT_PROFILE_DIR = AGENT_DIR / "profiles"
+
+
+def request_profile(iterations=None):
+    """
+    Ask a running loop_agent to start a profiling session.
+
+    Args:
+        iterations: Iterations to profile (None = PROFILE_ITERATIONS)
+
+    Returns:
+        Path: The trigger file that was written
+    """
+    PROFILE_TRIGGER.write_text(str(iterations) if iterations else "")
+    return PROFILE_TRIGGER
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)})"
+
+
+class Profiler:
+    """
+    Sampling profiler + per-phase allocation tracker.
+
+    The loop calls begin_iteration()/end_iteration(); phases are reported
+    through tracing's phase listener hook while a session is active.
+    """
+
+    def __init__(self, iterations=50, interval_ms=5.0, top=15, output_dir=None):
+        """
+        Initialize profiler.
+
+        Args:
+            iterations: Default number of iterations per session
+            interval_ms: Stack sampling interval in milliseconds
+            top: Number of allocation sites to report per phase
+            output_dir: Directory for .folded / alloc reports
+        """
+        self.default_iterations = iterations
+        self.interval = interval_ms / 1000.0
+        self.top = top
+        self.output_dir = Path(output_dir) if output_dir else DEFAULT_PROFILE_DIR
+
+        self.active = False
+        self._requested = None        # iterations requested by signal/trigger
+        self._stop_requested = False
+        self._remaining = 0
+        self._started_at = None
+
+        self._target_thread = None
+        self._sampler = None
+        self._in_iteration = False
+        self._phases = []             # current span stack (loop thread only)
+
+        self._stacks = Counter()
+        self._alloc = defaultdict(Counter)     # phase -> site -> bytes
+        self._alloc_count = defaultdict(Counter)
+        self._phase_snapshot = None
+        self._mem_start = 0
+
+    @classmethod
+    def from_env(cls):
+        """Build a profiler from PROFILE_* environment variables."""
+        return cls(
+            iterations=int(os.getenv("PROFILE_ITERATIONS", "50")),
+            interval_ms=float(os.getenv("PROFILE_INTERVAL_MS", "5")),
+            top=int(os.getenv("PROFILE_TOP", "15")),
+            output_dir=os.getenv("PROFILE_DIR") or None,
+        )
+
+    # ----- triggers -----
+
+    def install_signal_handler(self, signum=None):
+        """Toggle profiling on SIGUSR1 (no-op on platforms without it)."""
+        signum = signum or getattr(signal, "SIGUSR1", None)
+        if signum is None:
+            return
+        signal.signal(signum, self._on_signal)
+
+    def _on_signal(self, signum, frame):
+        # Only set flags here; the loop thread acts on them
+        if self.active:
+            self._stop_requested = True
+        else:
+            self._requested = self.default_iterations
+
+    def _check_trigger(self):
+        try:
+            raw = PROFILE_TRIGGER.read_text().strip()
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"  [Warning: Failed to read profile trigger: {e}]")
+            raw = ""
+        try:
+            PROFILE_TRIGGER.unlink()
+        except FileNotFoundError:
+            pass
+        self._requested = int(raw) if raw.isdigit() else self.default_iterations
+
+    # ----- iteration hooks (called from loop_agent) -----
+
+    def begin_iteration(self, iteration):
+        """Start/continue a session; call at the top of every iteration."""
+        if self.active:
+            if self._stop_requested or self._remaining <= 0:
+                self.stop()
+        else:
+            if PROFILE_TRIGGER.exists():
+                self._check_trigger()
+            if self._requested:
+                self.start(self._requested)
+
+        if self.active:
+            self._remaining -= 1
+            self._in_iteration = True
+
+    def end_iteration(self):
+        """Mark the end of an iteration (idle sleep is not sampled)."""
+        self._in_iteration = False
+
+    # ----- phase listener (tracing hook) -----
+
+    def on_enter(self, name):
+        if not self._phases:
+            self._phase_snapshot = self._take_snapshot()
+        self._phases.append(name)
+
+    def on_exit(self, name):
+        if self._phases:
+            self._phases.pop()
+        if not self._phases and self._phase_snapshot is not None:
+            after = self._take_snapshot()
+            for stat in after.compare_to(self._phase_snapshot, "lineno")[:self.top * 2]:
+                if stat.size_diff <= 0:
+                    continue
+                frame = stat.traceback[0]
+                site = f"{frame.filename}:{frame.lineno}"
+                self._alloc[name][site] += stat.size_diff
+                self._alloc_count[name][site] += stat.count_diff
+            self._phase_snapshot = None
+
+    @staticmethod
+    def _take_snapshot():
+        # Hide tracemalloc's own bookkeeping from the report
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+
+    # ----- session control -----
+
+    def start(self, iterations):
+        """Start a profiling session covering `iterations` iterations."""
+        self.active = True
+        self._requested = None
+        self._stop_requested = False
+        self._remaining = iterations
+        self._started_at = datetime.now()
+        self._stacks = Counter()
+        self._alloc = defaultdict(Counter)
+        self._alloc_count = defaultdict(Counter)
+        self._phases = []
+
+        tracemalloc.start()
+        self._mem_start = tracemalloc.get_traced_memory()[0]
+        tracing.set_phase_listener(self)
+
+        self._target_thread = threading.get_ident()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._sampler.start()
+        print(f"  [Profiler: started for {iterations} iterations]")
+
+    def stop(self):
+        """Stop the session and write the reports."""
+        if not self.active:
+            return None
+        self.active = False
+        self._in_iteration = False
+        tracing.set_phase_listener(None)
+        self._sampler.join(timeout=1.0)
+
+        mem_end, mem_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        paths = self._dump(mem_end, mem_peak)
+        print(f"  [Profiler: wrote {paths[0]} and {paths[1]}]")
+        return paths
+
+    def _sample_loop(self):
+        frames = sys._current_frames
+        while self.active:
+            time.sleep(self.interval)
+            if not self._in_iteration:
+                continue
+            frame = frames().get(self._target_thread)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.reverse()
+            phase = self._phases[-1] if self._phases else "loop"
+            self._stacks[f"[{phase}];" + ";".join(stack)] += 1
+
+    def _dump(self, mem_end, mem_peak):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = self._started_at.strftime("%Y%m%d-%H%M%S")
+        folded_path = self.output_dir / f"profile-{stamp}.folded"
+        alloc_path = self.output_dir / f"alloc-{stamp}.txt"
+
+        with open(folded_path, "w") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        with open(alloc_path, "w") as f:
+            f.write(f"Profile started {self._started_at.isoformat()}\n")
+            f.write(f"Stack samples: {sum(self._stacks.values())}\n")
+            f.write(f"Traced memory: start={self._mem_start} end={mem_end} peak={mem_peak} bytes\n")
+            for phase in sorted(self._alloc, key=lambda p: -sum(self._alloc[p].values())):
+                sites = self._alloc[phase]
+                f.write(f"\n== {phase} (+{sum(sites.values())} bytes retained) ==\n")
+                for site, size in sites.most_common(self.top):
+                    f.write(f"  {size:>10} B  {self._alloc_count[phase][site]:>7} blocks  {site}\n")
+
+        return folded_path, alloc_path
+
+
+# Process-wide profiler used by loop_agent
+PROFILER = Profiler.from_env()
@@ -0,0 +1,256 @@
+"""
+Best-execution routing across the agent's allowed routes.
+
+Router indexes every allowed route (routes(routeId) is read once per route
+id) and mirrors each distinct pool with pool_mirror.PoolMirror. All mirrors
+catch up together with a single eth_getLogs filtered on every pool id, so a
+poll costs two round trips (block number + logs) however many pools there
+are, and quoting is local:
+
+    best()   exact quote on every route of the pair, highest output wins
+    split()  spreads an order over the pools in chunks, each chunk to the
+             pool with the highest marginal output (optimal for the
+             constant-product pools' concave output curves)
+    plan()   both, compared with the default route, for state.json
+
+Usage:
+    router = Router(w3, vault, deployment['addresses']['poolManager'])
+    router.refresh(snapshot['agent_config']['allowedRoutes'] + [default_route_id])
+    router.poll()
+    route_id, amount_out = router.best(amount_in, zero_for_one=True)
+"""
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pool_mirror import PoolMirror, decode_swap, hex_topic, swap_topic
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+class Router:
+    """
+    Index of allowed routes and their mirrored pools.
+
+    Attributes:
+        routes: route id (bytes) -> {token0, token1, fee, pool, enabled}
+        mirrors: pool key (token0, token1, fee) -> PoolMirror
+        pair: (token0, token1) the agent trades; routes of other pairs
+            are indexed but never quoted
+    """
+
+    def __init__(self, w3=None, vault=None, pool_manager_address: Optional[str] = None,
+                 pair: Optional[Tuple[str, str]] = None, resync_every: int = 30):
+        self.w3 = w3
+        self.vault = vault
+        self.pool_manager_address = pool_manager_address
+        self.pair = pair
+        self.resync_every = resync_every
+        self.routes: Dict[bytes, Dict[str, Any]] = {}
+        self.mirrors: Dict[tuple, PoolMirror] = {}
+        self._by_topic: Dict[str, PoolMirror] = {}
+        self._polls = 0
+
+    # ----- index -----
+
+    def add_route(self, route_id: bytes, route: Dict[str, Any], mirror: Optional[PoolMirror] = None) -> None:
+        """Index one route; its pool is mirrored once however many routes use it."""
+        route_id = bytes(route_id)
+        self.routes[route_id] = route
+        key = (route['token0'], route['token1'], int(route['fee']))
+        if key in self.mirrors or route.get('pool', ZERO_ADDRESS) == ZERO_ADDRESS:
+            return
+        if mirror is None:
+            mirror = PoolMirror.from_route(self.w3, self.pool_manager_address, route, resync_every=0)
+        self.mirrors[key] = mirror
+        if mirror.pool_topic:
+            self._by_topic[mirror.pool_topic] = mirror
+        if self.pair is None:
+            self.pair = (route['token0'], route['token1'])
+
+    def refresh(self, route_ids: Iterable[bytes], reload: bool = False) -> None:
+        """
+        Sync the index with the allowed route ids.
+
+        New ids cost one routes() read each; known ids are free unless
+        reload is set (to pick up enabled flags). Removed ids are dropped,
+        with their mirrors when no other route uses the pool.
+        """
+        route_ids = list(dict.fromkeys(bytes(r) for r in route_ids))
+        for route_id in route_ids:
+            if route_id in self.routes and not reload:
+                continue
+            token0, token1, fee, pool, enabled = self.vault.functions.routes(route_id).call()
+            self.add_route(route_id, {
+                'token0': token0, 'token1': token1, 'fee': fee, 'pool': pool, 'enabled': enabled
+            })
+
+        for route_id in set(self.routes) - set(route_ids):
+            del self.routes[route_id]
+        used = {(r['token0'], r['token1'], int(r['fee'])) for r in self.routes.values()}
+        for key in set(self.mirrors) - used:
+            mirror = self.mirrors.pop(key)
+            self._by_topic.pop(mirror.pool_topic, None)
+
+    def mirror_for(self, route_id: bytes) -> Optional[PoolMirror]:
+        """Mirror of a route's pool (None if the route is not indexed)."""
+        route = self.routes.get(bytes(route_id))
+        if route is None:
+            return None
+        return self.mirrors.get((route['token0'], route['token1'], int(route['fee'])))
+
+    def candidates(self) -> List[Tuple[bytes, PoolMirror]]:
+        """One (route id, mirror) per distinct enabled pool of the traded pair."""
+        seen = set()
+        out = []
+        for route_id, route in self.routes.items():
+            key = (route['token0'], route['token1'], int(route['fee']))
+            if not route.get('enabled', True) or key in seen or key not in self.mirrors:
+                continue
+            if self.pair is not None and (route['token0'], route['token1']) != tuple(self.pair):
+                continue
+            seen.add(key)
+            out.append((route_id, self.mirrors[key]))
+        return out
+
+    # ----- chain sync -----
+
+    def poll(self) -> int:
+        """
+        Catch every mirror up with one eth_getLogs over all pool ids.
+
+        Every resync_every polls the mirrors re-read getPool() instead
+        (addLiquidity emits no event).
+
+        Returns:
+            int: Swap events applied (-1 after a full resync)
+        """
+        if not self.mirrors:
+            return 0
+        self._polls += 1
+        mirrors = list(self.mirrors.values())
+        if self.resync_every and self._polls % self.resync_every == 0:
+            for mirror in mirrors:
+                mirror.sync()
+            return -1
+
+        head = self.w3.eth.block_number
+        start = min(m.block for m in mirrors)
+        if head <= start:
+            return 0
+        try:
+            logs = self.w3.eth.get_logs({
+                "address": mirrors[0]._contract.address,
+                "topics": [swap_topic(), [m.pool_topic for m in mirrors]],
+                "fromBlock": start + 1,
+                "toBlock": head,
+            })
+        except Exception as e:
+            print(f"  [Warning: router log read failed, resyncing: {e}]")
+            for mirror in mirrors:
+                mirror.sync()
+            return -1
+
+        applied = 0
+        for log in logs:
+            mirror = self._by_topic.get(hex_topic(log["topics"][1]))
+            # Mirrors synced later than `start` already include older events
+            if mirror is None or log["blockNumber"] <= mirror.block:
+                continue
+            mirror.apply_swap(*decode_swap(log))
+            applied += 1
+        for mirror in mirrors:
+            mirror.block = head
+        return applied
+
+    # ----- routing -----
+
+    def quote_all(self, amount_in: int, zero_for_one: bool) -> List[Tuple[bytes, int]]:
+        """Exact output of amount_in on every candidate route."""
+        return [(route_id, mirror.quote(amount_in, zero_for_one)) for route_id, mirror in self.candidates()]
+
+    def quote_grid(self, amounts_in, zero_for_one: bool):
+        """
+        Outputs for many candidate sizes on every route in one numpy pass.
+
+        Returns:
+            tuple: (route ids, float64 array of shape (routes, amounts))
+        """
+        import numpy as np
+
+        candidates = self.candidates()
+        amounts = np.asarray(amounts_in, dtype=np.float64)
+        if not candidates:
+            return [], np.zeros((0, amounts.size))
+        reserves = np.array([(m.reserve0, m.reserve1) if zero_for_one else (m.reserve1, m.reserve0)
+                             for _, m in candidates], dtype=np.float64)
+        keep = np.array([(1_000_000 - m.fee) / 1_000_000 for _, m in candidates])
+        with_fee = np.floor(amounts[None, :] * keep[:, None])
+        r_in, r_out = reserves[:, 0:1], reserves[:, 1:2]
+        out = np.floor(r_out * with_fee / np.maximum(r_in + with_fee, 1.0))
+        valid = (r_in > 0) & (r_out > 0) & (amounts[None, :] > 0)
+        return [route_id for route_id, _ in candidates], np.where(valid, out, 0.0)
+
+    def best(self, amount_in: int, zero_for_one: bool) -> Optional[Tuple[bytes, int]]:
+        """(route id, amount out) with the highest output, None without routes."""
+        quotes = self.quote_all(amount_in, zero_for_one)
+        if not quotes:
+            return None
+        return max(quotes, key=lambda q: q[1])
+
+    def split(self, amount_in: int, zero_for_one: bool, chunks: int = 20) -> List[Tuple[bytes, int, int]]:
+        """
+        Split amount_in across routes to maximize total output.
+
+        Greedy over `chunks` equal slices: each slice goes to the route whose
+        next slice yields the most. With concave output curves this is
+        optimal at slice granularity; cost is O(chunks * log routes) quotes.
+
+        Returns:
+            list: (route id, amount in, amount out) per used route
+        """
+        candidates = self.candidates()
+        if not candidates or amount_in <= 0:
+            return []
+        chunks = max(1, min(chunks, amount_in))
+        size = amount_in // chunks
+        sizes = [size] * (chunks - 1) + [amount_in - size * (chunks - 1)]
+
+        allocated = [0] * len(candidates)
+        heap = [(-mirror.quote(sizes[0], zero_for_one), i) for i, (_, mirror) in enumerate(candidates)]
+        heapq.heapify(heap)
+        for k, slice_in in enumerate(sizes):
+            _, i = heapq.heappop(heap)
+            allocated[i] += slice_in
+            if k + 1 < len(sizes):
+                mirror = candidates[i][1]
+                current = mirror.quote(allocated[i], zero_for_one)
+                gain = mirror.quote(allocated[i] + sizes[k + 1], zero_for_one) - current
+                heapq.heappush(heap, (-gain, i))
+                # Other routes' pending gains were computed for a slice of this
+                # size; all slices but the last are equal, so they stay valid
+
+        return [
+            (route_id, amount, mirror.quote(amount, zero_for_one))
+            for (route_id, mirror), amount in zip(candidates, allocated) if amount > 0
+        ]
+
+    def plan(self, amount_in: int, zero_for_one: bool, default_route_id: Optional[bytes] = None,
+             chunks: int = 20) -> Optional[Dict[str, Any]]:
+        """Routing summary for an intent (JSON-friendly: hex ids, amounts as strings)."""
+        best = self.best(amount_in, zero_for_one)
+        if best is None:
+            return None
+        legs = self.split(amount_in, zero_for_one, chunks)
+        summary = {
+            "routes": len(self.candidates()),
+            "best": {"routeId": "0x" + best[0].hex(), "amountOut": str(best[1])},
+            "split": [
+                {"routeId": "0x" + route_id.hex(), "amountIn": str(leg_in), "amountOut": str(leg_out)}
+                for route_id, leg_in, leg_out in legs
+            ],
+            "splitAmountOut": str(sum(leg_out for _, _, leg_out in legs)),
+        }
+        mirror = self.mirror_for(default_route_id) if default_route_id is not None else None
+        if mirror is not None:
+            summary["defaultAmountOut"] = str(mirror.quote(amount_in, zero_for_one))
+        return summary
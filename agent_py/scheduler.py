@@ -0,0 +1,300 @@
+"""
+Child-order execution scheduler for intents larger than the per-trade cap.
+
+A policy sizes every SWAP to min(sub_balance, max_per_trade, default), and
+records the size it actually wants in meta["desired_amount_in"] (depth
+limit, or strategyParams "parent_size" in tokens). When that is larger than
+the SWAP, the scheduler opens a parent order for the desired amount and
+works it as a series of child requestExecution()s, each within the vault's
+per-trade limit:
+
+    twap    `slices` equal children, one every `interval` seconds
+    pov     children of `participation` x the signal volume seen since the
+            last child (`volume_field`, token units)
+    signal  a full-size child whenever the strategy still signals
+
+The vault holds one request at a time, so a child is only sent once the
+previous one is filled (pendingRequest() executed), failed or timed out
+(`child_timeout`); unfilled amounts go back to the parent. The residual is
+cancelled when the strategy stops signalling the parent's direction for
+`cancel_after` iterations (signal decay) or after `ttl` seconds, including
+while the agent is disabled (the vault auto-revokes it after every
+executed request; see expire()).
+
+Configured per agent in agents.local.json:
+    "execution": {"algo": "twap", "slices": 5, "interval": 60}
+
+State lives in strategy_state["execution"] (JSON-serializable), so it
+persists across iterations; the active parent is attached to child intents
+as meta["execution"] and lands in state.json.
+"""
+import math
+from typing import Any, Dict, Optional
+
+from amounts import parse_units
+from strategies import SwapIntent
+from strategies.base import quoted_min_out
+
+ALGOS = ("twap", "pov", "signal")
+
+DEFAULTS = {
+    "algo": "twap",
+    "slices": 5,            # twap: number of children
+    "interval": 60.0,       # twap: seconds between children
+    "participation": 0.1,   # pov: share of observed volume
+    "volume_field": "volume",
+    "min_child": 0.0,       # tokens; smaller children wait (pov) / finish the parent
+    "child_timeout": 300.0, # seconds before an unfilled child is written off
+    "cancel_after": 1,      # iterations without a matching signal before cancelling
+    "ttl": 3600.0,          # seconds before the residual is cancelled
+    "history": 20,          # finished parents kept in state
+}
+
+
+def per_trade_limit(ctx: Dict[str, Any]) -> int:
+    """Largest single request: min(sub_balance, max_per_trade, default), as the policies size it."""
+    limit = min(ctx.get("sub_balance_wei", 0), ctx.get("max_per_trade_wei", 0))
+    default = ctx.get("default_amount_in_wei", 0)
+    return min(limit, default) if default > 0 else limit
+
+
+def new_execution_state() -> Dict[str, Any]:
+    return {"parent": None, "child": None, "history": [], "next_id": 1}
+
+
+class ExecutionScheduler:
+    """
+    Turns parent intents into child intents, one iteration at a time.
+
+    Call order per iteration: reconcile() with the vault's pendingRequest,
+    then step() with the policy's intent; after sending the returned child,
+    sent() (or failed() if the transaction reverted). Iterations that take
+    no decision (agent disabled) call reconcile() and expire() instead.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = dict(DEFAULTS, **(config or {}))
+        if self.config["algo"] not in ALGOS:
+            raise ValueError(f"Unknown execution algo '{self.config['algo']}' (expected one of {ALGOS})")
+        self.min_child = parse_units(self.config["min_child"])
+
+    @staticmethod
+    def state(strategy_state: Dict[str, Any]) -> Dict[str, Any]:
+        state = strategy_state.get("execution")
+        if state is None:
+            state = strategy_state["execution"] = new_execution_state()
+        return state
+
+    # ----- fills -----
+
+    def reconcile(self, strategy_state: Dict[str, Any], pending_request, agent_address: str, now: float) -> None:
+        """
+        Settle the outstanding child against the vault's pendingRequest().
+
+        Args:
+            pending_request: (agent, amount, zeroForOne, approved, executed)
+                or None if it could not be read
+        """
+        state = self.state(strategy_state)
+        child = state["child"]
+        if child is None:
+            return
+        if pending_request is not None:
+            agent, amount, zero_for_one, _, executed = pending_request
+            if (executed and agent.lower() == agent_address.lower()
+                    and amount == child["amount"] and zero_for_one == child["zero_for_one"]):
+                self._settle(state, "filled", now)
+                return
+        if now - child["sent_at"] >= self.config["child_timeout"]:
+            self._settle(state, "timeout", now)
+
+    def _settle(self, state: Dict[str, Any], status: str, now: float) -> None:
+        child, parent = state["child"], state["parent"]
+        state["child"] = None
+        if parent is None:
+            return
+        parent["pending"] -= child["amount"]
+        if status == "filled":
+            parent["filled"] += child["amount"]
+            parent["children_filled"] += 1
+        parent["last_child_status"] = status
+        if parent["filled"] >= parent["total"]:
+            self._finish(state, "done", now)
+        elif parent["status"] != "active" and parent["pending"] == 0:
+            self._finish(state, parent["status"], now)
+
+    def sent(self, strategy_state: Dict[str, Any], child: SwapIntent, now: float, filled: bool = False) -> None:
+        """Record a child sent with requestExecution (filled=True for dry runs)."""
+        state = self.state(strategy_state)
+        parent = state["parent"]
+        if parent is None:
+            return
+        state["child"] = {
+            "amount": child.amount_in,
+            "zero_for_one": child.zero_for_one,
+            "sent_at": now,
+        }
+        parent["pending"] += child.amount_in
+        parent["children_sent"] += 1
+        if filled:
+            self._settle(state, "filled", now)
+
+    def failed(self, strategy_state: Dict[str, Any], child: SwapIntent, error: str, now: float) -> None:
+        """Record a child whose requestExecution reverted; its amount stays unfilled."""
+        parent = self.state(strategy_state)["parent"]
+        if parent is not None:
+            parent["last_child_status"] = f"failed:{str(error)[:50]}"
+
+    # ----- scheduling -----
+
+    def step(self, strategy_state: Dict[str, Any], intent: SwapIntent, ctx: Dict[str, Any],
+             now: float) -> Optional[SwapIntent]:
+        """
+        Decide what to request this iteration.
+
+        Returns:
+            SwapIntent: child (or unscheduled pass-through) intent to request,
+                None to send nothing this iteration
+        """
+        state = self.state(strategy_state)
+        parent = state["parent"]
+        signalling = intent.action == "SWAP"
+
+        if parent is not None and parent["status"] == "active":
+            if signalling and intent.zero_for_one == parent["zero_for_one"]:
+                parent["decay"] = 0
+            else:
+                parent["decay"] += 1
+                if parent["decay"] >= self.config["cancel_after"]:
+                    self._cancel(state, "signal_decayed", now)
+        self.expire(strategy_state, now)
+
+        parent = state["parent"]
+        if parent is None or parent["status"] != "active":
+            if not signalling:
+                return None
+            desired = (intent.meta or {}).get("desired_amount_in")
+            if not desired or desired <= intent.amount_in or state["child"] is not None:
+                # Fits in one request (or the vault slot is busy): not scheduled
+                return intent if state["child"] is None else None
+            parent = self._open(state, intent, int(desired), now)
+
+        self._observe_volume(parent, ctx.get("signal") or {})
+        if state["child"] is not None:
+            return None
+
+        if parent["algo"] == "signal" and not signalling:
+            return None
+        size = self._child_size(parent, per_trade_limit(ctx), now)
+        if size <= 0:
+            return None
+
+        parent["next_at"] = max(parent["next_at"], now) + float(self.config["interval"])
+        parent["volume"] = 0.0
+        min_amount_out, _ = quoted_min_out(ctx, size, parent["zero_for_one"], ctx.get("slippage_bps", 100))
+        k = parent["children_sent"] + 1
+        return SwapIntent(
+            action="SWAP",
+            reason=f"exec:{parent['algo']}:{k}:{parent['reason']}",
+            zero_for_one=parent["zero_for_one"],
+            amount_in=size,
+            min_amount_out=min_amount_out,
+            meta=dict(intent.meta or {}, execution=self.summary(parent))
+        )
+
+    def expire(self, strategy_state: Dict[str, Any], now: float) -> None:
+        """Cancel the active parent's residual once it is `ttl` seconds old."""
+        state = self.state(strategy_state)
+        parent = state["parent"]
+        if parent is not None and parent["status"] == "active" and now - parent["created"] >= self.config["ttl"]:
+            self._cancel(state, "expired", now)
+
+    def waiting(self, strategy_state: Dict[str, Any], intent: SwapIntent) -> SwapIntent:
+        """HOLD to record for a SWAP that step() deferred (slot busy / next slice not due)."""
+        parent = self.state(strategy_state)["parent"]
+        meta = dict(intent.meta or {})
+        if parent is not None:
+            meta["execution"] = self.summary(parent)
+        return SwapIntent(action="HOLD", reason=f"exec:waiting:{intent.reason}", meta=meta)
+
+    def _open(self, state, intent, desired, now) -> Dict[str, Any]:
+        parent = {
+            "id": state["next_id"],
+            "algo": self.config["algo"],
+            "status": "active",
+            "zero_for_one": intent.zero_for_one,
+            "reason": intent.reason,
+            "total": desired,
+            "filled": 0,
+            "pending": 0,
+            "children_sent": 0,
+            "children_filled": 0,
+            "slice": int(math.ceil(desired / max(1, int(self.config["slices"])))),
+            "created": now,
+            "next_at": now,
+            "volume": 0.0,
+            "last_tick": None,
+            "decay": 0,
+            "last_child_status": None,
+        }
+        state["next_id"] += 1
+        state["parent"] = parent
+        return parent
+
+    def _observe_volume(self, parent: Dict[str, Any], signal: Dict[str, Any]) -> None:
+        tick = signal.get("seq", signal.get("timestamp"))
+        if tick is not None and tick == parent["last_tick"]:
+            return
+        parent["last_tick"] = tick
+        volume = signal.get(self.config["volume_field"])
+        if isinstance(volume, (int, float)) and volume > 0:
+            parent["volume"] += float(volume)
+
+    def _child_size(self, parent: Dict[str, Any], limit: int, now: float) -> int:
+        remaining = parent["total"] - parent["filled"] - parent["pending"]
+        if remaining <= 0 or limit <= 0:
+            return 0
+        algo = parent["algo"]
+        if algo == "twap":
+            if now < parent["next_at"]:
+                return 0
+            size = parent["slice"]
+        elif algo == "pov":
+            size = parse_units(parent["volume"] * float(self.config["participation"]))
+        else:
+            size = remaining
+        size = min(size, limit, remaining)
+        if size < self.min_child and size < remaining:
+            return 0
+        return size
+
+    # ----- parent lifecycle -----
+
+    def _cancel(self, state: Dict[str, Any], status: str, now: float) -> None:
+        parent = state["parent"]
+        parent["status"] = status
+        if state["child"] is None:
+            self._finish(state, status, now)
+
+    def _finish(self, state: Dict[str, Any], status: str, now: float) -> None:
+        parent = state["parent"]
+        parent["status"] = status
+        parent["finished"] = now
+        state["history"].append(self.summary(parent))
+        del state["history"][:-int(self.config["history"])]
+        state["parent"] = None
+
+    @staticmethod
+    def summary(parent: Dict[str, Any]) -> Dict[str, Any]:
+        """JSON-friendly parent view (amounts as strings, like state.json)."""
+        return {
+            "id": parent["id"],
+            "algo": parent["algo"],
+            "status": parent["status"],
+            "total": str(parent["total"]),
+            "filled": str(parent["filled"]),
+            "pending": str(parent["pending"]),
+            "childrenSent": parent["children_sent"],
+            "childrenFilled": parent["children_filled"],
+            "lastChild": parent["last_child_status"],
+        }
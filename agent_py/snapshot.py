@@ -2,11 +2,10 @@
 Query and display vault state snapshot.
 """
 from utils import (
-    create_web3_instance,
-    load_deployment_info,
-    get_vault_contract,
+    connect,
     format_token_amount
 )
+from tracing import span
 
 def get_vault_snapshot(w3, vault, deployment):
     """Get current vault state snapshot."""
@@ -16,19 +15,22 @@ def get_vault_snapshot(w3, vault, deployment):
 
     # Query balances with error handling
     try:
-        user_balance = vault.functions.balances(user_address).call()
+        with span("snapshot.balances"):
+            user_balance = vault.functions.balances(user_address).call()
     except Exception as e:
         print(f"Warning: Could not fetch user_balance: {e}")
         user_balance = 0
 
     try:
-        agent_sub_balance = vault.functions.agentBalances(user_address, agent_address).call()
+        with span("snapshot.agentBalances"):
+            agent_sub_balance = vault.functions.agentBalances(user_address, agent_address).call()
     except Exception as e:
         print(f"Warning: Could not fetch agent_sub_balance: {e}")
         agent_sub_balance = 0
 
     try:
-        agent_spent = vault.functions.agentSpent(user_address, agent_address).call()
+        with span("snapshot.agentSpent"):
+            agent_spent = vault.functions.agentSpent(user_address, agent_address).call()
     except Exception as e:
         print(f"Warning: Could not fetch agent_spent: {e}")
         agent_spent = 0
@@ -48,14 +50,16 @@ def get_vault_snapshot(w3, vault, deployment):
             }
         ]
         token_contract = w3.eth.contract(address=token0_address, abi=erc20_abi)
-        vault_token_balance = token_contract.functions.balanceOf(vault_address).call()
+        with span("snapshot.balanceOf"):
+            vault_token_balance = token_contract.functions.balanceOf(vault_address).call()
     except Exception as e:
         print(f"Warning: Could not fetch vault token balance: {e}")
         vault_token_balance = 0
 
     # Query agent config (defensive unpacking - Solidity public getter doesn't return dynamic arrays)
     try:
-        agent_config = vault.functions.agentConfigs(agent_address).call()
+        with span("snapshot.agentConfigs"):
+            agent_config = vault.functions.agentConfigs(agent_address).call()
         # Safely extract fields
         enabled = agent_config[0] if len(agent_config) > 0 else False
         ens_node = agent_config[1] if len(agent_config) > 1 else b""
@@ -74,15 +78,17 @@ def get_vault_snapshot(w3, vault, deployment):
 
     # Get allowedRoutes using dedicated getter (works around Solidity public getter limitation)
     try:
-        allowed_routes = vault.functions.getAllowedRoutes(agent_address).call()
+        with span("snapshot.getAllowedRoutes"):
+            allowed_routes = vault.functions.getAllowedRoutes(agent_address).call()
     except Exception as e:
         print(f"Warning: Could not fetch allowedRoutes: {e}")
         allowed_routes = []
 
     # Query default route
     try:
-        default_route_id = vault.functions.defaultRouteId().call()
-        route = vault.functions.routes(default_route_id).call()
+        with span("snapshot.routes"):
+            default_route_id = vault.functions.defaultRouteId().call()
+            route = vault.functions.routes(default_route_id).call()
         default_route = {
             'token0': route[0],
             'token1': route[1],
@@ -102,7 +108,8 @@ def get_vault_snapshot(w3, vault, deployment):
 
     # Query poolSwapHelper
     try:
-        pool_swap_helper = vault.functions.poolSwapHelper().call()
+        with span("snapshot.poolSwapHelper"):
+            pool_swap_helper = vault.functions.poolSwapHelper().call()
     except Exception as e:
         print(f"Warning: Could not fetch poolSwapHelper: {e}")
         pool_swap_helper = '0x0000000000000000000000000000000000000000'
@@ -158,9 +165,8 @@ def main():
     """Main entry point."""
     try:
         # Setup
-        w3 = create_web3_instance()
-        deployment = load_deployment_info()
-        vault = get_vault_contract(w3)
+        chain = connect()
+        w3, deployment, vault = chain.w3, chain.deployment, chain.vault
 
         print(f"Connected to network (chainId: {w3.eth.chain_id})")
         print(f"Vault address: {deployment['addresses']['vault']}")
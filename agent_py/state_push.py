@@ -0,0 +1,519 @@
+"""
+Push channel for agent state: loop_agent -> status_server -> dashboards.
+
+loop_agent side: StatePublisher queues every write_state() record and
+add_log() line (JSON-encoded by the caller) and sends them in batches to
+status_server's POST /publish from a background thread, so the loop never
+waits on the network (events are dropped while the server is unreachable;
+the next state record carries the full state again).
+
+status_server side: EventHub keeps the current state of every agent (keyed
+by lowercase agent address, "" for records that name none), and one ring
+buffer of sequenced events shared by every client:
+
+    delta     top-level keys of one agent's state that changed
+              ({"agent", "changed", "removed"})
+    log       one add_log() entry
+    snapshot  every agent's state + recent logs ({"states", "logs"}), sent
+              to a client that connects without Last-Event-ID or whose
+              Last-Event-ID fell out of the buffer
+
+Clients only hold a cursor (the last seq they saw) into the shared buffer,
+so a hundred dashboards cost one copy of each event. GET /events streams
+them as server-sent events (?agent=<address> keeps one agent's deltas and
+snapshot); EventSource resends Last-Event-ID on reconnect and resumes
+without gaps. GET /state/{address} serves an agent's current state from
+memory, tagged with the seq it was published at.
+
+Transports (loop_agent -> status_server):
+
+    socket    SocketPublisher -> serve_bus(): length-prefixed batches over a
+              Unix socket (STATE_BUS_SOCKET). No HTTP, no filesystem on the
+              status path; state.json becomes an optional mirror. The
+              default socket lives in a per-user directory
+              ($XDG_RUNTIME_DIR, else a 0700 dir in the temp dir), is
+              0600, and both ends refuse a socket another user owns.
+    http      StatePublisher -> POST /publish (STATUS_PUSH_URL), for a
+              status_server on another host; every request carries the
+              shared secret STATUS_PUSH_TOKEN in X-Status-Token
+
+Every record carries the publisher's session id and a per-session seq, so the
+hub skips duplicates and counts records lost while the server was down.
+
+Usage:
+    uvicorn agent_py.status_server:app --port 8000    # listens on the bus socket
+    STATE_BUS_SOCKET=1 python loop_agent.py
+    curl -N http://127.0.0.1:8000/events
+    curl -i http://127.0.0.1:8000/state/0x3c44cddd...
+"""
+import asyncio
+import itertools
+import json
+import os
+import queue
+import socket
+import stat
+import struct
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Event = Tuple[int, str, Any]  # (seq, kind, data)
+
+def _default_bus_socket() -> str:
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "safe-agent-state.sock")
+    return os.path.join(tempfile.gettempdir(), f"safe-agent-{os.getuid()}", "state.sock")
+
+
+DEFAULT_BUS_SOCKET = _default_bus_socket()
+
+# Bus frames: 4-byte big-endian length + one JSON batch
+_FRAME_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+# Header carrying STATUS_PUSH_TOKEN on POST /publish
+TOKEN_HEADER = "X-Status-Token"
+
+
+def state_delta(old: Dict[str, Any], new: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Top-level difference between two states (None if identical)."""
+    changed = {key: value for key, value in new.items() if old.get(key, _MISSING) != value}
+    removed = [key for key in old if key not in new]
+    if not changed and not removed:
+        return None
+    return {"changed": changed, "removed": removed}
+
+
+_MISSING = object()
+
+
+def agent_key(state: Dict[str, Any]) -> str:
+    """Hub key of a state record: its lowercase agent address, or ""."""
+    agent = state.get("agent")
+    address = agent.get("address") if isinstance(agent, dict) else None
+    if not isinstance(address, str) or address == "unknown":
+        return ""
+    return address.lower()
+
+
+class EventHub:
+    """
+    Current state per agent plus a bounded, sequenced event buffer with
+    async fan-out.
+
+    publish_*() may be called from any thread; subscribe() runs on the
+    server's event loop.
+    """
+
+    def __init__(self, buffer_size: int = 1024, max_logs: int = 80,
+                 on_state: Optional[Callable[[Dict[str, Any]], Any]] = None):
+        # agent key -> current state, and the hub seq it was published at
+        self.states: Dict[str, Dict[str, Any]] = {}
+        self.state_seqs: Dict[str, int] = {}
+        # Called with every changed state (status_server: the fleet index)
+        self.on_state = on_state
+        self.logs = deque(maxlen=max_logs)
+        self.events = deque(maxlen=buffer_size)
+        self.seq = 0
+        # publisher session -> last record seq applied; records lost in transit
+        self.sources: Dict[str, int] = {}
+        self.gaps = 0
+        self._state_json: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+
+    # ----- publishing -----
+
+    def publish_state(self, state: Dict[str, Any], agent: Optional[str] = None) -> Optional[int]:
+        """
+        Replace one agent's state (keyed by agent_key(state) unless `agent`
+        is given); records a delta event (None if nothing changed).
+        """
+        key = agent_key(state) if agent is None else agent.lower()
+        with self._lock:
+            delta = state_delta(self.states.get(key, {}), state)
+            self.states[key] = state
+            if delta is None:
+                return None
+            delta["agent"] = key
+            seq = self.state_seqs[key] = self._append("delta", delta)
+            self._state_json.pop(key, None)
+        if self.on_state is not None:
+            self.on_state(state)
+        self._notify()
+        return seq
+
+    def update_state(self, agent: str = "", **fields) -> Optional[int]:
+        """Merge fields into one agent's state (status_server.update_state)."""
+        with self._lock:
+            state = dict(self.states.get(agent.lower(), {}), **fields)
+        return self.publish_state(state, agent)
+
+    def publish_log(self, entry: Dict[str, Any]) -> int:
+        with self._lock:
+            self.logs.append(entry)
+            seq = self._append("log", entry)
+        self._notify()
+        return seq
+
+    def ingest(self, batch: Dict[str, Any]) -> int:
+        """
+        Apply one publisher batch ({"session", "events": [{"seq", "kind",
+        "data"}]}); returns the hub seq.
+
+        Records at or below the session's last seq are duplicates and
+        skipped; a jump forward counts the missing records in `gaps`.
+        """
+        events = _batch_events(batch)
+        session = batch.get("session")
+        for event in events:
+            seq = event.get("seq")
+            if session is not None and seq is not None:
+                last = self.sources.get(session, 0)
+                if seq <= last:
+                    continue
+                self.gaps += seq - last - 1
+                self.sources[session] = seq
+            if event.get("kind") == "state":
+                self.publish_state(event["data"])
+            elif event.get("kind") == "log":
+                self.publish_log(event["data"])
+        return self.seq
+
+    def _append(self, kind: str, data: Any) -> int:
+        self.seq += 1
+        self.events.append((self.seq, kind, data))
+        return self.seq
+
+    def bind_loop(self) -> None:
+        """Attach to the running event loop (the one subscribers wait on)."""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self) -> None:
+        # Every waiting subscriber holds the current Event; swap in a fresh one
+        changed, self._changed = self._changed, asyncio.Event()
+        if changed is not None:
+            changed.set()
+
+    # ----- reading -----
+
+    def snapshot(self, agent: Optional[str] = None) -> Event:
+        """(seq, "snapshot", {"states", "logs"}) at the current seq, for every agent or one."""
+        with self._lock:
+            if agent is None:
+                states = dict(self.states)
+            else:
+                states = {key: self.states[key] for key in (agent.lower(),) if key in self.states}
+            return self.seq, "snapshot", {"states": states, "logs": list(self.logs)}
+
+    def state_json(self, agent: str) -> Optional[Tuple[int, bytes]]:
+        """
+        (seq, the agent's current state as JSON), encoded once per state
+        version; None for an agent that never published.
+        """
+        key = agent.lower()
+        with self._lock:
+            if key not in self.states:
+                return None
+            body = self._state_json.get(key)
+            if body is None:
+                body = self._state_json[key] = json.dumps(
+                    self.states[key], separators=(",", ":"), default=str).encode()
+            return self.state_seqs.get(key, 0), body
+
+    def since(self, last_seq: Optional[int]) -> Optional[List[Event]]:
+        """Events after last_seq, or None if the client needs a snapshot."""
+        with self._lock:
+            if last_seq is None or last_seq > self.seq:
+                return None
+            if self.events and last_seq < self.events[0][0] - 1:
+                return None  # fell out of the buffer
+            if not self.events and last_seq < self.seq:
+                return None
+            return [event for event in self.events if event[0] > last_seq]
+
+    async def subscribe(self, last_seq: Optional[int] = None, heartbeat: float = 15.0,
+                        agent: Optional[str] = None):
+        """
+        Async iterator of events for one client (only `agent`'s deltas if
+        given); yields None as a heartbeat when nothing happened for
+        `heartbeat` seconds.
+        """
+        self.bind_loop()
+        key = None if agent is None else agent.lower()
+        cursor = last_seq
+        while True:
+            changed = self._changed
+            events = self.since(cursor)
+            if events is None:
+                event = self.snapshot(key)
+                cursor = event[0]
+                yield event
+                continue
+            if events:
+                for event in events:
+                    if key is None or event[1] != "delta" or event[2]["agent"] == key:
+                        yield event
+                cursor = events[-1][0]
+                continue
+            try:
+                await asyncio.wait_for(changed.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+
+
+def _batch_events(batch: Any) -> List[Dict[str, Any]]:
+    """Events of a publisher batch; ValueError if it is malformed."""
+    if not isinstance(batch, dict) or not isinstance(batch.get("events", []), list):
+        raise ValueError("batch must be an object with an events list")
+    events = batch.get("events", [])
+    for event in events:
+        if not isinstance(event, dict) or "data" not in event:
+            raise ValueError("every event needs a data field")
+        if not isinstance(event.get("seq", 0), int):
+            raise ValueError(f"bad event seq: {event['seq']!r}")
+        if event.get("kind") == "state" and not isinstance(event["data"], dict):
+            raise ValueError("state event data must be an object")
+    return events
+
+
+def format_sse(event: Optional[Event]) -> str:
+    """One server-sent event (a comment line for heartbeats)."""
+    if event is None:
+        return ": keepalive\n\n"
+    seq, kind, data = event
+    return f"id: {seq}\nevent: {kind}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class StatePublisher:
+    """
+    Fire-and-forget sender of state records and log lines to status_server.
+
+    publish_*() only enqueue; a daemon thread drains the queue into batched
+    POST {url}/publish requests. While the server is down, batches are
+    dropped and sending is retried after `retry_after` seconds.
+    """
+
+    def __init__(self, url: str, timeout: float = 1.0, retry_after: float = 5.0, max_batch: int = 256,
+                 token: Optional[str] = None):
+        self.url = url.rstrip("/") + "/publish"
+        self.token = token
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.max_batch = max_batch
+        self.sent = 0
+        self.dropped = 0
+        # Lets status_server tell a restarted loop from a replay
+        self.session = f"{os.getpid()}-{time.time_ns()}"
+        self._seq = itertools.count(1)
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._down_until = 0.0
+        self._thread = threading.Thread(target=self._run, name="state-publisher", daemon=True)
+        self._thread.start()
+
+    @property
+    def target(self) -> str:
+        return self.url
+
+    def publish_state(self, state) -> None:
+        """Queue a state record (a dict, or its JSON text as write_state encodes it)."""
+        data = state if isinstance(state, str) else json.dumps(state, default=str)
+        self._queue.put((next(self._seq), "state", data))
+
+    def publish_log(self, entry: Dict[str, Any]) -> None:
+        self._queue.put((next(self._seq), "log", json.dumps(entry, default=str)))
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Flush what is queued and stop the thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch = []
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._send(batch)
+            if item is None:
+                self._disconnect()
+                return
+
+    def _send(self, batch) -> None:
+        if time.monotonic() < self._down_until:
+            self.dropped += len(batch)
+            return
+        # Records are encoded by the publishing thread (the loop keeps mutating
+        # its history lists); splice the JSON texts into one body
+        body = (f'{{"session":"{self.session}","events":['
+                + ",".join(f'{{"seq":{seq},"kind":"{kind}","data":{data}}}' for seq, kind, data in batch)
+                + "]}").encode()
+        try:
+            self._deliver(body)
+            self.sent += len(batch)
+        except Exception as e:
+            self.dropped += len(batch)
+            self._disconnect()
+            if not self._down_until:
+                print(f"  [Warning: status push to {self.target} failed, retrying in {self.retry_after:.0f}s: {e}]")
+            self._down_until = time.monotonic() + self.retry_after
+        else:
+            self._down_until = 0.0
+
+    def _deliver(self, body: bytes) -> None:
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers[TOKEN_HEADER] = self.token
+        request = urllib.request.Request(self.url, data=body, headers=headers)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def _disconnect(self) -> None:
+        pass
+
+
+class SocketPublisher(StatePublisher):
+    """
+    StatePublisher over the Unix-socket state bus (see serve_bus()).
+
+    One persistent connection; each batch is one length-prefixed frame.
+    """
+
+    def __init__(self, path: str = DEFAULT_BUS_SOCKET, timeout: float = 1.0, retry_after: float = 5.0,
+                 max_batch: int = 256):
+        self.path = path
+        self._sock: Optional[socket.socket] = None
+        super().__init__("", timeout=timeout, retry_after=retry_after, max_batch=max_batch)
+
+    @property
+    def target(self) -> str:
+        return f"unix:{self.path}"
+
+    def _deliver(self, body: bytes) -> None:
+        if self._sock is None:
+            # Never send state to a listener another user put at this path
+            _check_owner(self.path)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self._sock = sock
+        self._sock.sendall(_FRAME_HEADER.pack(len(body)) + body)
+
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+
+def bus_socket_path(default: bool = False) -> Optional[str]:
+    """
+    State bus socket from STATE_BUS_SOCKET: a path, "1" for the default
+    path, "0"/"off" for none. Unset means the default path if `default`
+    (status_server listens unless disabled), else None (loop_agent only
+    publishes when asked to).
+    """
+    value = os.getenv("STATE_BUS_SOCKET", "").strip()
+    if value.lower() in ("0", "off", "none"):
+        return None
+    if value in ("", "1"):
+        return DEFAULT_BUS_SOCKET if (value or default) else None
+    return value
+
+
+def publisher_from_env() -> Optional[StatePublisher]:
+    """Publisher for loop_agent: the bus socket if configured, else STATUS_PUSH_URL."""
+    path = bus_socket_path()
+    if path:
+        return SocketPublisher(path)
+    url = os.getenv("STATUS_PUSH_URL")
+    if url:
+        token = os.getenv("STATUS_PUSH_TOKEN")
+        if not token:
+            print("  [Warning: STATUS_PUSH_TOKEN is unset, status_server will refuse the pushed state]")
+        return StatePublisher(url, token=token)
+    return None
+
+
+def _check_owner(path: str) -> os.stat_result:
+    """lstat() of path; PermissionError if another user owns it."""
+    st = os.lstat(path)
+    if st.st_uid != os.getuid():
+        raise PermissionError(f"{path} is owned by uid {st.st_uid}, not this user")
+    return st
+
+
+def _private_dir(directory: str) -> None:
+    """Create directory 0700, or check an existing one is ours and make it 0700."""
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        st = _check_owner(directory)
+        if not stat.S_ISDIR(st.st_mode):
+            raise NotADirectoryError(directory)
+        if stat.S_IMODE(st.st_mode) & 0o077:
+            os.chmod(directory, 0o700)
+
+
+async def serve_bus(hub: EventHub, path: str = DEFAULT_BUS_SOCKET):
+    """
+    Listen on the Unix-socket state bus and apply every frame to `hub`.
+
+    The socket is chmod 0600 (owner only) and a stale socket is only
+    replaced if this user owns it. Returns the asyncio server; close() it
+    on shutdown (the socket file is replaced on the next start).
+    """
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                (size,) = _FRAME_HEADER.unpack(await reader.readexactly(_FRAME_HEADER.size))
+                if size > MAX_FRAME_BYTES:
+                    print(f"  [Warning: state bus frame of {size}B exceeds limit, dropping connection]")
+                    return
+                hub.ingest(json.loads(await reader.readexactly(size)))
+        except asyncio.IncompleteReadError:
+            pass  # publisher closed
+        except (ValueError, KeyError) as e:
+            print(f"  [Warning: bad state bus frame, dropping connection: {e}]")
+        finally:
+            writer.close()
+
+    hub.bind_loop()
+    if path == DEFAULT_BUS_SOCKET:
+        _private_dir(os.path.dirname(path))
+    try:
+        st = _check_owner(path)
+    except FileNotFoundError:
+        pass
+    else:
+        if not stat.S_ISSOCK(st.st_mode):
+            raise FileExistsError(f"{path} exists and is not a socket")
+        os.unlink(path)
+    server = await asyncio.start_unix_server(handle, path=path)
+    os.chmod(path, 0o600)
+    return server
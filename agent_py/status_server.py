@@ -1,23 +1,104 @@
 """
 Python Agent Status Server
 
-Provides a simple HTTP API for the frontend to query agent status.
+Provides a simple HTTP API for the frontend to query agent status, and a
+push channel: GET /events streams state deltas and log lines as server-sent
+events the moment loop_agent publishes them (see state_push.py).
+
+loop_agent publishes over the Unix-socket state bus this server listens on
+(STATE_BUS_SOCKET, default in a per-user runtime dir; "off" disables it),
+and GET /state/{address} serves an agent's latest record from memory, so
+the status path never touches state.json. Run a single worker: the state
+lives in this process.
+
+Every agent that publishes is also indexed for GET /fleet (filter by
+status, strategy, enabled, last action; sort by PnL, last decision time or
+address; cursor pagination), GET /fleet/stats and GET /fleet/{address}.
+GET /history queries the decisions loop_agent records in SQLite (history.py).
+
+POST /publish and POST /profile change what the agent shows or does, so
+they require the shared secret STATUS_PUSH_TOKEN in an X-Status-Token
+header (both are refused while it is unset) and are not open to
+cross-origin browser requests; /publish only takes application/json.
 
 Usage:
     pip install fastapi uvicorn
     uvicorn agent_py.status_server:app --port 8000
+    STATE_BUS_SOCKET=1 python agent_py/loop_agent.py
+    # or, with the server on another host:
+    STATUS_PUSH_TOKEN=<secret> uvicorn agent_py.status_server:app --host 0.0.0.0 --port 8000
+    STATUS_PUSH_TOKEN=<secret> STATUS_PUSH_URL=http://host:8000 python agent_py/loop_agent.py
 """
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+import hmac
+import json
+import os
+import sys
 import time
+from pathlib import Path
+
+# agent_py modules use flat imports (like loop_agent); make them importable
+# when the server is launched as agent_py.status_server from the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from profiler import request_profile
+from fleet import FleetIndex
+from history import HistoryStore, history_path
+from state_push import TOKEN_HEADER, EventHub, bus_socket_path, format_sse, serve_bus
+
+# Latest state of every agent that publishes, indexed for /fleet queries
+FLEET = FleetIndex()
+
+# Fan-out buffer of agent state deltas and log lines for /events clients
+HUB = EventHub(on_state=FLEET.upsert)
+
+# Decision history recorded by loop_agent (AGENT_HISTORY_DB), read-only here
+_HISTORY_DB = history_path()
+HISTORY = HistoryStore(_HISTORY_DB) if _HISTORY_DB else None
 
-app = FastAPI()
+# Shared secret of the endpoints that write (POST /publish, POST /profile)
+PUSH_TOKEN = os.getenv("STATUS_PUSH_TOKEN", "")
 
-# Enable CORS for frontend
+
+def require_token(request: Request):
+    """Reject writes without the X-Status-Token shared secret."""
+    if not PUSH_TOKEN:
+        raise HTTPException(status_code=403, detail="Set STATUS_PUSH_TOKEN to enable this endpoint")
+    token = request.headers.get(TOKEN_HEADER, "")
+    if not hmac.compare_digest(token.encode(), PUSH_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail=f"Missing or wrong {TOKEN_HEADER}")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    path = bus_socket_path(default=True)
+    server = None
+    if path:
+        try:
+            server = await serve_bus(HUB, path)
+            print(f"State bus listening on {path}")
+        except OSError as e:
+            print(f"  [Warning: State bus unavailable on {path}: {e}]")
+    yield
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Enable CORS for frontend (reads only: no cross-origin POST)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
-    allow_methods=["*"],
+    allow_methods=["GET"],
     allow_headers=["*"],
 )
 
@@ -35,10 +116,126 @@ def get_status():
     """Get current agent status."""
     return STATE
 
+def _state_response(request: Request, seq: int, body):
+    """State body tagged with its hub seq; If-None-Match with it returns 304."""
+    headers = {"ETag": f'"{seq}"', "X-State-Seq": str(seq), "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match", "").strip('" ') == str(seq):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/state")
+def get_states(request: Request):
+    """
+    Latest state record of every agent that published, keyed by lowercase
+    address, from memory. ETag / X-State-Seq: the newest record's hub seq.
+    """
+    _, _, data = HUB.snapshot()
+    seq = max(HUB.state_seqs.values(), default=0)
+    return _state_response(request, seq, json.dumps(data["states"], separators=(",", ":"), default=str))
+
+@app.get("/state/{address}")
+def get_state(address: str, request: Request):
+    """
+    Latest state record of one agent (same shape as state.json), from memory.
+
+    ETag / X-State-Seq carry the hub seq the state was published at;
+    If-None-Match with it returns 304.
+    """
+    found = HUB.state_json(address)
+    if found is None:
+        raise HTTPException(status_code=404, detail=f"Unknown agent {address}")
+    return _state_response(request, *found)
+
+@app.get("/fleet")
+def get_fleet(status: str = None, strategy: str = None, enabled: bool = None, action: str = None,
+              sort: str = "address", order: str = "asc", limit: int = 50, cursor: str = None):
+    """
+    Agents matching the filters, one page at a time (see fleet.py).
+
+    e.g. /fleet?status=AWAITING_APPROVAL, /fleet?sort=pnl&order=desc&limit=10;
+    pass the returned "next" as cursor for the following page.
+    """
+    filters = {"status": status, "strategy": strategy, "enabled": enabled, "action": action}
+    try:
+        return FLEET.query(filters, sort=sort, order=order, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/fleet/stats")
+def get_fleet_stats():
+    """Agent counts per status, strategy, enabled and last action."""
+    return FLEET.stats()
+
+@app.get("/fleet/{address}")
+def get_fleet_agent(address: str):
+    """Latest full state record of one agent."""
+    state = FLEET.get(address)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Unknown agent {address}")
+    return state
+
+@app.get("/history")
+def get_history(agent: str = None, action: str = None, since: str = None, until: str = None,
+                limit: int = 100, cursor: str = None):
+    """
+    Recorded decisions, newest first (see history.py).
+
+    since/until take unix seconds or ISO 8601, e.g.
+    /history?agent=0x3c44...&action=SWAP&since=2026-10-12; pass the
+    returned "next" as cursor for older rows.
+    """
+    if HISTORY is None:
+        raise HTTPException(status_code=404, detail="History recording is disabled (AGENT_HISTORY_DB=off)")
+    try:
+        return HISTORY.query(agent=agent, action=action, since=since, until=until, limit=limit, cursor=cursor)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/profile", dependencies=[Depends(require_token)])
+def start_profile(iterations: int = None):
+    """Ask the running agent loop to profile its next N iterations."""
+    trigger = request_profile(iterations)
+    return {"requested": True, "iterations": iterations, "trigger": str(trigger)}
+
+@app.post("/publish", dependencies=[Depends(require_token)])
+async def publish(request: Request):
+    """Ingest state records / log lines from loop_agent's StatePublisher."""
+    if request.headers.get("content-type", "").split(";")[0].strip().lower() != "application/json":
+        raise HTTPException(status_code=415, detail="Expected application/json")
+    try:
+        return {"seq": HUB.ingest(await request.json())}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Bad publish batch: {e}")
+
+@app.get("/events")
+async def events(request: Request, agent: str = None):
+    """
+    Server-sent events: a snapshot first (or the events missed since
+    Last-Event-ID on reconnect), then deltas and log lines as they arrive.
+    ?agent=<address> limits the snapshot and deltas to one agent.
+    """
+    last_id = request.headers.get("last-event-id") or request.query_params.get("since")
+    try:
+        last_seq = int(last_id) if last_id else None
+    except ValueError:
+        last_seq = None
+
+    async def stream():
+        async for event in HUB.subscribe(last_seq, agent=agent):
+            if await request.is_disconnected():
+                break
+            yield format_sse(event)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 def update_state(**kwargs):
     """Update agent state (call this from your agent loop)."""
     STATE.update(kwargs)
     STATE["updatedAt"] = time.time()
+    HUB.update_state(**kwargs)
 
 # Example usage from agent code:
 # from agent_py.status_server import update_state
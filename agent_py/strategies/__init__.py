@@ -3,13 +3,19 @@ Strategies package.
 
 Provides unified strategy interface and factory.
 """
-from .types import SwapIntent
+from .types import SwapIntent, SwapIntentBatch
 from .base import BasePolicy
-from .registry import build_policy, list_strategies
+from .registry import build_policy, list_strategies, register_strategy, resolve_strategy
+from .indicators import IndicatorEngine, INDICATORS
 
 __all__ = [
     "SwapIntent",
+    "SwapIntentBatch",
     "BasePolicy",
     "build_policy",
     "list_strategies",
+    "register_strategy",
+    "resolve_strategy",
+    "IndicatorEngine",
+    "INDICATORS",
 ]
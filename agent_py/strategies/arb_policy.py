@@ -4,11 +4,13 @@ Arbitrage strategy adapter: OrderInstruction -> SwapIntent.
 Wraps external_strats.ou_arb.OUArbStrategy and converts its output
 to the unified SwapIntent format.
 """
+import bisect
 from typing import Dict, Any
-from .base import BasePolicy
-from .types import SwapIntent
-from external_strats.ou_arb import OUArbStrategy
+from .base import BasePolicy, prepare_batch, quoted_min_out
+from .types import SwapIntent, SwapIntentBatch
+from external_strats.ou_arb import OUArbStrategy, new_ou_stats, ou_zscores
 from external_strats.base import MarketData
+from amounts import apply_bps
 
 
 class ArbPolicy(BasePolicy):
@@ -44,66 +46,60 @@ class ArbPolicy(BasePolicy):
 
         # Check if cap is zero (agent cannot trade)
         if cap_wei == 0:
-            return SwapIntent(
-                action="HOLD",
-                reason="arb:cap_is_zero",
-                meta={"signal": signal}
-            )
+            return SwapIntent.hold("arb:cap_is_zero")
 
         # Check if we have valid signal data
         if not signal or ("best_ask" not in signal and "pm_ask" not in signal) or ("best_bid" not in signal and "op_bid" not in signal):
-            return SwapIntent(
-                action="HOLD",
-                reason="arb:no_signal",
-                meta={"signal": signal}
-            )
+            return SwapIntent.hold("arb:no_signal")
 
         # Construct MarketData from signal
         # For arb, signal may contain spread/pm_ask/op_bid
-        market = MarketData(
-            best_bid=signal.get("best_bid", signal.get("op_bid", 1.0)),
-            best_ask=signal.get("best_ask", signal.get("pm_ask", 1.0)),
-            extra=signal
-        )
+        market = ctx.get("market") or MarketData.from_signal(signal)
 
         # Get strategy state (persistent across calls)
         strategy_state = ctx.get("strategy_state", {})
+        stats = strategy_state.get("ou")
+        if stats is not None:
+            # Only this iteration's commit can be undone by unsent()
+            stats["undo"] = None
 
         # Evaluate strategy
         orders = self.strategy.evaluate(market, strategy_state)
 
         # No orders = HOLD
         if not orders:
-            return SwapIntent(
-                action="HOLD",
-                reason="arb:no_opportunity",
-                meta={"signal": signal}
-            )
+            return SwapIntent.hold("arb:no_opportunity")
 
         # Take first order
         order = orders[0]
+        stats = strategy_state["ou"]
 
         # Determine direction: BUY = zero_for_one=True (token0->token1)
         zero_for_one = (order.side == "BUY")
 
         # Calculate amount_in (wei)
-        # Use vault risk controls, not order.size
+        # Use vault risk controls, not order.size. Entries spend the token0
+        # sub-balance, exits sell the token1 position the entries booked.
+        available = sub_balance_wei if zero_for_one else stats["position"]
         if default_amount_in_wei > 0:
-            amount_in = min(sub_balance_wei, max_per_trade_wei, default_amount_in_wei)
+            amount_in = min(available, max_per_trade_wei, default_amount_in_wei)
         else:
-            amount_in = min(sub_balance_wei, max_per_trade_wei)
+            amount_in = min(available, max_per_trade_wei)
 
         # Ensure positive amount
         if amount_in <= 0:
             return SwapIntent(
                 action="HOLD",
                 reason="arb:insufficient_balance",
-                meta={"order": order.meta, "signal": signal}
+                meta={"order": order.meta}
             )
 
-        # Calculate min_amount_out with slippage
-        # Conservative: min_out = amount_in * (1 - slippage_bps/10000)
-        min_amount_out = int(amount_in * (1 - slippage_bps / 10000))
+        # Calculate min_amount_out with slippage, against the pool quote if available
+        min_amount_out, quoted_out = quoted_min_out(ctx, amount_in, zero_for_one, slippage_bps)
+
+        # The order goes out: book it. Entries count the guaranteed
+        # min_amount_out, so an exit never asks for more than the fill gave.
+        self.strategy.commit(stats, order.side, amount_in, min_amount_out)
 
         # Build reason string
         reason = f"arb:{order.meta.get('reason', 'execute')}"
@@ -119,6 +115,152 @@ class ArbPolicy(BasePolicy):
                 "signal": signal,
                 "side": order.side,
                 "price": order.price,
-                "spread": order.meta.get("spread")
+                "spread": order.meta.get("spread"),
+                "quoted_out": quoted_out,
+                "position": str(stats["position"]),
+                # Exits repeat while the position lasts; only entries open parent orders
+                "desired_amount_in": self.desired_amount_in(ctx, order.meta) if zero_for_one else None
             }
         )
+
+    def unsent(self, strategy_state: Dict[str, Any], intent: SwapIntent) -> None:
+        """Roll back the position booked for a SWAP that was not requested."""
+        stats = strategy_state.get("ou")
+        if stats is not None:
+            self.strategy.rollback(stats)
+
+    def decide_batch(self, bids, asks, sub_balance_wei, cap_wei, slippage_bps=100,
+                     default_amount_in_wei=None, strategy_state=None, vault=None) -> SwapIntentBatch:
+        """
+        Vectorized decide(): z-scores for all rows at once, then a walk over band crossings.
+
+        The OU estimates come from ou_zscores() (the EW recursions as
+        decayed cumulative sums). Only the entry/exit hysteresis is
+        sequential: while flat the walk jumps to the next row in the entry
+        band, while in position to the next row in the exit band, and sizes
+        and commits there as decide() does. Same decisions as calling
+        decide() per row, up to float rounding of the estimates (rows are
+        treated as distinct ticks); _decide_batch_loop() is the sequential
+        reference. See BasePolicy.decide_batch for the column semantics and
+        `vault`.
+        """
+        import numpy as np
+
+        cols = prepare_batch(bids, asks, sub_balance_wei, cap_wei, slippage_bps, default_amount_in_wei)
+        n = len(cols["bids"])
+        swap = np.zeros(n, dtype=bool)
+        buy = np.zeros(n, dtype=bool)
+        amount_in = np.zeros(n, dtype=np.float64)
+        min_amount_out = np.zeros(n, dtype=np.float64)
+
+        state = {} if strategy_state is None else strategy_state
+        stats = state.get("ou")
+        if stats is None:
+            stats = state["ou"] = new_ou_stats()
+        strategy = self.strategy
+
+        # Rows decide() evaluates: non-zero cap, both quotes, positive bid
+        bids, asks = cols["bids"], cols["asks"]
+        rows = np.flatnonzero((cols["caps"] != 0) & ~np.isnan(asks) & (bids > 0))
+        spread = (asks[rows] - bids[rows]) / bids[rows]
+        z = ou_zscores(stats, spread, strategy.decay, strategy.min_samples)
+        if len(rows):
+            stats["last_key"] = None
+        with np.errstate(invalid="ignore"):
+            bands = {
+                "BUY": rows[(z >= strategy.entry_z) & (spread > strategy.threshold)].tolist(),
+                "SELL": rows[z <= strategy.exit_z].tolist(),
+            }
+
+        orders = []
+        i = -1
+        while True:
+            side = "SELL" if stats["in_position"] else "BUY"
+            band = bands[side]
+            j = bisect.bisect_right(band, i)
+            if j >= len(band):
+                break
+            i = band[j]
+            sized = self._size_row(cols, i, side == "BUY", stats, vault)
+            if sized is None:
+                continue
+            amount, min_out = sized
+            strategy.commit(stats, side, amount, min_out)
+            orders.append((i, side == "BUY", amount, min_out))
+            if vault is not None and not vault.request(i, SwapIntent(
+                    action="SWAP", reason="batch:swap", zero_for_one=side == "BUY",
+                    amount_in=amount, min_amount_out=min_out)):
+                strategy.rollback(stats)
+
+        if orders:
+            index, zero_for_one, amounts, min_outs = zip(*orders)
+            index = list(index)
+            swap[index] = True
+            buy[index] = zero_for_one
+            amount_in[index] = amounts
+            min_amount_out[index] = min_outs
+
+        # BUY entries are token0 -> token1, SELL exits token1 -> token0
+        return SwapIntentBatch(swap, buy, amount_in, min_amount_out)
+
+    def _decide_batch_loop(self, bids, asks, sub_balance_wei, cap_wei, slippage_bps=100,
+                           default_amount_in_wei=None, strategy_state=None, vault=None) -> SwapIntentBatch:
+        """
+        Sequential reference for decide_batch(): one observe()/signal_side() per row.
+
+        Rows are walked in a tight loop over floats that shares
+        OUArbStrategy.observe()/signal_side()/commit() with decide().
+        """
+        import numpy as np
+
+        cols = prepare_batch(bids, asks, sub_balance_wei, cap_wei, slippage_bps, default_amount_in_wei)
+        n = len(cols["bids"])
+        swap = np.zeros(n, dtype=bool)
+        buy = np.zeros(n, dtype=bool)
+        amount_in = np.zeros(n, dtype=np.float64)
+        min_amount_out = np.zeros(n, dtype=np.float64)
+
+        state = {} if strategy_state is None else strategy_state
+        stats = state.get("ou")
+        if stats is None:
+            stats = state["ou"] = new_ou_stats()
+        strategy = self.strategy
+        observe, signal_side, commit = strategy.observe, strategy.signal_side, strategy.commit
+
+        rows = zip(cols["bids"].tolist(), cols["asks"].tolist(), cols["caps"].tolist())
+        for i, (bid, ask, cap) in enumerate(rows):
+            # decide() returns before evaluating on zero cap / missing quotes
+            if cap == 0 or ask != ask or not bid > 0:
+                continue
+            spread = (ask - bid) / bid
+            side, _ = signal_side(stats, spread, observe(stats, spread))
+            if side is None:
+                continue
+            sized = self._size_row(cols, i, side == "BUY", stats, vault)
+            if sized is None:
+                continue
+            amount, min_out = sized
+            commit(stats, side, amount, min_out)
+            swap[i], buy[i], amount_in[i], min_amount_out[i] = True, side == "BUY", amount, min_out
+            if vault is not None and not vault.request(i, SwapIntent(
+                    action="SWAP", reason="batch:swap", zero_for_one=side == "BUY",
+                    amount_in=amount, min_amount_out=min_out)):
+                strategy.rollback(stats)
+
+        # BUY entries are token0 -> token1, SELL exits token1 -> token0
+        return SwapIntentBatch(swap, buy, amount_in, min_amount_out)
+
+    @staticmethod
+    def _size_row(cols, i, zero_for_one, stats, vault):
+        """decide()'s sizing for row i: (amount_in, min_amount_out) in wei, None if HOLD."""
+        if zero_for_one:
+            available = vault.sub_balance(i) if vault is not None else int(cols["balances"][i])
+        else:
+            available = stats["position"]
+        amount = min(available, int(cols["caps"][i]))
+        default = int(cols["defaults"][i])
+        if default > 0:
+            amount = min(amount, default)
+        if amount <= 0:
+            return None
+        return amount, apply_bps(amount, cols["slippage_bps"][i])
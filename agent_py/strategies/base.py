@@ -4,8 +4,83 @@ Base class for all trading policies.
 All strategies must inherit from BasePolicy and implement the decide() method.
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any
-from .types import SwapIntent
+from typing import Dict, Any, List, Optional, Tuple
+from .types import SwapIntent, SwapIntentBatch
+from .indicators import IndicatorEngine
+from amounts import apply_bps, parse_units
+
+
+def prepare_batch(bids, asks, sub_balance_wei, cap_wei, slippage_bps=100,
+                  default_amount_in_wei=None) -> Dict[str, Any]:
+    """
+    Broadcast decide_batch() inputs to float64 columns of equal length.
+
+    Scalars broadcast against the array inputs. NaN in bids/asks marks a
+    row without a usable signal. default_amount_in_wei defaults to cap_wei,
+    as in loop_agent's ctx.
+    """
+    import numpy as np
+
+    if default_amount_in_wei is None:
+        default_amount_in_wei = cap_wei
+    columns = np.broadcast_arrays(
+        np.asarray(bids, dtype=np.float64),
+        np.asarray(asks, dtype=np.float64),
+        np.asarray(sub_balance_wei, dtype=np.float64),
+        np.asarray(cap_wei, dtype=np.float64),
+        np.asarray(default_amount_in_wei, dtype=np.float64),
+        np.asarray(slippage_bps, dtype=np.float64),
+    )
+    names = ("bids", "asks", "balances", "caps", "defaults", "slippage_bps")
+    return {name: np.atleast_1d(col) for name, col in zip(names, columns)}
+
+
+def batch_amounts(cols, order_mask):
+    """
+    Vectorized vault sizing shared by the built-in policies.
+
+    Mirrors the per-call logic: amount_in = min(sub_balance, max_per_trade,
+    default_amount) (default ignored when 0), HOLD where cap is zero or the
+    amount is not positive, min_out = floor(amount * (10000 - slippage_bps) / 10000).
+
+    Args:
+        cols: Columns from prepare_batch()
+        order_mask: bool array, True where the strategy emitted an order
+
+    Returns:
+        tuple: (swap mask, amount_in, min_amount_out) as numpy arrays
+    """
+    import numpy as np
+
+    balances, caps, defaults = cols["balances"], cols["caps"], cols["defaults"]
+    amount = np.minimum(balances, caps)
+    amount = np.where(defaults > 0, np.minimum(amount, defaults), amount)
+
+    swap = order_mask & (caps != 0) & (amount > 0)
+    amount_in = np.where(swap, amount, 0.0)
+    # apply_bps() in float64: equal to the exact integer result up to float64
+    # rounding of the wei amounts
+    min_out = np.where(swap, np.floor(amount_in * (10000 - cols["slippage_bps"]) / 10000), 0.0)
+    return swap, amount_in, min_out
+
+
+def quoted_min_out(ctx: Dict[str, Any], amount_in: int, zero_for_one: bool,
+                   slippage_bps) -> Tuple[int, Optional[int]]:
+    """
+    min_amount_out for a SWAP, and the pool quote it is based on.
+
+    With a quoter in ctx["quoter"] (pool_mirror.PoolMirror), slippage applies
+    to the exact expected output at the mirrored pool state. Without one it
+    applies to amount_in (conservative 1:1 assumption).
+
+    Returns:
+        tuple: (min_amount_out, quoted amount out or None)
+    """
+    quoter = ctx.get("quoter")
+    if quoter is None:
+        return apply_bps(amount_in, slippage_bps), None
+    quoted = quoter.quote(amount_in, zero_for_one)
+    return apply_bps(quoted, slippage_bps), quoted
 
 
 class BasePolicy(ABC):
@@ -26,6 +101,12 @@ class BasePolicy(ABC):
         """
         self.name = name
         self.params = params or {}
+        # Indicator specs this policy reads from ctx["features"]
+        # (see strategies.indicators)
+        self.features: List[Dict[str, Any]] = []
+        # Reads order-book levels (signal["asks"]), which the columns
+        # backtest engine doesn't load
+        self.uses_depth = False
 
     @abstractmethod
     def decide(self, ctx: Dict[str, Any]) -> SwapIntent:
@@ -42,8 +123,106 @@ class BasePolicy(ABC):
                 - agent_address: Agent's address (str)
                 - user_address: User's address (str)
                 - strategy_state: Optional persistent state (dict)
+                - quoter: Optional pool quoter for min_amount_out
+                  (pool_mirror.PoolMirror)
+                - token_decimals: Decimals of the vault asset (int, default 18)
+                - features: Values of the indicators declared in
+                  self.features, by name (dict, None while warming up)
 
         Returns:
             SwapIntent: Decision to HOLD or SWAP
         """
         pass
+
+    def desired_amount_in(self, ctx: Dict[str, Any], order_meta: Dict[str, Any]) -> Optional[int]:
+        """
+        Size the strategy wants regardless of the per-trade limit (wei).
+
+        The order's depth limit ("max_amount_in", tokens) or the
+        "parent_size" param (tokens), bounded by the sub-balance; None when
+        the strategy has no size of its own. The execution scheduler works
+        the part above the limit as child orders (see scheduler.py).
+        """
+        wanted = order_meta.get("max_amount_in", self.params.get("parent_size"))
+        if wanted is None:
+            return None
+        return min(ctx.get("sub_balance_wei", 0), parse_units(wanted, ctx.get("token_decimals", 18)))
+
+    def unsent(self, strategy_state: Dict[str, Any], intent: SwapIntent) -> None:
+        """
+        Undo what decide() committed for a SWAP that was not requested.
+
+        Called when the SWAP returned this iteration is deferred by the
+        execution scheduler, its requestExecution reverts, or (in backtests)
+        another request is still pending. Policies that book their own orders
+        in strategy_state (e.g. an open position) roll that back here; the
+        default does nothing.
+        """
+
+    def close(self) -> None:
+        """Release what the policy holds (worker pools); called once when the agent stops."""
+
+    def decide_batch(self, bids, asks, sub_balance_wei, cap_wei, slippage_bps=100,
+                     default_amount_in_wei=None,
+                     strategy_state: Optional[Dict[str, Any]] = None,
+                     vault=None) -> SwapIntentBatch:
+        """
+        Decide over columnar inputs (many ticks or many agents at once).
+
+        This default implementation is the reference: it builds a ctx per
+        row and calls decide(), threading one strategy_state through the
+        rows in order. Policies override it with vectorized versions that
+        must return the same decisions.
+
+        Args:
+            bids: Array of best bid prices (NaN = no signal)
+            asks: Array of best ask prices (NaN = no signal)
+            sub_balance_wei: Array or scalar of agent sub-balances (wei)
+            cap_wei: Array or scalar of per-trade caps (wei)
+            slippage_bps: Array or scalar slippage tolerance (bps)
+            default_amount_in_wei: Array or scalar default size (default: cap)
+            strategy_state: Optional persistent state dict
+            vault: Optional simulated vault consulted row by row, for policies
+                whose decisions depend on their own requests (see
+                backtest.RowVault): vault.sub_balance(i) replaces
+                sub_balance_wei, and each SWAP is passed to
+                vault.request(i, intent); False means it was not sent and
+                unsent() is applied before the next row
+
+        Returns:
+            SwapIntentBatch: Columnar decisions
+        """
+        import numpy as np
+
+        cols = prepare_batch(bids, asks, sub_balance_wei, cap_wei, slippage_bps, default_amount_in_wei)
+        n = len(cols["bids"])
+        swap = np.zeros(n, dtype=bool)
+        zero_for_one = np.zeros(n, dtype=bool)
+        amount_in = np.zeros(n, dtype=np.float64)
+        min_amount_out = np.zeros(n, dtype=np.float64)
+        state = {} if strategy_state is None else strategy_state
+        engine = IndicatorEngine() if self.features else None
+
+        for i in range(n):
+            bid, ask = cols["bids"][i], cols["asks"][i]
+            signal = {} if np.isnan(bid) or np.isnan(ask) else {"best_bid": float(bid), "best_ask": float(ask)}
+            cap = int(cols["caps"][i])
+            intent = self.decide({
+                "features": engine.compute((self,), signal)[0] if engine else {},
+                "signal": signal,
+                "sub_balance_wei": vault.sub_balance(i) if vault is not None else int(cols["balances"][i]),
+                "max_per_trade_wei": cap,
+                "default_amount_in_wei": int(cols["defaults"][i]),
+                "cap_wei": cap,
+                "slippage_bps": cols["slippage_bps"][i],
+                "strategy_state": state,
+            })
+            if intent.action == "SWAP":
+                swap[i] = True
+                zero_for_one[i] = intent.zero_for_one
+                amount_in[i] = intent.amount_in
+                min_amount_out[i] = intent.min_amount_out
+                if vault is not None and not vault.request(i, intent):
+                    self.unsent(state, intent)
+
+        return SwapIntentBatch(swap, zero_for_one, amount_in, min_amount_out)
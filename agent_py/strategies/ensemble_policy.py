@@ -0,0 +1,286 @@
+"""
+Ensemble policy: combines several registry policies into one decision.
+
+strategyParams:
+    {
+        "members": [
+            {"strategy": "sniper", "params": {"target_price": 0.99}},
+            {"strategy": "arb", "params": {"threshold": 0.004}, "weight": 2.0,
+             "executor": "thread"}
+        ],
+        "rule": "gate",          # "vote" | "weighted" | "gate"
+        "min_votes": 2,          # vote: SWAPs needed in one direction (default: majority)
+        "min_weight": 0.5,       # weighted: share of total weight needed
+        "deadline_ms": 50,       # pooled members not done by then count as HOLD
+        "workers": 4             # thread / process pool size
+    }
+
+Every member sees the same ctx, including one shared pre-parsed MarketData
+(ctx["market"]), and keeps its own strategy_state under
+strategy_state["members"][i]. Members run inline by default. Members with
+"executor": "thread" or "process" run in a pool under the per-decision
+deadline. A member that is late, or still busy with an earlier decision,
+counts as HOLD. Process members are rebuilt in the worker and their state
+round-trips with each call.
+
+Rules (a SWAP must agree on direction):
+    vote      at least min_votes members SWAP
+    weighted  SWAP weight / total weight >= min_weight
+    gate      the first member SWAPs and every other member agrees
+The combined SWAP uses the smallest amount_in among the agreeing members,
+and the largest meta["desired_amount_in"] among them, so the execution
+scheduler works the rest as a parent order. Member SWAPs the ensemble does
+not send (outvoted, late) are rolled back with the member's unsent().
+"""
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+from .base import BasePolicy
+from .registry import build_policy
+from .types import SwapIntent
+from external_strats.base import MarketData
+
+RULES = ("vote", "weighted", "gate")
+
+# Policies built inside process-pool workers, by (strategy, params JSON)
+_PROCESS_POLICIES = {}
+
+
+def _decide_in_process(strategy: str, params: Dict[str, Any], ctx: Dict[str, Any]):
+    """Process-pool entry point: decide and hand the member state back."""
+    key = (strategy, json.dumps(params, sort_keys=True))
+    policy = _PROCESS_POLICIES.get(key)
+    if policy is None:
+        policy = _PROCESS_POLICIES[key] = build_policy(strategy, params)
+    intent = policy.decide(ctx)
+    return intent, ctx["strategy_state"]
+
+
+class _Member:
+    """One ensemble member and its pending pooled call, if any."""
+
+    def __init__(self, index: int, spec: Dict[str, Any], policy: BasePolicy):
+        self.index = index
+        self.strategy = spec["strategy"]
+        self.params = spec.get("params", {})
+        self.weight = float(spec.get("weight", 1.0))
+        self.executor = spec.get("executor", "inline")
+        self.policy = policy
+        self.future = None
+
+
+class EnsemblePolicy(BasePolicy):
+    """
+    Combines member policies' SwapIntents under a voting/weighting/gating rule.
+    """
+
+    def __init__(self, params: Dict[str, Any] = None):
+        super().__init__(name="ensemble", params=params)
+        self.rule = self.params.get("rule", "vote")
+        if self.rule not in RULES:
+            raise ValueError(f"Unknown ensemble rule '{self.rule}' (expected one of {RULES})")
+
+        self.members: List[_Member] = []
+        for i, spec in enumerate(self.params.get("members", [])):
+            policy = build_policy(spec["strategy"], spec.get("params", {}))
+            if policy is None:
+                raise ValueError(f"Unknown strategy '{spec['strategy']}' in ensemble member {i}")
+            member = _Member(i, spec, policy)
+            if member.executor not in ("inline", "thread", "process"):
+                raise ValueError(f"Unknown executor '{member.executor}' in ensemble member {i}")
+            self.members.append(member)
+            # Member features, namespaced by member index (the engine shares
+            # identical specs anyway)
+            for feature in policy.features:
+                self.features.append(dict(feature, name=f"{i}:{feature['name']}"))
+        if not self.members:
+            raise ValueError("Ensemble needs at least one member")
+        self.uses_depth = any(m.policy.uses_depth for m in self.members)
+
+        self.min_votes = self.params.get("min_votes", len(self.members) // 2 + 1)
+        self.min_weight = self.params.get("min_weight", 0.5)
+        self.deadline = self.params.get("deadline_ms", 50) / 1000.0
+        workers = self.params.get("workers", 4)
+
+        self._threads = None
+        self._processes = None
+        if any(m.executor == "thread" for m in self.members):
+            self._threads = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ensemble")
+        if any(m.executor == "process" for m in self.members):
+            self._processes = ProcessPoolExecutor(max_workers=workers)
+
+    def unsent(self, strategy_state: Dict[str, Any], intent: SwapIntent) -> None:
+        """Forward to the members whose SWAP made up the unsent one."""
+        states = strategy_state.get("members", [])
+        for index in strategy_state.get("sent_by", []):
+            self.members[index].policy.unsent(states[index], intent)
+        strategy_state["sent_by"] = []
+
+    def close(self) -> None:
+        """Shut down the member pools."""
+        for pool in (self._threads, self._processes):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    # ----- member evaluation -----
+
+    def _member_ctx(self, member: _Member, ctx: Dict[str, Any], states: List[Dict[str, Any]]) -> Dict[str, Any]:
+        features = ctx.get("features", {})
+        prefix = f"{member.index}:"
+        member_ctx = dict(ctx)
+        member_ctx["strategy_state"] = states[member.index]
+        member_ctx["features"] = {
+            name[len(prefix):]: value for name, value in features.items() if name.startswith(prefix)
+        }
+        return member_ctx
+
+    def _harvest(self, member: _Member, states: List[Dict[str, Any]]) -> bool:
+        """Collect a finished late call; False if the member is still busy."""
+        future = member.future
+        if future is None:
+            return True
+        if not future.done():
+            return False
+        member.future = None
+        if future.exception() is None:
+            if member.executor == "process":
+                intent, states[member.index] = future.result()
+            else:
+                intent = future.result()
+            # Decided after the deadline: never sent
+            if intent.action == "SWAP":
+                member.policy.unsent(states[member.index], intent)
+        return True
+
+    def _evaluate(self, ctx: Dict[str, Any], states: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        deadline = time.perf_counter() + self.deadline
+        results: List[Optional[Dict[str, Any]]] = [None] * len(self.members)
+        pending = {}
+
+        for member in self.members:
+            if member.executor == "inline":
+                continue
+            if not self._harvest(member, states):
+                results[member.index] = {"intent": None, "status": "busy"}
+                continue
+            member_ctx = self._member_ctx(member, ctx, states)
+            if member.executor == "thread":
+                member.future = self._threads.submit(member.policy.decide, member_ctx)
+            else:
+                member.future = self._processes.submit(
+                    _decide_in_process, member.strategy, member.params, member_ctx)
+            pending[member.future] = member
+
+        for member in self.members:
+            if member.executor == "inline":
+                try:
+                    intent = member.policy.decide(self._member_ctx(member, ctx, states))
+                    results[member.index] = {"intent": intent, "status": "ok"}
+                except Exception as e:
+                    results[member.index] = {"intent": None, "status": f"error:{str(e)[:50]}"}
+
+        if pending:
+            wait(pending, timeout=max(0.0, deadline - time.perf_counter()))
+        for future, member in pending.items():
+            if not future.done():
+                results[member.index] = {"intent": None, "status": "late"}
+                continue
+            member.future = None
+            try:
+                result = future.result()
+            except Exception as e:
+                results[member.index] = {"intent": None, "status": f"error:{str(e)[:50]}"}
+                continue
+            if member.executor == "process":
+                intent, states[member.index] = result
+            else:
+                intent = result
+            results[member.index] = {"intent": intent, "status": "ok"}
+
+        return results
+
+    # ----- aggregation -----
+
+    def _qualifies(self, agreeing: List[_Member]) -> bool:
+        if self.rule == "vote":
+            return len(agreeing) >= self.min_votes
+        if self.rule == "weighted":
+            total = sum(m.weight for m in self.members)
+            return total > 0 and sum(m.weight for m in agreeing) / total >= self.min_weight
+        # gate: first member decides, all others must agree
+        return len(agreeing) == len(self.members)
+
+    def decide(self, ctx: Dict[str, Any]) -> SwapIntent:
+        """
+        Evaluate all members and combine their intents.
+
+        Args:
+            ctx: Context with signal, balances, slippage, etc.
+
+        Returns:
+            SwapIntent: Combined HOLD or SWAP decision
+        """
+        signal = ctx.get("signal", {})
+        strategy_state = ctx.get("strategy_state", {})
+        states = strategy_state.setdefault("members", [])
+        while len(states) < len(self.members):
+            states.append({})
+
+        shared_ctx = dict(ctx)
+        if signal:
+            shared_ctx["market"] = MarketData.from_signal(signal)
+        results = self._evaluate(shared_ctx, states)
+
+        summary = []
+        swaps = {True: [], False: []}
+        for member, result in zip(self.members, results):
+            intent = result["intent"]
+            summary.append({
+                "strategy": member.strategy,
+                "status": result["status"],
+                "action": intent.action if intent else "HOLD",
+                "reason": intent.reason if intent else result["status"],
+            })
+            if intent is not None and intent.action == "SWAP":
+                swaps[intent.zero_for_one].append((member, intent))
+
+        meta = {"rule": self.rule, "members": summary}
+        qualified = [
+            direction for direction, entries in swaps.items()
+            if entries and self._qualifies([m for m, _ in entries])
+        ]
+        agreeing = swaps[qualified[0]] if len(qualified) == 1 else []
+        # Members whose SWAP is not sent undo what they booked for it
+        strategy_state["sent_by"] = [m.index for m, _ in agreeing]
+        for entries in swaps.values():
+            if entries is not agreeing:
+                for m, intent in entries:
+                    m.policy.unsent(states[m.index], intent)
+        if not agreeing:
+            return SwapIntent(
+                action="HOLD",
+                reason="ensemble:conflict" if qualified else f"ensemble:{self.rule}_not_met",
+                meta=meta
+            )
+
+        member, chosen = min(agreeing, key=lambda entry: entry[1].amount_in)
+        desired = [(i.meta or {}).get("desired_amount_in") for _, i in agreeing]
+        desired = [d for d in desired if d]
+        meta.update({
+            "signal": signal,
+            "order": (chosen.meta or {}).get("order"),
+            "side": (chosen.meta or {}).get("side"),
+            "price": (chosen.meta or {}).get("price"),
+            "sized_by": member.strategy,
+            "desired_amount_in": max(desired) if desired else None,
+        })
+        return SwapIntent(
+            action="SWAP",
+            reason=f"ensemble:{self.rule}({len(agreeing)}/{len(self.members)}):{chosen.reason}",
+            zero_for_one=chosen.zero_for_one,
+            amount_in=chosen.amount_in,
+            min_amount_out=chosen.min_amount_out,
+            meta=meta
+        )
@@ -0,0 +1,234 @@
+"""
+Shared incremental indicators keyed by signal stream.
+
+Policies declare the features they need as specs on `features`:
+
+    {"name": "vol", "kind": "volatility", "field": "mid", "window": 100}
+
+The engine deduplicates identical indicators (same kind, field and
+parameters) across all policies and agents reading the same signal source,
+updates each one once per tick (repeated reads of a tick with the same
+"seq"/"timestamp" are ignored) in O(1), and hands every policy its own
+name -> value mapping as ctx["features"]. Values are None while warming up.
+
+Kinds:
+    ema         exponential moving average (halflife, in ticks)
+    zscore      (x - rolling mean) / rolling std (window)
+    volatility  rolling std of log returns (window)
+    vwap        rolling volume-weighted average of field (window,
+                volume_field; ticks without volume weigh 1)
+
+Fields are signal keys, plus "mid" ((best_bid + best_ask) / 2) and
+"spread_rel" ((best_ask - best_bid) / best_bid).
+"""
+import math
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+
+def field_value(signal: Dict[str, Any], field: str) -> Optional[float]:
+    """Read a (possibly derived) numeric field from a signal, None if missing."""
+    if field == "mid" or field == "spread_rel":
+        bid, ask = signal.get("best_bid"), signal.get("best_ask")
+        if bid is None or ask is None:
+            return None
+        if field == "mid":
+            return (bid + ask) / 2.0
+        return (ask - bid) / bid if bid > 0 else None
+    value = signal.get(field)
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+class _RollingStats:
+    """Mean / variance over the last `window` values (sliding Welford)."""
+
+    __slots__ = ("values", "window", "mean", "m2")
+
+    def __init__(self, window: int):
+        self.values = deque()
+        self.window = window
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, x: float) -> None:
+        values = self.values
+        if len(values) == self.window:
+            old = values.popleft()
+            if values:
+                old_mean = self.mean
+                self.mean -= (old - old_mean) / len(values)
+                self.m2 -= (old - old_mean) * (old - self.mean)
+            else:
+                self.mean = self.m2 = 0.0
+        values.append(x)
+        delta = x - self.mean
+        self.mean += delta / len(values)
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.window
+
+    @property
+    def std(self) -> float:
+        n = len(self.values)
+        return math.sqrt(max(self.m2, 0.0) / (n - 1)) if n > 1 else 0.0
+
+
+class EMA:
+    """Exponential moving average of a field."""
+
+    def __init__(self, field: str, halflife: float = 20.0):
+        self.field = field
+        self.decay = 0.5 ** (1.0 / halflife)
+        self.value = None
+
+    def update(self, signal: Dict[str, Any]) -> None:
+        x = field_value(signal, self.field)
+        if x is None:
+            return
+        self.value = x if self.value is None else self.decay * self.value + (1.0 - self.decay) * x
+
+
+class ZScore:
+    """Z-score of a field against its rolling mean and std."""
+
+    def __init__(self, field: str, window: int = 100):
+        self.field = field
+        self.stats = _RollingStats(window)
+        self.value = None
+
+    def update(self, signal: Dict[str, Any]) -> None:
+        x = field_value(signal, self.field)
+        if x is None:
+            return
+        self.stats.push(x)
+        std = self.stats.std
+        self.value = (x - self.stats.mean) / std if self.stats.full and std > 0 else None
+
+
+class Volatility:
+    """Rolling standard deviation of a field's log returns."""
+
+    def __init__(self, field: str = "mid", window: int = 100):
+        self.field = field
+        self.stats = _RollingStats(window)
+        self.last = None
+        self.value = None
+
+    def update(self, signal: Dict[str, Any]) -> None:
+        x = field_value(signal, self.field)
+        if x is None or x <= 0:
+            return
+        if self.last is not None:
+            self.stats.push(math.log(x / self.last))
+            if self.stats.full:
+                self.value = self.stats.std
+        self.last = x
+
+
+class VWAP:
+    """Rolling volume-weighted average of a field."""
+
+    def __init__(self, field: str = "mid", window: int = 100, volume_field: str = "volume"):
+        self.field = field
+        self.volume_field = volume_field
+        self.window = window
+        self.entries = deque()
+        self.pv = 0.0
+        self.v = 0.0
+        self.value = None
+
+    def update(self, signal: Dict[str, Any]) -> None:
+        price = field_value(signal, self.field)
+        if price is None:
+            return
+        volume = field_value(signal, self.volume_field)
+        volume = 1.0 if volume is None else volume
+        if len(self.entries) == self.window:
+            old_price, old_volume = self.entries.popleft()
+            self.pv -= old_price * old_volume
+            self.v -= old_volume
+        self.entries.append((price, volume))
+        self.pv += price * volume
+        self.v += volume
+        self.value = self.pv / self.v if self.v > 0 else None
+
+
+INDICATOR_KINDS = {
+    "ema": EMA,
+    "zscore": ZScore,
+    "volatility": Volatility,
+    "vwap": VWAP,
+}
+
+
+def _spec_key(spec: Dict[str, Any]) -> tuple:
+    """Identity of an indicator: kind plus every parameter except the name."""
+    params = tuple(sorted((k, v) for k, v in spec.items() if k not in ("name", "kind")))
+    return (spec["kind"], params)
+
+
+class IndicatorEngine:
+    """
+    Per-source indicator registry shared by all policies in a process.
+
+    Each (source, spec) pair maps to one indicator instance; an indicator
+    declared by several policies is computed once.
+    """
+
+    def __init__(self):
+        self._indicators = {}   # source -> {spec key: indicator}
+        self._last_tick = {}    # source -> seq/timestamp last applied
+
+    def _indicator(self, source: str, spec: Dict[str, Any]):
+        indicators = self._indicators.setdefault(source, {})
+        key = _spec_key(spec)
+        indicator = indicators.get(key)
+        if indicator is None:
+            cls = INDICATOR_KINDS.get(spec["kind"])
+            if cls is None:
+                raise ValueError(f"Unknown indicator kind '{spec['kind']}'")
+            params = {k: v for k, v in spec.items() if k not in ("name", "kind")}
+            indicator = indicators[key] = cls(**params)
+        return indicator
+
+    def update(self, signal: Dict[str, Any]) -> None:
+        """Advance every indicator of the signal's source by one tick."""
+        if not signal:
+            return
+        source = signal.get("source", "default")
+        tick = signal.get("seq", signal.get("timestamp"))
+        if tick is not None and self._last_tick.get(source) == tick:
+            return
+        self._last_tick[source] = tick
+        for indicator in self._indicators.get(source, {}).values():
+            indicator.update(signal)
+
+    def features(self, specs: List[Dict[str, Any]], signal: Dict[str, Any]) -> Dict[str, Any]:
+        """Current values of `specs` for the signal's source (name -> value)."""
+        source = (signal or {}).get("source", "default")
+        return {spec["name"]: self._indicator(source, spec).value for spec in specs}
+
+    def compute(self, policies, signal: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Update the signal's source once and return ctx["features"] per policy.
+
+        Args:
+            policies: Iterable of policies (objects with a `features` list)
+            signal: Current signal dict
+
+        Returns:
+            list: One name -> value dict per policy
+        """
+        policies = list(policies)
+        source = (signal or {}).get("source", "default")
+        for policy in policies:
+            for spec in policy.features:
+                self._indicator(source, spec)
+        self.update(signal)
+        return [self.features(policy.features, signal) for policy in policies]
+
+
+# Process-wide engine (loop_agent and the ensemble share it)
+INDICATORS = IndicatorEngine()
@@ -2,33 +2,122 @@
 Strategy registry and factory.
 
 Provides build_policy() to instantiate strategies by name.
+
+Strategies are registered as "module:Class" paths and imported on first use,
+so an agent only pays for the strategy it runs. Names resolve, in order, to:
+    1. STRATEGY_REGISTRY (built-ins and register_strategy(); values are
+       paths or classes)
+    2. installed packages' entry points in the "safe_agent.strategies" group,
+       e.g. in a third-party package's pyproject.toml:
+           [project.entry-points."safe_agent.strategies"]
+           ml = "my_ml_strategy.policy:MLPolicy"
+    3. a "module:Class" path given directly as the strategy name
+Resolved classes are cached. list_strategies() reads only names, never
+strategy code.
 """
-from typing import Dict, Any, Optional
+import importlib
+from typing import Dict, Any, Optional, Type, Union
 from .base import BasePolicy
-from .sniper_policy import SniperPolicy
-from .arb_policy import ArbPolicy
 
+ENTRY_POINT_GROUP = "safe_agent.strategies"
 
-# Registry of available strategies
-STRATEGY_REGISTRY = {
-    "sniper": SniperPolicy,
-    "arb": ArbPolicy,
-    "arbitrage": ArbPolicy,  # Alias
+# Registry of available strategies: name -> "module:Class" (relative to
+# this package when the module starts with ".") or a BasePolicy subclass
+STRATEGY_REGISTRY: Dict[str, Union[str, Type[BasePolicy]]] = {
+    "sniper": ".sniper_policy:SniperPolicy",
+    "arb": ".arb_policy:ArbPolicy",
+    "arbitrage": ".arb_policy:ArbPolicy",  # Alias
+    "ensemble": ".ensemble_policy:EnsemblePolicy",
 }
 
+# "module:Class" path -> resolved class
+_RESOLVED: Dict[str, Type[BasePolicy]] = {}
+
+# name -> EntryPoint, discovered once per process (None until first needed)
+_ENTRY_POINTS = None
+
+
+def _entry_points():
+    global _ENTRY_POINTS
+    if _ENTRY_POINTS is None:
+        from importlib.metadata import entry_points
+
+        _ENTRY_POINTS = {}
+        try:
+            for ep in entry_points(group=ENTRY_POINT_GROUP):
+                _ENTRY_POINTS.setdefault(ep.name.lower(), ep)
+        except Exception as e:
+            print(f"  [Warning: Could not read strategy entry points: {e}]")
+    return _ENTRY_POINTS
+
+
+def _import_path(path: str):
+    module_name, _, attr = path.partition(":")
+    if not attr:
+        raise ImportError(f"Strategy path '{path}' must look like 'module:Class'")
+    module = importlib.import_module(module_name, package=__package__)
+    obj = module
+    for part in attr.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def register_strategy(name: str, target: Union[str, Type[BasePolicy]]) -> None:
+    """
+    Register a strategy without importing it.
+
+    Args:
+        name: Strategy name used in agents.local.json
+        target: "module:Class" path (imported on first build) or a class
+    """
+    STRATEGY_REGISTRY[name.lower()] = target
+
+
+def resolve_strategy(name: str) -> Optional[Type[BasePolicy]]:
+    """
+    Strategy class for a name, importing its module on first use.
+
+    Returns:
+        The policy class, or None if no strategy has that name
+
+    Raises:
+        ImportError: The strategy is registered but its code fails to import
+    """
+    key = name.lower()
+    target = STRATEGY_REGISTRY.get(key)
+    if target is None:
+        ep = _entry_points().get(key)
+        if ep is not None:
+            target = ep.value
+        elif ":" in name:
+            target = name
+        else:
+            return None
+    if not isinstance(target, str):
+        return target
+
+    cls = _RESOLVED.get(target)
+    if cls is None:
+        try:
+            cls = _RESOLVED[target] = _import_path(target)
+        except (ImportError, AttributeError) as e:
+            raise ImportError(f"Strategy '{name}' ({target}) failed to import: {e}") from e
+    return cls
+
 
 def build_policy(name: str, params: Dict[str, Any] = None) -> Optional[BasePolicy]:
     """
     Build a policy instance by name.
 
     Args:
-        name: Strategy name (e.g., "sniper", "arb", "momentum")
+        name: Strategy name (e.g., "sniper", "arb", "momentum") or a
+            "module:Class" path
         params: Optional parameters for the strategy
 
     Returns:
         BasePolicy instance, or None if strategy not found
     """
-    strategy_class = STRATEGY_REGISTRY.get(name.lower())
+    strategy_class = resolve_strategy(name)
 
     if strategy_class is None:
         return None
@@ -38,9 +127,13 @@ def build_policy(name: str, params: Dict[str, Any] = None) -> Optional[BasePolic
 
 def list_strategies() -> list:
     """
-    List all available strategy names.
+    List all available strategy names (built-in and entry points).
+
+    Imports no strategy code.
 
     Returns:
         List of strategy names
     """
-    return list(STRATEGY_REGISTRY.keys())
+    names = list(STRATEGY_REGISTRY.keys())
+    names.extend(name for name in _entry_points() if name not in STRATEGY_REGISTRY)
+    return names
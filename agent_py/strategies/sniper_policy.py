@@ -5,10 +5,11 @@ Wraps external_strats.sniper.SniperStrategy and converts its output
 to the unified SwapIntent format.
 """
 from typing import Dict, Any
-from .base import BasePolicy
-from .types import SwapIntent
+from .base import BasePolicy, prepare_batch, batch_amounts, quoted_min_out
+from .types import SwapIntent, SwapIntentBatch
 from external_strats.sniper import SniperStrategy
 from external_strats.base import MarketData
+from amounts import parse_units
 
 
 class SniperPolicy(BasePolicy):
@@ -23,6 +24,19 @@ class SniperPolicy(BasePolicy):
         super().__init__(name="sniper", params=params)
         # Initialize underlying strategy
         self.strategy = SniperStrategy(params)
+        # Orders are capped at the depth that fills at or under target_price
+        self.uses_depth = True
+
+        # Optional volatility guard: HOLD while rolling volatility of the mid
+        # (std of per-tick log returns) is above max_volatility or unknown
+        self.max_volatility = self.params.get("max_volatility")
+        if self.max_volatility is not None:
+            self.features.append({
+                "name": "volatility",
+                "kind": "volatility",
+                "field": "mid",
+                "window": self.params.get("volatility_window", 100),
+            })
 
     def decide(self, ctx: Dict[str, Any]) -> SwapIntent:
         """
@@ -44,26 +58,23 @@ class SniperPolicy(BasePolicy):
 
         # Check if cap is zero (agent cannot trade)
         if cap_wei == 0:
-            return SwapIntent(
-                action="HOLD",
-                reason="sniper:cap_is_zero",
-                meta={"signal": signal}
-            )
+            return SwapIntent.hold("sniper:cap_is_zero")
 
         # Check if we have valid signal data
         if not signal or "best_ask" not in signal or "best_bid" not in signal:
-            return SwapIntent(
-                action="HOLD",
-                reason="sniper:no_signal",
-                meta={"signal": signal}
-            )
+            return SwapIntent.hold("sniper:no_signal")
 
-        # Construct MarketData from signal
-        market = MarketData(
-            best_bid=signal.get("best_bid", 1.0),
-            best_ask=signal.get("best_ask", 1.0),
-            extra=signal
-        )
+        if self.max_volatility is not None:
+            volatility = ctx.get("features", {}).get("volatility")
+            if volatility is None or volatility > self.max_volatility:
+                return SwapIntent(
+                    action="HOLD",
+                    reason="sniper:volatility_warmup" if volatility is None else "sniper:volatility_too_high",
+                    meta={"volatility": volatility}
+                )
+
+        # Construct MarketData from signal (an ensemble parses it once for all members)
+        market = ctx.get("market") or MarketData.from_signal(signal)
 
         # Get strategy state (persistent across calls)
         strategy_state = ctx.get("strategy_state", {})
@@ -73,11 +84,7 @@ class SniperPolicy(BasePolicy):
 
         # No orders = HOLD
         if not orders:
-            return SwapIntent(
-                action="HOLD",
-                reason="sniper:no_order",
-                meta={"signal": signal}
-            )
+            return SwapIntent.hold("sniper:no_order")
 
         # Take first order
         order = orders[0]
@@ -92,17 +99,21 @@ class SniperPolicy(BasePolicy):
         else:
             amount_in = min(sub_balance_wei, max_per_trade_wei)
 
+        # Never size past the depth that fills at or under the target VWAP
+        depth_limit = order.meta.get("max_amount_in")
+        if depth_limit is not None:
+            amount_in = min(amount_in, parse_units(depth_limit, ctx.get("token_decimals", 18)))
+
         # Ensure positive amount
         if amount_in <= 0:
             return SwapIntent(
                 action="HOLD",
                 reason="sniper:insufficient_balance",
-                meta={"order": order.meta, "signal": signal}
+                meta={"order": order.meta}
             )
 
-        # Calculate min_amount_out with slippage
-        # Conservative: min_out = amount_in * (1 - slippage_bps/10000)
-        min_amount_out = int(amount_in * (1 - slippage_bps / 10000))
+        # Calculate min_amount_out with slippage, against the pool quote if available
+        min_amount_out, quoted_out = quoted_min_out(ctx, amount_in, zero_for_one, slippage_bps)
 
         # Build reason string
         reason = f"sniper:{order.meta.get('reason', 'execute')}"
@@ -117,6 +128,32 @@ class SniperPolicy(BasePolicy):
                 "order": order.meta,
                 "signal": signal,
                 "side": order.side,
-                "price": order.price
+                "price": order.price,
+                "quoted_out": quoted_out,
+                "desired_amount_in": self.desired_amount_in(ctx, order.meta)
             }
         )
+
+    def decide_batch(self, bids, asks, sub_balance_wei, cap_wei, slippage_bps=100,
+                     default_amount_in_wei=None, strategy_state=None) -> SwapIntentBatch:
+        """
+        Vectorized decide(): BUY wherever best_ask <= target_price.
+
+        Same decisions as calling decide() per row; see BasePolicy.decide_batch
+        for the column semantics. Uses the reference loop when max_volatility
+        is set.
+        """
+        import numpy as np
+
+        if self.features:
+            # The volatility guard needs the sequential indicator engine
+            return BasePolicy.decide_batch(self, bids, asks, sub_balance_wei, cap_wei, slippage_bps,
+                                           default_amount_in_wei, strategy_state)
+
+        cols = prepare_batch(bids, asks, sub_balance_wei, cap_wei, slippage_bps, default_amount_in_wei)
+        has_signal = ~(np.isnan(cols["bids"]) | np.isnan(cols["asks"]))
+        order = has_signal & (cols["asks"] <= self.strategy.target_price)
+
+        swap, amount_in, min_amount_out = batch_amounts(cols, order)
+        # Sniper orders are always BUY (token0 -> token1)
+        return SwapIntentBatch(swap, swap.copy(), amount_in, min_amount_out)
@@ -2,12 +2,17 @@
 Unified data structures for strategy decision making.
 
 SwapIntent is the standard output format that all strategies must return.
+Intents are slotted (no per-instance __dict__) and treated as values: use
+dataclasses.replace() to derive one rather than assigning fields.
+SwapIntent.hold(reason) returns one shared instance per reason for the
+common HOLD outcome, so a HOLD tick allocates nothing. (Not frozen:
+frozen dataclasses roughly double construction time.)
 """
 from dataclasses import dataclass
 from typing import Optional, Dict, Any
 
 
-@dataclass
+@dataclass(slots=True)
 class SwapIntent:
     """
     Unified decision output from any trading strategy.
@@ -40,6 +45,21 @@ class SwapIntent:
             if self.min_amount_out is None or self.min_amount_out < 0:
                 raise ValueError("SWAP intent requires non-negative min_amount_out")
 
+    @classmethod
+    def hold(cls, reason: str) -> "SwapIntent":
+        """
+        Shared meta-less HOLD intent for `reason`.
+
+        Built once per reason and reused, so the common no-trade path
+        allocates nothing; callers must not modify it. Attach meta with a
+        regular constructor only when the HOLD carries information the
+        caller needs (e.g. volatility).
+        """
+        intent = _HOLDS.get(reason)
+        if intent is None:
+            intent = _HOLDS[reason] = cls(action="HOLD", reason=reason)
+        return intent
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
         return {
@@ -50,3 +70,48 @@ class SwapIntent:
             "min_amount_out": self.min_amount_out,
             "meta": self.meta or {}
         }
+
+
+# reason -> shared HOLD intent (see SwapIntent.hold)
+_HOLDS: Dict[str, SwapIntent] = {}
+
+
+@dataclass(slots=True)
+class SwapIntentBatch:
+    """
+    Columnar decisions returned by BasePolicy.decide_batch().
+
+    Row i corresponds to row i of the input columns. Amounts are float64
+    wei (wei values overflow int64); use int() on a row to build a SwapIntent.
+
+    Attributes:
+        swap: bool array, True where the decision is SWAP
+        zero_for_one: bool array, swap direction (False where HOLD)
+        amount_in: float64 array, amount to swap in wei (0 where HOLD)
+        min_amount_out: float64 array, minimum output in wei (0 where HOLD)
+    """
+    swap: Any
+    zero_for_one: Any
+    amount_in: Any
+    min_amount_out: Any
+
+    def __len__(self) -> int:
+        return len(self.swap)
+
+    @property
+    def action(self):
+        """Array of "SWAP"/"HOLD" strings."""
+        import numpy as np
+        return np.where(self.swap, "SWAP", "HOLD")
+
+    def intent_at(self, i: int) -> SwapIntent:
+        """Row i as a SwapIntent (reason is not tracked in batch mode)."""
+        if not self.swap[i]:
+            return SwapIntent.hold("batch:hold")
+        return SwapIntent(
+            action="SWAP",
+            reason="batch:swap",
+            zero_for_one=bool(self.zero_for_one[i]),
+            amount_in=int(self.amount_in[i]),
+            min_amount_out=int(self.min_amount_out[i]),
+        )
@@ -0,0 +1,411 @@
+"""
+Parallel strategyParams sweep over a backtest tick file.
+
+Expands a search space into parameter sets for a registry strategy,
+backtests each one with backtest.py's vault model in a process pool and
+writes a ranked CSV. Tick columns are loaded once and placed in shared
+memory; workers map them read-only instead of receiving a copy per task.
+A depth-aware strategy on ticks with order-book levels (which the columns
+don't carry) is streamed from the file by each worker instead.
+
+Search space (JSON, inline or a .json file path), keyed by strategyParams
+name:
+    [v1, v2, ...]                  grid axis / categorical choice
+    {"uniform": [lo, hi]}          continuous
+    {"loguniform": [lo, hi]}       continuous, sampled in log space
+    {"int": [lo, hi]}              integer, inclusive
+A range with lo == hi is a constant.
+Searches:
+    grid    every combination (list values only)
+    random  --samples independent draws
+    tpe     Tree-structured Parzen Estimator: random startup draws, then
+            batches sampled where good configurations are dense relative
+            to bad ones
+
+Usage:
+    python sweep.py --strategy sniper --ticks ticks.jsonl \\
+        --space '{"target_price": [0.99, 0.995, 1.0, 1.005]}'
+    python sweep.py --strategy arb --ticks ticks.jsonl --search random --samples 10000 \\
+        --space '{"threshold": {"loguniform": [0.0005, 0.05]}, "size": {"int": [1, 50]}}'
+"""
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import backtest
+
+METRICS = {
+    "pnl": lambda r: r["pnl"],
+    "pnl_pct": lambda r: r["pnl_pct"],
+    # Return over max drawdown (floored so flat equity curves don't divide by 0)
+    "calmar": lambda r: r["pnl"] / max(r["max_drawdown"], 1e-9),
+}
+
+RESULT_FIELDS = ("pnl", "pnl_pct", "max_drawdown", "max_drawdown_pct", "executed",
+                 "requests", "blocked", "turnover", "fees", "final_position")
+
+
+# ----- search spaces -----
+
+def load_space(value):
+    """Parse a search space from inline JSON or a .json file path."""
+    if os.path.exists(value):
+        with open(value) as f:
+            return json.load(f)
+    return json.loads(value)
+
+
+def _constant(spec):
+    """Return the single value of a numeric range with lo == hi, else None."""
+    if isinstance(spec, dict) and len(spec) == 1:
+        lo, hi = next(iter(spec.values()))
+        if lo == hi:
+            return lo
+    return None
+
+
+def _sample_value(spec, rng):
+    if isinstance(spec, list):
+        return rng.choice(spec)
+    if _constant(spec) is not None:
+        return _constant(spec)
+    if "uniform" in spec:
+        lo, hi = spec["uniform"]
+        return rng.uniform(lo, hi)
+    if "loguniform" in spec:
+        lo, hi = spec["loguniform"]
+        return math.exp(rng.uniform(math.log(lo), math.log(hi)))
+    if "int" in spec:
+        lo, hi = spec["int"]
+        return rng.randint(lo, hi)
+    raise ValueError(f"Unknown search space spec: {spec}")
+
+
+def grid_search(space):
+    """Yield every combination of the space's list values."""
+    names = list(space)
+    for name in names:
+        if not isinstance(space[name], list):
+            raise ValueError(f"Grid search needs a list of values for '{name}'")
+    for values in itertools.product(*(space[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def random_search(space, samples, seed=None):
+    """Yield `samples` independent draws from the space."""
+    rng = random.Random(seed)
+    for _ in range(samples):
+        yield {name: _sample_value(spec, rng) for name, spec in space.items()}
+
+
+class TPESearch:
+    """
+    Tree-structured Parzen Estimator over a search space.
+
+    After `startup` random draws, observations are split into the best
+    `gamma` fraction and the rest. Candidates are drawn around good points
+    and the one maximizing l(x) / g(x) (Gaussian Parzen densities per
+    dimension, Laplace-smoothed frequencies for choices) is proposed.
+    """
+
+    def __init__(self, space, seed=None, startup=20, gamma=0.2, candidates=24):
+        self.space = space
+        self.rng = random.Random(seed)
+        self.startup = startup
+        self.gamma = gamma
+        self.candidates = candidates
+        self.history = []    # (params, score)
+
+    def tell(self, params, score):
+        self.history.append((params, score))
+
+    def ask(self, n):
+        """Propose n parameter sets."""
+        if len(self.history) < self.startup:
+            return list(random_search(self.space, n, self.rng.random()))
+
+        ranked = sorted(self.history, key=lambda h: h[1], reverse=True)
+        split = max(1, int(len(ranked) * self.gamma))
+        good = [p for p, _ in ranked[:split]]
+        bad = [p for p, _ in ranked[split:]] or good
+        return [self._propose(good, bad) for _ in range(n)]
+
+    def _propose(self, good, bad):
+        best, best_score = None, -math.inf
+        for _ in range(self.candidates):
+            params, score = {}, 0.0
+            for name, spec in self.space.items():
+                value = self._draw(spec, [p[name] for p in good])
+                score += self._log_ratio(spec, value, [p[name] for p in good], [p[name] for p in bad])
+                params[name] = value
+            if score > best_score:
+                best, best_score = params, score
+        return best
+
+    @staticmethod
+    def _bounds(spec):
+        if "loguniform" in spec:
+            lo, hi = spec["loguniform"]
+            return math.log(lo), math.log(hi), math.log, math.exp
+        lo, hi = spec["uniform"] if "uniform" in spec else spec["int"]
+        return lo, hi, float, float
+
+    def _draw(self, spec, good_values):
+        if isinstance(spec, list):
+            return self.rng.choice(good_values)
+        if _constant(spec) is not None:
+            return _constant(spec)
+        lo, hi, to_x, from_x = self._bounds(spec)
+        bandwidth = (hi - lo) * len(good_values) ** -0.2
+        x = to_x(self.rng.choice(good_values)) + self.rng.gauss(0.0, bandwidth)
+        value = from_x(min(max(x, lo), hi))
+        return int(round(value)) if "int" in spec else value
+
+    def _log_ratio(self, spec, value, good_values, bad_values):
+        if isinstance(spec, list):
+            k = len(spec)
+            l = (good_values.count(value) + 1) / (len(good_values) + k)
+            g = (bad_values.count(value) + 1) / (len(bad_values) + k)
+            return math.log(l / g)
+        if _constant(spec) is not None:
+            # A constant doesn't separate good from bad configurations
+            return 0.0
+        lo, hi, to_x, _ = self._bounds(spec)
+        x = to_x(value)
+
+        def density(values):
+            bandwidth = (hi - lo) * len(values) ** -0.2
+            # Uniform prior component keeps the density away from zero
+            total = 1.0 / (hi - lo)
+            for v in values:
+                total += math.exp(-0.5 * ((x - to_x(v)) / bandwidth) ** 2) / (bandwidth * 2.5066282746310002)
+            return total / (len(values) + 1)
+
+        return math.log(density(good_values) / density(bad_values))
+
+
+# ----- worker processes -----
+
+_COLUMN_NAMES = ("times", "bids", "asks", "fill_bids", "fill_asks")
+
+# Per-worker state, set by _init_worker
+_WORKER = {}
+
+
+def _share_columns(columns):
+    """Copy tick columns (plus forward-filled quotes) into one shared memory block."""
+    import numpy as np
+    from multiprocessing import shared_memory
+
+    n = len(columns["times"])
+    arrays = {
+        "times": columns["times"],
+        "bids": columns["bids"],
+        "asks": columns["asks"],
+        "fill_bids": backtest.forward_fill(columns["bids"]),
+        "fill_asks": backtest.forward_fill(columns["asks"]),
+    }
+    shm = shared_memory.SharedMemory(create=True, size=max(1, n * 8 * len(_COLUMN_NAMES)))
+    block = np.ndarray((len(_COLUMN_NAMES), n), dtype=np.float64, buffer=shm.buf)
+    for row, name in enumerate(_COLUMN_NAMES):
+        block[row] = arrays[name]
+    return shm, n
+
+
+def _init_worker(shm_name, n, strategy, settings):
+    import numpy as np
+    from multiprocessing import resource_tracker, shared_memory
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    # The parent owns (and unlinks) the block; don't let this process's
+    # resource tracker unlink it when the worker exits
+    resource_tracker.unregister(shm._name, "shared_memory")
+    block = np.ndarray((len(_COLUMN_NAMES), n), dtype=np.float64, buffer=shm.buf)
+    block.flags.writeable = False
+    _WORKER.update(
+        shm=shm,
+        columns={name: block[row] for row, name in enumerate(_COLUMN_NAMES)},
+        strategy=strategy,
+        settings=settings,
+    )
+
+
+def _run_one(params):
+    from strategies import build_policy
+
+    settings = _WORKER["settings"]
+    try:
+        policy = build_policy(_WORKER["strategy"], params)
+        vault = backtest.VaultModel(
+            settings["sub_balance_wei"], settings["max_notional_wei"],
+            settings["approval_delay"], settings["fee_bps"],
+        )
+        if settings["ticks_path"] is not None:
+            # Depth-aware policy on ticks with order-book levels: the shared
+            # columns don't carry them
+            result = backtest.simulate_stream(policy, backtest.iter_ticks(settings["ticks_path"]), vault,
+                                              settings["cap_wei"], settings["slippage_bps"])
+        elif backtest.has_batch_decide(policy):
+            result = backtest.simulate_columns(policy, _WORKER["columns"], vault,
+                                               settings["cap_wei"], settings["slippage_bps"])
+        else:
+            result = backtest.simulate_stream(policy, backtest.iter_columns(_WORKER["columns"]), vault,
+                                              settings["cap_wei"], settings["slippage_bps"])
+    except Exception as e:
+        return {"params": params, "error": f"{type(e).__name__}: {str(e)[:200]}"}
+    result["params"] = params
+    return result
+
+
+# ----- driver -----
+
+def run_sweep(strategy, ticks_path, space, search="grid", samples=100, metric="pnl",
+              workers=None, seed=None, sub_balance=150, cap=100, max_notional=None,
+              slippage_bps=50, approval_delay=0.0, fee_bps=0, progress=None):
+    """
+    Backtest many strategyParams sets in parallel and rank them.
+
+    Args:
+        strategy: Registry strategy name
+        ticks_path: .jsonl or .csv tick file
+        space: Search space dict (see module docstring)
+        search: "grid", "random" or "tpe"
+        samples: Configurations to evaluate (random / tpe)
+        metric: Ranking metric, one of METRICS
+        workers: Process count (default: CPU count)
+        seed: Random seed (random / tpe)
+        sub_balance, cap, max_notional, slippage_bps, approval_delay, fee_bps:
+            Vault settings, as in backtest.run_backtest()
+        progress: Optional callback(done, total)
+
+    Returns:
+        list: Result dicts sorted best first, each with "params" and "score"
+    """
+    from strategies import build_policy
+
+    policy = build_policy(strategy, {})
+    if policy is None:
+        raise ValueError(f"Unknown strategy '{strategy}'")
+    score_of = METRICS[metric]
+    columns = backtest.load_columns(ticks_path)
+
+    settings = {
+        "sub_balance_wei": int(sub_balance * backtest.WEI),
+        "cap_wei": int(cap * backtest.WEI),
+        "max_notional_wei": int((cap if max_notional is None else max_notional) * backtest.WEI),
+        "slippage_bps": slippage_bps,
+        "approval_delay": approval_delay,
+        "fee_bps": fee_bps,
+        # Set when workers must stream the file instead of the columns
+        "ticks_path": None,
+    }
+    if backtest.needs_depth(policy, columns):
+        print(f"  [Warning: {strategy} sizes from order-book depth in the ticks, "
+              f"workers stream {ticks_path} instead of the shared columns]")
+        settings["ticks_path"] = str(ticks_path)
+    workers = workers or os.cpu_count() or 1
+
+    shm, n = _share_columns(columns)
+    results = []
+
+    def score(result):
+        result["score"] = -math.inf if "error" in result else score_of(result)
+        results.append(result)
+        return result["score"]
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm.name, n, strategy, settings)) as pool:
+            if search == "tpe":
+                tpe = TPESearch(space, seed=seed)
+                batch = workers * 2
+                while len(results) < samples:
+                    proposals = tpe.ask(min(batch, samples - len(results)))
+                    for result in pool.map(_run_one, proposals):
+                        tpe.tell(result["params"], score(result))
+                    if progress:
+                        progress(len(results), samples)
+            else:
+                configs = list(grid_search(space) if search == "grid" else random_search(space, samples, seed))
+                chunksize = max(1, len(configs) // (workers * 8))
+                for result in pool.map(_run_one, configs, chunksize=chunksize):
+                    score(result)
+                    if progress and len(results) % max(1, len(configs) // 20) == 0:
+                        progress(len(results), len(configs))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    results.sort(key=lambda r: r["score"], reverse=True)
+    return results
+
+
+def write_results(results, path):
+    """Write ranked results to CSV (one column per parameter)."""
+    param_names = sorted({name for r in results for name in r["params"]})
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank", "score", *param_names, *RESULT_FIELDS, "error"])
+        for rank, r in enumerate(results, 1):
+            writer.writerow([
+                rank, r["score"],
+                *(r["params"].get(name, "") for name in param_names),
+                *(r.get(field, "") for field in RESULT_FIELDS),
+                r.get("error", ""),
+            ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--strategy", default="sniper", help="registry strategy name")
+    parser.add_argument("--ticks", required=True, help=".jsonl or .csv tick file")
+    parser.add_argument("--space", required=True, help="search space as JSON or a .json file")
+    parser.add_argument("--search", choices=("grid", "random", "tpe"), default="grid")
+    parser.add_argument("--samples", type=int, default=100, help="configurations (random / tpe)")
+    parser.add_argument("--metric", choices=tuple(METRICS), default="pnl")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--out", default="sweep_results.csv", help="ranked results CSV")
+    parser.add_argument("--top", type=int, default=10, help="rows to print")
+    parser.add_argument("--sub-balance", type=float, default=150.0)
+    parser.add_argument("--cap", type=float, default=100.0)
+    parser.add_argument("--max-notional", type=float, default=None)
+    parser.add_argument("--slippage-bps", type=int, default=50)
+    parser.add_argument("--approval-delay", type=float, default=0.0)
+    parser.add_argument("--fee-bps", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    results = run_sweep(
+        args.strategy, args.ticks, load_space(args.space), search=args.search,
+        samples=args.samples, metric=args.metric, workers=args.workers, seed=args.seed,
+        sub_balance=args.sub_balance, cap=args.cap, max_notional=args.max_notional,
+        slippage_bps=args.slippage_bps, approval_delay=args.approval_delay, fee_bps=args.fee_bps,
+        progress=lambda done, total: print(f"  {done}/{total} configurations", flush=True),
+    )
+    elapsed = time.perf_counter() - started
+    write_results(results, args.out)
+
+    errors = sum(1 for r in results if "error" in r)
+    print(f"=== Sweep: {args.strategy} ({args.search}, {len(results)} configurations, "
+          f"{elapsed:.1f}s, {len(results) / elapsed:.1f}/s) ===")
+    if errors:
+        print(f"  [Warning: {errors} configurations failed, see 'error' column]")
+    for rank, r in enumerate(results[:args.top], 1):
+        if "error" in r:
+            break
+        score = f"{args.metric}={r['score']:+.4f}  " if args.metric != "pnl" else ""
+        print(f"{rank:>3}. {score}pnl={r['pnl']:+.4f}  "
+              f"dd={r['max_drawdown_pct']:.2f}%  trades={r['executed']}  {json.dumps(r['params'])}")
+    print(f"Results written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,74 @@
+"""
+Integer amount conversions must be exact and the token registry must read
+each token once.
+"""
+from decimal import Decimal
+
+from amounts import TokenRegistry, apply_bps, format_units, parse_units, to_decimal
+
+
+def test_parse_units_is_exact():
+    assert parse_units("0.1") == 10 ** 17
+    assert parse_units(0.1) == 10 ** 17
+    assert parse_units("1.5", 6) == 1_500_000
+    assert parse_units(Decimal("0.000001"), 6) == 1
+    assert parse_units("0.0000001", 6) == 0  # truncated
+    assert parse_units(3, 6) == 3_000_000
+
+
+def test_format_round_trips():
+    for amount, decimals in [("123.456789", 6), ("0.000000000000000001", 18), ("-2.5", 18), ("7", 0)]:
+        assert format_units(parse_units(amount, decimals), decimals) == amount
+    assert format_units(parse_units("1.239", 6), 6, places=2) == "1.23"
+    assert to_decimal(parse_units("0.1")) == Decimal("0.1")
+
+
+def test_apply_bps_floors_on_integers():
+    amount = 10 ** 18 + 7
+    assert apply_bps(amount, 50) == amount * 9950 // 10000
+    assert apply_bps(amount, 50.0) == apply_bps(amount, 50)
+    assert apply_bps(10_000, 12.5) == 9987
+
+
+class FakeCall:
+    def __init__(self, value):
+        self.value = value
+
+    def call(self):
+        return self.value
+
+
+class FakeToken:
+    def __init__(self, decimals, symbol):
+        self.functions = type("F", (), {
+            "decimals": staticmethod(lambda: FakeCall(decimals)),
+            "symbol": staticmethod(lambda: FakeCall(symbol)),
+        })
+
+
+class FakeW3:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.reads = 0
+        self.eth = self
+
+    def contract(self, address, abi):
+        self.reads += 1
+        return FakeToken(*self.tokens[address])
+
+
+def test_registry_reads_once_and_persists(tmp_path):
+    usdc, weth = "0x" + "aa" * 20, "0x" + "BB" * 20
+    w3 = FakeW3({usdc: (6, "USDC"), weth: (18, "WETH")})
+    path = tmp_path / "tokens.json"
+
+    registry = TokenRegistry(path)
+    registry.ensure(w3, [usdc, weth, usdc])
+    registry.ensure(w3, [usdc, weth])
+    assert w3.reads == 2
+    assert registry.decimals(usdc) == 6
+    assert registry.symbol(weth) == "WETH"
+
+    reloaded = TokenRegistry(path)
+    assert reloaded.decimals(weth.lower()) == 18
+    assert reloaded.decimals("0x" + "cc" * 20) == 18  # unknown: default
@@ -0,0 +1,60 @@
+"""
+The arb position only changes for SWAPs that go out, and exits sell the
+token1 the entries booked, not the token0 sub-balance.
+"""
+from strategies.arb_policy import ArbPolicy
+
+WEI = 10 ** 18
+FIT = {"mu": 0.005, "sigma_eq": 0.001, "theta": 0.1, "sigma": 0.0005, "half_life": 6.9}
+
+ENTRY = {"best_bid": 1.0, "best_ask": 1.009}   # z = 4
+EXIT = {"best_bid": 1.0, "best_ask": 1.004}    # z = -1
+
+
+def make_policy():
+    policy = ArbPolicy({"threshold": 0.004})
+    policy.strategy.observe = lambda stats, spread, key=None: FIT
+    return policy
+
+
+def decide(policy, state, signal, balance, cap=100 * WEI):
+    return policy.decide({"signal": signal, "sub_balance_wei": balance, "max_per_trade_wei": cap,
+                          "default_amount_in_wei": cap, "cap_wei": cap, "slippage_bps": 50,
+                          "strategy_state": state})
+
+
+def test_exit_sells_position_after_full_investment():
+    policy, state = make_policy(), {}
+    entry = decide(policy, state, ENTRY, 100 * WEI)
+    assert entry.action == "SWAP" and entry.zero_for_one
+    assert state["ou"]["in_position"] and state["ou"]["position"] == entry.min_amount_out
+
+    # Fully invested: no token0 left, the exit still goes out
+    exit_ = decide(policy, state, EXIT, 0)
+    assert exit_.action == "SWAP" and not exit_.zero_for_one
+    assert exit_.amount_in == entry.min_amount_out
+    assert not state["ou"]["in_position"] and state["ou"]["position"] == 0
+
+
+def test_capped_exit_keeps_the_rest_open():
+    policy, state = make_policy(), {}
+    decide(policy, state, ENTRY, 300 * WEI, cap=300 * WEI)
+    held = state["ou"]["position"]
+    assert decide(policy, state, EXIT, 0).amount_in == 100 * WEI
+    assert state["ou"]["in_position"] and state["ou"]["position"] == held - 100 * WEI
+
+
+def test_hold_and_unsent_leave_position_unchanged():
+    policy, state = make_policy(), {}
+    hold = decide(policy, state, ENTRY, 0)
+    assert hold.reason == "arb:insufficient_balance" and not state["ou"]["in_position"]
+
+    entry = decide(policy, state, ENTRY, 100 * WEI)
+    policy.unsent(state, entry)   # e.g. deferred by the scheduler
+    assert not state["ou"]["in_position"] and state["ou"]["position"] == 0
+
+    # Only the last decision is undone
+    decide(policy, state, ENTRY, 100 * WEI)
+    decide(policy, state, {"best_bid": 1.0, "best_ask": 1.006}, 100 * WEI)  # z = 1: no signal
+    policy.unsent(state, entry)
+    assert state["ou"]["in_position"]
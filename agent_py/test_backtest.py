@@ -0,0 +1,86 @@
+"""
+The columns backtest engine must report the same results as the stream engine,
+and "auto" must not pick it when it would drop data the policy reads.
+"""
+import json
+import random
+
+import pytest
+
+from backtest import VaultModel, WEI, load_columns, run_backtest, simulate_columns
+from strategies import build_policy
+from tickgen import run_record
+
+
+def add_depth(src, dst, seed):
+    """Copy a .jsonl tick file, giving every tick a few ask levels."""
+    rng = random.Random(seed)
+    with open(src) as f, open(dst, "w") as out:
+        for line in f:
+            tick = json.loads(line)
+            ask = tick["best_ask"]
+            tick["asks"] = [[ask + 0.002 * level, rng.uniform(5, 60)] for level in range(3)]
+            out.write(json.dumps(tick) + "\n")
+
+
+@pytest.fixture(scope="module")
+def tick_files(tmp_path_factory):
+    root = tmp_path_factory.mktemp("ticks")
+    paths = {}
+    for suffix in (".jsonl", ".csv"):
+        paths[suffix] = root / f"ticks{suffix}"
+        run_record(paths[suffix], 20000, rate=10, seed=11)
+    paths["depth"] = root / "depth.jsonl"
+    add_depth(paths[".jsonl"], paths["depth"], seed=11)
+    return paths
+
+
+def run_both(path, strategy, params, max_notional=100, approval_delay=30.0, fee_bps=30, balance=1000):
+    """Stream and auto engine reports, plus the engine auto picked."""
+    results = []
+    for engine in ("stream", "auto"):
+        result = run_backtest(strategy, params, path, sub_balance=balance, cap=100, max_notional=max_notional,
+                              approval_delay=approval_delay, fee_bps=fee_bps, engine=engine)
+        for key in ("elapsed_s", "ticks_per_s", "load_s"):
+            result.pop(key, None)
+        results.append(result)
+    picked = results[1].pop("engine")
+    results[0].pop("engine")
+    return results + [picked]
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".csv", "depth"])
+@pytest.mark.parametrize("strategy,params", [
+    ("sniper", {"target_price": 1.0}),
+    ("arb", {"threshold": 0.004}),
+    ("sniper", {"target_price": 1.0, "max_volatility": 0.00016}),
+])
+def test_engines_agree(tick_files, suffix, strategy, params):
+    stream, auto, engine = run_both(tick_files[suffix], strategy, params)
+    assert stream["executed"] > 1
+    assert stream == auto
+    # Only the depth-aware sniper needs the levels the columns drop
+    assert engine == ("stream" if suffix == "depth" and strategy == "sniper" else "columns")
+
+
+def test_depth_changes_sniper_sizing(tick_files):
+    # The columns engine alone would size without the depth cap
+    columns = load_columns(tick_files["depth"])
+    assert columns["depth"] and not load_columns(tick_files[".jsonl"])["depth"]
+    vault = VaultModel(1000 * WEI, 100 * WEI, 30.0, 30)
+    blind = simulate_columns(build_policy("sniper", {"target_price": 1.0}), columns, vault, 100 * WEI, 50)
+    stream, _, _ = run_both(tick_files["depth"], "sniper", {"target_price": 1.0})
+    assert stream["executed"] != blind["executed"] or stream["turnover"] != blind["turnover"]
+
+
+def test_cap_exceeded_and_slippage_rejections(tick_files):
+    # maxNotionalPerTrade below the config cap: every approval fails
+    stream, columns, _ = run_both(tick_files[".jsonl"], "sniper", {"target_price": 1.0}, max_notional=50)
+    assert stream == columns
+    approvals = stream["requests"] - stream["pending_at_end"]
+    assert stream["executed"] == 0 and stream["rejected"]["cap_exceeded"] == approvals > 0
+
+    # A 1% fee exceeds the 0.5% slippage tolerance near parity
+    stream, columns, _ = run_both(tick_files[".jsonl"], "arb", {"threshold": 0.004}, fee_bps=100)
+    assert stream == columns
+    assert stream["rejected"]["slippage"] > 0
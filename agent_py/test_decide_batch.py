@@ -0,0 +1,96 @@
+"""
+Vectorized decide_batch() must match the per-call decide() reference.
+"""
+import numpy as np
+
+from strategies.base import BasePolicy
+from strategies.sniper_policy import SniperPolicy
+from strategies.arb_policy import ArbPolicy
+
+WEI = 10 ** 18
+
+
+def random_columns(n=2000, seed=7):
+    rng = np.random.default_rng(seed)
+    bids = rng.uniform(0.98, 1.01, n)
+    # Mean-reverting AR(1) spread, so the OU arb estimator finds reversion
+    spreads = np.empty(n)
+    spreads[0] = 0.005
+    for i in range(1, n):
+        spreads[i] = max(0.005 + 0.9 * (spreads[i - 1] - 0.005) + rng.normal(0.0, 0.002), 0.0)
+    asks = bids * (1 + spreads)
+    bids[rng.random(n) < 0.05] = np.nan          # missing signal
+    bids[rng.random(n) < 0.02] = 0.0             # degenerate bid
+    balances = rng.integers(0, 300, n) * WEI     # whole tokens, incl. zero
+    caps = rng.choice([0, 50, 100, 250], n) * WEI
+    defaults = rng.choice([0, 100], n) * WEI
+    slippage = rng.choice([10, 50, 100], n)
+    return bids, asks, balances.astype(float), caps.astype(float), defaults.astype(float), slippage
+
+
+def assert_same(policy):
+    bids, asks, balances, caps, defaults, slippage = random_columns()
+    fast = policy.decide_batch(bids, asks, balances, caps, slippage, defaults)
+    ref = BasePolicy.decide_batch(policy, bids, asks, balances, caps, slippage, defaults)
+
+    assert fast.swap.any() and not fast.swap.all()
+    np.testing.assert_array_equal(fast.swap, ref.swap)
+    np.testing.assert_array_equal(fast.zero_for_one, ref.zero_for_one)
+    np.testing.assert_array_equal(fast.amount_in, ref.amount_in)
+    # Reference rows go through exact integer apply_bps; the batch stays in float64
+    np.testing.assert_allclose(fast.min_amount_out, ref.min_amount_out, rtol=1e-15)
+    return fast
+
+
+def test_sniper_batch_matches_reference():
+    assert_same(SniperPolicy({"target_price": 1.0}))
+
+
+def test_arb_batch_matches_reference():
+    fast = assert_same(ArbPolicy({"threshold": 0.004, "min_samples": 20}))
+    # Exits are sized from the position, also on rows without sub-balance
+    assert (fast.swap & ~fast.zero_for_one).any()
+
+
+def test_batch_row_round_trips_to_intent():
+    policy = SniperPolicy({"target_price": 1.0})
+    batch = policy.decide_batch([0.998], [0.999], 150 * WEI, 100 * WEI, 50)
+    intent = batch.intent_at(0)
+    ctx = {
+        "signal": {"best_bid": 0.998, "best_ask": 0.999},
+        "sub_balance_wei": 150 * WEI,
+        "max_per_trade_wei": 100 * WEI,
+        "default_amount_in_wei": 100 * WEI,
+        "cap_wei": 100 * WEI,
+        "slippage_bps": 50,
+    }
+    expected = policy.decide(ctx)
+    assert intent.action == expected.action == "SWAP"
+    assert intent.amount_in == expected.amount_in
+    assert intent.min_amount_out == expected.min_amount_out
+
+
+def test_hold_fast_path_is_shared():
+    policy = SniperPolicy({"target_price": 0.9})
+    ctx = {"signal": {"best_bid": 0.998, "best_ask": 0.999}, "cap_wei": 100 * WEI,
+           "sub_balance_wei": 100 * WEI, "max_per_trade_wei": 100 * WEI}
+    first, second = policy.decide(ctx), policy.decide(ctx)
+    assert first is second
+    assert first.action == "HOLD" and first.meta is None
+    assert not hasattr(first, "__dict__")
+
+
+def test_arb_vectorized_matches_loop_across_chunks():
+    policy = ArbPolicy({"threshold": 0.004, "min_samples": 20, "halflife": 50})
+    bids, asks, balances, caps, defaults, slippage = random_columns(20000, seed=3)
+    loop = policy._decide_batch_loop(bids, asks, balances, caps, slippage, defaults)
+
+    # Two calls threading one strategy_state behave like one long call
+    state, halves = {}, []
+    for part in (slice(0, 7000), slice(7000, None)):
+        halves.append(policy.decide_batch(bids[part], asks[part], balances[part], caps[part],
+                                          slippage[part], defaults[part], strategy_state=state))
+    assert loop.swap.sum() > 10
+    np.testing.assert_array_equal(np.concatenate([h.swap for h in halves]), loop.swap)
+    np.testing.assert_array_equal(np.concatenate([h.zero_for_one for h in halves]), loop.zero_for_one)
+    np.testing.assert_array_equal(np.concatenate([h.amount_in for h in halves]), loop.amount_in)
@@ -0,0 +1,62 @@
+"""
+Depth ladder sizing must match a brute-force walk of the book.
+"""
+import random
+
+from amounts import parse_units
+from external_strats.depth import DepthLadder
+from strategies import build_policy
+
+WEI = 10 ** 18
+
+
+def brute_force_fill(levels, target, steps=2000):
+    """Walk the book in small slices, stopping when the VWAP would exceed target."""
+    cost = qty = 0.0
+    for price, size in sorted(levels):
+        for _ in range(steps):
+            q = size / steps
+            if (cost + price * q) / (qty + q) > target:
+                return cost, qty
+            cost += price * q
+            qty += q
+    return cost, qty
+
+
+def test_max_fill_under_matches_brute_force():
+    rng = random.Random(5)
+    for _ in range(20):
+        levels = [[rng.uniform(0.95, 1.05), rng.uniform(1, 20)] for _ in range(rng.randint(1, 12))]
+        ladder = DepthLadder(levels)
+        target = rng.uniform(0.96, 1.04)
+        cost, qty, vwap = ladder.max_fill_under(target)
+        expected_cost, expected_qty = brute_force_fill(levels, target)
+        if qty:
+            assert vwap <= target + 1e-12
+        assert abs(qty - expected_qty) <= max(1e-2, 1e-3 * expected_qty)
+        assert abs(cost - expected_cost) <= max(1e-2, 1e-3 * expected_cost)
+
+
+def test_sniper_sizes_to_depth():
+    policy = build_policy("sniper", {"target_price": 1.0})
+    ctx = {
+        "signal": {"best_bid": 0.98, "best_ask": 0.99, "seq": 1,
+                   "asks": [[0.99, 10], [1.0, 10], [1.02, 40]]},
+        "sub_balance_wei": 1000 * WEI,
+        "max_per_trade_wei": 1000 * WEI,
+        "default_amount_in_wei": 0,
+        "cap_wei": 1000 * WEI,
+        "slippage_bps": 50,
+        "strategy_state": {},
+    }
+    intent = policy.decide(ctx)
+    assert intent.action == "SWAP"
+    order = intent.meta["order"]
+    # 10 @ 0.99 + 10 @ 1.0 + q @ 1.02 with VWAP 1.0 => q = 5, cost 25
+    assert abs(order["max_amount_in"] - 25.0) < 1e-9
+    assert abs(order["depth_vwap"] - 1.0) < 1e-12
+    assert intent.amount_in == parse_units(order["max_amount_in"])
+
+    # Without depth the old best_ask sizing applies
+    ctx["signal"] = {"best_bid": 0.98, "best_ask": 0.99}
+    assert build_policy("sniper", {"target_price": 1.0}).decide(ctx).amount_in == 1000 * WEI
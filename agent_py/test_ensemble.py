@@ -0,0 +1,113 @@
+"""
+Ensemble rules, and late pooled members counting as HOLD.
+"""
+import time
+
+from strategies import SwapIntent, build_policy
+from strategies.base import BasePolicy
+from strategies.registry import STRATEGY_REGISTRY
+
+WEI = 10 ** 18
+
+
+def make_ctx(strategy_state):
+    return {
+        "signal": {"best_bid": 0.998, "best_ask": 0.999},
+        "sub_balance_wei": 150 * WEI,
+        "max_per_trade_wei": 100 * WEI,
+        "default_amount_in_wei": 100 * WEI,
+        "cap_wei": 100 * WEI,
+        "slippage_bps": 50,
+        "strategy_state": strategy_state,
+    }
+
+
+class SlowBuy(BasePolicy):
+    def __init__(self, params=None):
+        super().__init__(name="slow_buy", params=params)
+
+    def decide(self, ctx):
+        time.sleep(self.params.get("sleep", 0.0))
+        assert ctx["market"].best_ask == 0.999
+        ctx["strategy_state"]["calls"] = ctx["strategy_state"].get("calls", 0) + 1
+        return SwapIntent(action="SWAP", reason="slow_buy", zero_for_one=True,
+                          amount_in=40 * WEI, min_amount_out=39 * WEI)
+
+
+def test_vote_and_weighted_rules():
+    always = {"strategy": "sniper", "params": {"target_price": 1.1}}
+    never = {"strategy": "sniper", "params": {"target_price": 0.5}, "weight": 3.0}
+
+    intent = build_policy("ensemble", {"members": [always, never], "min_votes": 1}).decide(make_ctx({}))
+    assert intent.action == "SWAP" and intent.reason.startswith("ensemble:vote(1/2):sniper:")
+    assert intent.amount_in == 100 * WEI
+
+    intent = build_policy("ensemble", {"members": [always, never]}).decide(make_ctx({}))
+    assert intent.action == "HOLD" and intent.reason == "ensemble:vote_not_met"
+
+    weighted = build_policy("ensemble", {"members": [always, never], "rule": "weighted", "min_weight": 0.25})
+    assert weighted.decide(make_ctx({})).action == "SWAP"
+
+
+def test_late_thread_member_counts_as_hold(monkeypatch):
+    monkeypatch.setitem(STRATEGY_REGISTRY, "slow_buy", SlowBuy)
+    policy = build_policy("ensemble", {
+        "rule": "gate",
+        "deadline_ms": 20,
+        "members": [
+            {"strategy": "sniper", "params": {"target_price": 1.1}},
+            {"strategy": "slow_buy", "params": {"sleep": 0.2}, "executor": "thread"},
+        ],
+    })
+    state = {}
+    try:
+        late = policy.decide(make_ctx(state))
+        assert late.action == "HOLD"
+        assert [m["status"] for m in late.meta["members"]] == ["ok", "late"]
+        # Still running the previous decision
+        assert policy.decide(make_ctx(state)).meta["members"][1]["status"] == "busy"
+
+        time.sleep(0.3)
+        policy.members[1].policy.params["sleep"] = 0.0
+        intent = policy.decide(make_ctx(state))
+        assert intent.action == "SWAP"
+        # Gated SWAP is sized by the smaller member intent
+        assert intent.amount_in == 40 * WEI and intent.meta["sized_by"] == "slow_buy"
+        assert state["members"][1]["calls"] == 2
+    finally:
+        policy.close()
+
+
+class Booking(BasePolicy):
+    """SWAPs in a fixed direction and books them, like arb's position."""
+
+    def __init__(self, params=None):
+        super().__init__(name="booking", params=params)
+
+    def decide(self, ctx):
+        state = ctx["strategy_state"]
+        state["booked"] = state.get("booked", 0) + 1
+        return SwapIntent(action="SWAP", reason="booking", zero_for_one=self.params["buy"],
+                          amount_in=self.params["amount"] * WEI, min_amount_out=0,
+                          meta={"desired_amount_in": self.params.get("desired", 0) * WEI or None})
+
+    def unsent(self, strategy_state, intent):
+        strategy_state["booked"] -= 1
+
+
+def test_desired_amount_and_unsent_members(monkeypatch):
+    monkeypatch.setitem(STRATEGY_REGISTRY, "booking", Booking)
+    policy = build_policy("ensemble", {"min_votes": 2, "members": [
+        {"strategy": "booking", "params": {"buy": True, "amount": 50, "desired": 300}},
+        {"strategy": "booking", "params": {"buy": True, "amount": 80, "desired": 200}},
+        {"strategy": "booking", "params": {"buy": False, "amount": 10}},
+    ]})
+    state = {}
+    intent = policy.decide(make_ctx(state))
+    assert intent.action == "SWAP" and intent.amount_in == 50 * WEI
+    assert intent.meta["desired_amount_in"] == 300 * WEI
+    # The outvoted SELL was never sent
+    assert [s["booked"] for s in state["members"]] == [1, 1, 0]
+
+    policy.unsent(state, intent)
+    assert [s["booked"] for s in state["members"]] == [0, 0, 0]
@@ -0,0 +1,77 @@
+"""
+The fleet index must answer filtered, sorted, paginated queries from its
+secondary indexes and keep them right as agents publish new states.
+"""
+import pytest
+
+from fleet import FleetIndex
+
+
+def agent_state(n, status="running", strategy="sniper", pnl=0.0, action="HOLD", enabled=True):
+    return {
+        "status": status,
+        "last_update": f"2026-10-19 00:00:{n:02d}",
+        "loop_count": n,
+        "pnl": pnl,
+        "agent": {"address": f"0x{n:040x}", "strategy": strategy, "enabled": enabled},
+        "decision": {"action": action, "reason": "test"},
+    }
+
+
+def build(count=20):
+    fleet = FleetIndex()
+    for n in range(count):
+        fleet.upsert(agent_state(n, strategy="arb" if n % 2 else "sniper", pnl=float(n % 7)))
+    return fleet
+
+
+def test_filters_and_sort():
+    fleet = build()
+    fleet.upsert(agent_state(3, status="AWAITING_APPROVAL", strategy="arb", action="REQUEST_PENDING"))
+
+    page = fleet.query({"status": "AWAITING_APPROVAL"})
+    assert [row["address"] for row in page["agents"]] == [f"0x{3:040x}"] and page["total"] == 1
+    assert fleet.query({"status": "running"})["total"] == 19
+
+    top = fleet.query({"strategy": "arb"}, sort="pnl", order="desc", limit=3)["agents"]
+    assert [row["pnl"] for row in top] == [6.0, 5.0, 5.0]
+    assert all(row["strategy"] == "arb" for row in top)
+    assert fleet.stats()["strategy"] == {"sniper": 10, "arb": 10}
+    assert fleet.query({"strategy": "momentum"}) == {"agents": [], "next": None, "total": 0}
+
+
+def test_cursor_pages_cover_every_agent_once():
+    fleet = build(50)
+    for order in ("asc", "desc"):
+        seen, cursor = [], None
+        while True:
+            page = fleet.query(sort="pnl", order=order, limit=7, cursor=cursor)
+            seen.extend((row["pnl"], row["address"]) for row in page["agents"])
+            cursor = page["next"]
+            if cursor is None:
+                break
+        assert len(seen) == 50 and seen == sorted(seen, reverse=order == "desc")
+
+
+def test_update_moves_agent_between_indexes():
+    fleet = build(4)
+    address = f"0x{2:040x}"
+    fleet.upsert(agent_state(2, strategy="arb", pnl=100.0, enabled=False))
+    assert fleet.query(sort="pnl", order="desc", limit=1)["agents"][0]["address"] == address
+    assert fleet.query({"enabled": False})["total"] == 1
+    assert fleet.query({"strategy": "sniper"})["total"] == 1
+    assert fleet.get(address.upper().replace("0X", "0x"))["pnl"] == 100.0
+
+    assert fleet.remove(address) and len(fleet) == 3
+    assert fleet.query({"enabled": False})["total"] == 0
+    assert fleet.upsert({"status": "polling"}) is None  # no agent: ignored
+
+
+def test_bad_queries_raise_value_error():
+    fleet = build(3)
+    with pytest.raises(ValueError):
+        fleet.query(sort="gas")
+    with pytest.raises(ValueError):
+        fleet.query({"cap": "100"})
+    with pytest.raises(ValueError):
+        fleet.query(cursor="not-a-cursor")
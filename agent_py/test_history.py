@@ -0,0 +1,84 @@
+"""
+The history store must record write_state() rows in batches and answer
+agent / action / time-range queries from its indexes, newest first.
+"""
+from pathlib import Path
+
+import pytest
+
+from history import HistoryStore, HistoryWriter, build_query, connect, decision_row, history_path
+
+AGENT = "0x3C44CdDdB6a900fa2b585dd299e03d12FA4293BC"
+OTHER = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+
+
+def state(n, action="HOLD", agent=AGENT):
+    return {
+        "status": "running",
+        "loop_count": n,
+        "agent": {"address": agent},
+        "decision": {"action": action, "reason": f"r{n}"},
+        "snapshot": {"agent_sub_balance": str(150 * 10 ** 18), "agent_spent": "0", "vault_balance": "1"},
+        "intent": {"action": action, "zeroForOne": True, "amountIn": str(10 ** 20), "minOut": "1",
+                   "meta": {"price": 0.999}},
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / "history.db"
+    writer = HistoryWriter(path, batch_size=7, flush_interval=0)
+    for n in range(40):
+        agent = AGENT if n % 2 else OTHER
+        writer.record_state(1_000_000.0 + n, state(n, "SWAP" if n % 5 == 0 else "HOLD", agent), "LIVE")
+    writer.record(decision_row(2_000_000.0, state(99, "REQUEST_PENDING"), "DRY_RUN"))
+    writer.close()
+    assert writer.written == 41 and writer.failed == 0
+    return HistoryStore(path)
+
+
+def test_filters_newest_first(store):
+    rows = store.query(agent=AGENT.lower(), action="swap")["rows"]
+    assert [row["iteration"] for row in rows] == [35, 25, 15, 5]
+    assert rows[0]["amount_in"] == str(10 ** 20) and rows[0]["zero_for_one"] is True
+    assert rows[0]["meta"] == {"price": 0.999}
+
+    ranged = store.query(since=1_000_010, until="1970-01-12T13:47:10Z")["rows"]
+    assert [row["iteration"] for row in ranged] == list(range(30, 9, -1))
+    assert store.query(action="REQUEST_PENDING")["rows"][0]["tx_status"] == "dry_run"
+
+
+def test_cursor_pages_cover_every_row_once(store):
+    seen, cursor = [], None
+    while True:
+        page = store.query(agent=AGENT, limit=6, cursor=cursor)
+        seen.extend(row["id"] for row in page["rows"])
+        cursor = page["next"]
+        if cursor is None:
+            break
+    assert len(seen) == 21 == len(set(seen))
+    with pytest.raises(ValueError):
+        store.query(cursor="nope")
+
+
+@pytest.mark.parametrize("filters", [
+    {"agent": AGENT, "action": "SWAP", "since": 1.0},
+    {"agent": AGENT, "since": 1.0, "until": 2.0},
+    {"action": "SWAP"},
+    {"since": 1.0},
+    {},
+])
+def test_every_query_shape_is_an_index_scan_without_sort(store, filters):
+    sql, params = build_query(filters.get("agent"), filters.get("action"), filters.get("since"),
+                              filters.get("until"), 10, "1.5:3")
+    plan = " ".join(row[3] for row in connect(store.path).execute("EXPLAIN QUERY PLAN " + sql, params))
+    assert "INDEX" in plan and "TEMP B-TREE" not in plan, plan
+
+
+def test_default_db_is_outside_served_agent_dir(monkeypatch):
+    # tools/server.py serves agent_py/ to any origin
+    monkeypatch.delenv("AGENT_HISTORY_DB", raising=False)
+    agent_dir = Path(__file__).resolve().parent
+    assert agent_dir not in history_path().parents
+    monkeypatch.setenv("AGENT_HISTORY_DB", "off")
+    assert history_path() is None
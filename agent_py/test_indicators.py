@@ -0,0 +1,68 @@
+"""
+Incremental indicators must match a full recomputation, and be shared.
+"""
+import math
+import random
+import statistics
+
+from strategies import IndicatorEngine, build_policy
+
+
+def make_ticks(n=500, seed=2):
+    rng = random.Random(seed)
+    mid, ticks = 1.0, []
+    for seq in range(1, n + 1):
+        mid *= 1.0 + rng.gauss(0.0, 0.001)
+        half = mid * rng.uniform(0.0005, 0.003)
+        ticks.append({"best_bid": mid - half, "best_ask": mid + half, "volume": rng.uniform(1, 10),
+                      "seq": seq, "source": "test"})
+    return ticks
+
+
+class Reader:
+    def __init__(self, features):
+        self.features = features
+
+
+def test_rolling_indicators_match_recomputation():
+    window = 50
+    reader = Reader([
+        {"name": "z", "kind": "zscore", "field": "spread_rel", "window": window},
+        {"name": "vol", "kind": "volatility", "field": "mid", "window": window},
+        {"name": "vwap", "kind": "vwap", "field": "mid", "window": window},
+    ])
+    engine = IndicatorEngine()
+    ticks = make_ticks()
+    mids = [(t["best_bid"] + t["best_ask"]) / 2 for t in ticks]
+    spreads = [(t["best_ask"] - t["best_bid"]) / t["best_bid"] for t in ticks]
+
+    for i, tick in enumerate(ticks):
+        values = engine.compute((reader,), tick)[0]
+        if i < window:
+            continue
+        recent = spreads[i - window + 1:i + 1]
+        expected_z = (spreads[i] - statistics.fmean(recent)) / statistics.stdev(recent)
+        returns = [math.log(mids[j] / mids[j - 1]) for j in range(i - window + 1, i + 1)]
+        volumes = [t["volume"] for t in ticks[i - window + 1:i + 1]]
+        expected_vwap = sum(m * v for m, v in zip(mids[i - window + 1:i + 1], volumes)) / sum(volumes)
+
+        assert math.isclose(values["z"], expected_z, rel_tol=1e-6)
+        assert math.isclose(values["vol"], statistics.stdev(returns), rel_tol=1e-6)
+        assert math.isclose(values["vwap"], expected_vwap, rel_tol=1e-9)
+
+
+def test_indicators_are_shared_and_updated_once_per_tick():
+    engine = IndicatorEngine()
+    a = build_policy("sniper", {"max_volatility": 0.01, "volatility_window": 20})
+    b = build_policy("sniper", {"max_volatility": 0.02, "volatility_window": 20})
+    ticks = make_ticks(100)
+
+    for tick in ticks:
+        first = engine.compute((a, b), tick)
+        # loop_agent re-reads the same signals.json between updates
+        again = engine.compute((a,), tick)
+        assert first[0] == first[1] == again[0]
+
+    indicators = engine._indicators["test"]
+    assert len(indicators) == 1
+    assert len(next(iter(indicators.values())).stats.values) == 20
@@ -0,0 +1,95 @@
+"""
+Pool mirror quotes must equal PoolManager.swap's integer math and track
+Swap events.
+"""
+import random
+
+from pool_mirror import PoolMirror, quote_exact_in
+from strategies import build_policy
+
+WEI = 10 ** 18
+
+
+def pool_manager_swap(reserves, fee, zero_for_one, amount_in):
+    """Line-by-line port of PoolManager.swap: returns (amount0, amount1)."""
+    r0, r1 = reserves
+    with_fee = (amount_in * (1000000 - fee)) // 1000000
+    if zero_for_one:
+        out = (r1 * with_fee) // (r0 + with_fee)
+        return amount_in, -out
+    out = (r0 * with_fee) // (r1 + with_fee)
+    return -out, amount_in
+
+
+class FakeEth:
+    def __init__(self, logs):
+        self.block_number = 10
+        self.logs = logs
+
+    def get_logs(self, params):
+        return [log for log in self.logs if params["fromBlock"] <= log["block"] <= params["toBlock"]]
+
+
+class FakeContract:
+    address = "0x0000000000000000000000000000000000000001"
+
+
+class FakeW3:
+    def __init__(self, logs):
+        self.eth = FakeEth(logs)
+
+
+def encode_swap(amount0, amount1, zero_for_one):
+    words = (int(zero_for_one), amount0, amount1)
+    return b"".join(w.to_bytes(32, "big", signed=True) for w in words)
+
+
+def test_quotes_match_pool_manager_and_follow_swaps():
+    rng = random.Random(7)
+    reserves = [1_000 * WEI, 1_010 * WEI]
+    mirror = PoolMirror("0x" + "11" * 20, "0x" + "22" * 20, 3000, *reserves)
+
+    logs = []
+    for i in range(200):
+        zero_for_one = rng.random() < 0.5
+        amount_in = rng.randint(1, 50 * WEI)
+        amount0, amount1 = pool_manager_swap(reserves, 3000, zero_for_one, amount_in)
+        # Quote before the swap equals what the swap returns
+        assert mirror.quote(amount_in, zero_for_one) == -(amount1 if zero_for_one else amount0)
+        reserves = [reserves[0] + amount0, reserves[1] + amount1]
+        mirror.apply_swap(amount0, amount1)
+        logs.append({"block": 11 + i, "data": encode_swap(amount0, amount1, zero_for_one)})
+    assert [mirror.reserve0, mirror.reserve1] == reserves
+
+    # Replaying the same swaps as logs reaches the same state
+    replay = PoolMirror("0x" + "11" * 20, "0x" + "22" * 20, 3000, 1_000 * WEI, 1_010 * WEI, resync_every=0)
+    replay._w3, replay._contract, replay.block = FakeW3(logs), FakeContract(), 10
+    replay._w3.eth.block_number = 10 + len(logs)
+    assert replay.poll() == len(logs)
+    assert (replay.reserve0, replay.reserve1) == (mirror.reserve0, mirror.reserve1)
+    assert replay.poll() == 0
+
+    amounts = [rng.randint(1, 100 * WEI) for _ in range(50)]
+    batch = mirror.quote_many(amounts, True)
+    for amount, approx in zip(amounts, batch):
+        exact = mirror.quote(amount, True)
+        assert abs(approx - exact) <= exact * 1e-12 + 1
+
+
+def test_v4_view_and_policy_min_out():
+    mirror = PoolMirror("0x" + "11" * 20, "0x" + "22" * 20, 3000, 1_000 * WEI, 4_000 * WEI)
+    assert mirror.sqrt_price_x96 == 2 * 2 ** 96
+    assert mirror.liquidity == 2_000 * WEI
+    assert quote_exact_in(0, 1, 1, 3000) == 0
+
+    policy = build_policy("sniper", {"target_price": 1.0})
+    ctx = {
+        "signal": {"best_bid": 0.98, "best_ask": 0.99},
+        "sub_balance_wei": 100 * WEI, "max_per_trade_wei": 100 * WEI,
+        "default_amount_in_wei": 100 * WEI, "cap_wei": 100 * WEI,
+        "slippage_bps": 50, "strategy_state": {}, "quoter": mirror,
+    }
+    intent = policy.decide(ctx)
+    quoted = mirror.quote(100 * WEI, True)
+    assert intent.meta["quoted_out"] == quoted
+    assert intent.min_amount_out == quoted * 9950 // 10000
@@ -0,0 +1,50 @@
+"""
+A trigger-file request must profile exactly the requested iterations and
+write the folded stacks and the per-phase allocation report.
+"""
+import time
+
+import profiler
+import tracing
+from profiler import Profiler, request_profile
+
+
+def busy_phase():
+    with tracing.span("strategy.decide"):
+        data = [bytearray(1024) for _ in range(200)]
+        time.sleep(0.02)
+    return data
+
+
+def test_trigger_file_profiles_n_iterations(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILE_TRIGGER", tmp_path / "profile.trigger")
+    prof = Profiler(iterations=50, interval_ms=1, output_dir=tmp_path / "profiles")
+    kept = []
+    try:
+        prof.begin_iteration(1)
+        assert not prof.active
+
+        assert request_profile(3).exists()
+        profiled = 0
+        for iteration in range(2, 8):
+            prof.begin_iteration(iteration)
+            profiled += prof.active
+            kept.append(busy_phase())
+            prof.end_iteration()
+    finally:
+        prof.stop()
+
+    # The trigger is consumed and the session ends after 3 iterations
+    assert profiled == 3 and not prof.active
+    assert not profiler.PROFILE_TRIGGER.exists()
+    assert tracing._PHASE_LISTENER is None
+
+    folded = list((tmp_path / "profiles").glob("profile-*.folded"))
+    alloc = list((tmp_path / "profiles").glob("alloc-*.txt"))
+    assert len(folded) == len(alloc) == 1
+    lines = folded[0].read_text().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any(line.startswith("[strategy.decide];") and "busy_phase (test_profiler.py)" in line
+               for line in lines)
+    report = alloc[0].read_text()
+    assert "== strategy.decide (+" in report and "test_profiler.py" in report
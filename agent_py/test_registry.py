@@ -0,0 +1,42 @@
+"""
+The strategy registry must resolve names lazily: listing strategies imports
+no strategy code, and plugins come from entry points or module paths.
+"""
+import os
+import subprocess
+import sys
+from importlib.metadata import EntryPoint
+
+import pytest
+
+from strategies import build_policy, list_strategies, register_strategy, resolve_strategy
+from strategies import registry
+from strategies.sniper_policy import SniperPolicy
+
+
+def test_listing_imports_no_strategy_code():
+    code = ("import sys, strategies; names = strategies.list_strategies(); "
+            "print(sorted(names), any(m.startswith(('external_strats', 'strategies.sniper', "
+            "'strategies.arb', 'strategies.ensemble')) for m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert out.stdout.strip().endswith("False")
+    assert "'sniper'" in out.stdout and "'ensemble'" in out.stdout
+
+
+def test_entry_point_and_path_strategies(monkeypatch):
+    ep = EntryPoint("external_sniper", "strategies.sniper_policy:SniperPolicy", registry.ENTRY_POINT_GROUP)
+    monkeypatch.setattr(registry, "_ENTRY_POINTS", {"external_sniper": ep})
+
+    assert "external_sniper" in list_strategies()
+    assert isinstance(build_policy("External_Sniper", {"target_price": 0.9}), SniperPolicy)
+    assert resolve_strategy("strategies.arb_policy:ArbPolicy").__name__ == "ArbPolicy"
+    assert build_policy("no_such_strategy") is None
+
+
+def test_broken_strategy_raises(monkeypatch):
+    monkeypatch.setattr(registry, "STRATEGY_REGISTRY", dict(registry.STRATEGY_REGISTRY))
+    register_strategy("broken", "no_such_module.policy:Policy")
+    assert "broken" in list_strategies()
+    with pytest.raises(ImportError, match="broken"):
+        build_policy("broken")
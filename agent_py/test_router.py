@@ -0,0 +1,125 @@
+"""
+Router picks the best route, splits optimally and polls all pools at once.
+"""
+import itertools
+
+from pool_mirror import PoolMirror
+from router import Router
+
+WEI = 10 ** 18
+TOKEN0, TOKEN1 = "0x" + "11" * 20, "0x" + "22" * 20
+
+
+def route(fee, pool="0x" + "33" * 20, token1=TOKEN1):
+    return {"token0": TOKEN0, "token1": token1, "fee": fee, "pool": pool, "enabled": True}
+
+
+def make_router():
+    router = Router()
+    pools = [(3000, 1_000), (500, 400), (10000, 5_000)]
+    for i, (fee, depth) in enumerate(pools):
+        mirror = PoolMirror(TOKEN0, TOKEN1, fee, depth * WEI, depth * WEI)
+        mirror.pool_topic, mirror.block = "0x%064x" % (i + 1), 10
+        router.add_route(bytes([i + 1]) * 32, route(fee), mirror)
+    return router
+
+
+def test_best_and_split():
+    router = make_router()
+    # Other pairs are indexed but never quoted
+    router.add_route(b"\x09" * 32, route(3000, token1="0x" + "44" * 20),
+                     PoolMirror(TOKEN0, "0x" + "44" * 20, 3000, 10 ** 30, 10 ** 30))
+    assert len(router.candidates()) == 3
+
+    # Small order: lowest fee wins; large order: deepest pool wins
+    assert router.best(1 * WEI, True)[0] == b"\x02" * 32
+    assert router.best(200 * WEI, True)[0] == b"\x03" * 32
+
+    amount = 300 * WEI
+    legs = router.split(amount, True, chunks=30)
+    assert sum(leg_in for _, leg_in, _ in legs) == amount
+    split_out = sum(leg_out for _, _, leg_out in legs)
+    assert split_out >= router.best(amount, True)[1]
+
+    # No allocation of the 30 slices over the 3 routes beats the greedy one
+    mirrors = [m for _, m in router.candidates()]
+    size = amount // 30
+    best_brute = max(
+        sum(m.quote(n * size, True) for m, n in zip(mirrors, (a, b, 30 - a - b)))
+        for a, b in itertools.product(range(31), repeat=2) if a + b <= 30
+    )
+    assert split_out >= best_brute
+
+    route_ids, grid = router.quote_grid([1 * WEI, 200 * WEI], True)
+    for i, route_id in enumerate(route_ids):
+        mirror = router.mirror_for(route_id)
+        assert abs(grid[i, 1] - mirror.quote(200 * WEI, True)) <= 1e-9 * grid[i, 1] + 1
+
+
+class FakeEth:
+    block_number = 12
+
+    def __init__(self):
+        self.calls = []
+
+    def get_logs(self, params):
+        self.calls.append(params)
+        word = lambda v: v.to_bytes(32, "big", signed=True)
+        return [
+            {"blockNumber": 11, "topics": [b"", bytes.fromhex("%064x" % 1)],
+             "data": word(1) + word(5 * WEI) + word(-4 * WEI)},
+            {"blockNumber": 12, "topics": [b"", "0x%064x" % 3],
+             "data": word(0) + word(-2 * WEI) + word(3 * WEI)},
+        ]
+
+
+class FakeContract:
+    address = "0x" + "55" * 20
+
+
+class FakeW3:
+    def __init__(self):
+        self.eth = FakeEth()
+
+
+def test_poll_uses_one_log_read_for_all_pools():
+    router = make_router()
+    router.w3 = FakeW3()
+    for mirror in router.mirrors.values():
+        mirror._contract = FakeContract()
+    router.resync_every = 0
+
+    assert router.poll() == 2
+    assert len(router.w3.eth.calls) == 1
+    assert len(router.w3.eth.calls[0]["topics"][1]) == 3
+    first, _, third = router.mirrors.values()
+    assert (first.reserve0, first.reserve1) == (1_005 * WEI, 996 * WEI)
+    assert (third.reserve0, third.reserve1) == (4_998 * WEI, 5_003 * WEI)
+    assert all(m.block == 12 for m in router.mirrors.values())
+    assert router.poll() == 0
+
+
+def test_refresh_reads_new_routes_once():
+    class Call:
+        def __init__(self, value):
+            self.value = value
+
+        def call(self):
+            return self.value
+
+    class Functions:
+        reads = 0
+
+        def routes(self, route_id):
+            Functions.reads += 1
+            return Call((TOKEN0, TOKEN1, 3000, "0x" + "33" * 20, route_id != b"\x02" * 32))
+
+    class Vault:
+        functions = Functions()
+
+    router = make_router()
+    router.vault = Vault()
+    router.refresh([b"\x01" * 32, b"\x03" * 32, b"\x03" * 32])
+    assert Functions.reads == 0
+    assert set(router.routes) == {b"\x01" * 32, b"\x03" * 32}
+    assert len(router.mirrors) == 2
@@ -0,0 +1,109 @@
+"""
+Parent intents above the per-trade limit are worked as child requests.
+"""
+from scheduler import ExecutionScheduler
+from strategies import SwapIntent
+
+WEI = 10 ** 18
+AGENT = "0x3C44CdDdB6a900fa2b585dd299e03d12FA4293BC"
+
+
+def make_ctx(volume=None, seq=None):
+    signal = {"best_bid": 0.98, "best_ask": 0.99, "seq": seq}
+    if volume is not None:
+        signal["volume"] = volume
+    return {"signal": signal, "sub_balance_wei": 1000 * WEI, "max_per_trade_wei": 100 * WEI,
+            "default_amount_in_wei": 100 * WEI, "slippage_bps": 50}
+
+
+def swap(desired=None, amount=100 * WEI):
+    return SwapIntent(action="SWAP", reason="sniper:snipe", zero_for_one=True, amount_in=amount,
+                      min_amount_out=amount * 9950 // 10000, meta={"desired_amount_in": desired})
+
+
+HOLD = SwapIntent(action="HOLD", reason="sniper:no_order")
+
+
+def test_twap_children_respect_limit_and_fill():
+    scheduler = ExecutionScheduler({"algo": "twap", "slices": 4, "interval": 10})
+    state = {}
+    children, now = [], 0.0
+    for i in range(12):
+        now = i * 5.0
+        child = scheduler.state(state)["child"]
+        # The owner approves each request 5s later
+        pending = (AGENT, child["amount"], True, True, True) if child else None
+        scheduler.reconcile(state, pending, AGENT, now)
+        if state["execution"]["history"]:
+            break
+        out = scheduler.step(state, swap(350 * WEI), make_ctx(seq=i), now)
+        if out is not None:
+            assert out.amount_in <= 100 * WEI
+            assert out.reason.startswith("exec:twap:")
+            children.append((now, out.amount_in))
+            scheduler.sent(state, out, now)
+
+    # ceil(350 / 4) = 87.5 tokens per slice, one slice every 10s
+    assert [t for t, _ in children] == [0.0, 10.0, 20.0, 30.0]
+    assert sum(a for _, a in children) == 350 * WEI
+    history = state["execution"]["history"]
+    assert history[-1]["status"] == "done" and history[-1]["filled"] == str(350 * WEI)
+    assert state["execution"]["parent"] is None
+
+
+def test_small_intent_passes_through_and_decay_cancels():
+    scheduler = ExecutionScheduler({"algo": "signal"})
+    state = {}
+    small = swap(50 * WEI, 50 * WEI)
+    assert scheduler.step(state, small, make_ctx(), 0.0) is small
+
+    first = scheduler.step(state, swap(300 * WEI), make_ctx(), 1.0)
+    assert first.amount_in == 100 * WEI
+    scheduler.sent(state, first, 1.0, filled=True)
+    second = scheduler.step(state, swap(300 * WEI), make_ctx(), 2.0)
+    scheduler.sent(state, second, 2.0)
+
+    # Signal gone while the second child is outstanding: no new child, and the
+    # parent closes once that child settles
+    assert scheduler.step(state, HOLD, make_ctx(), 3.0) is None
+    assert state["execution"]["parent"]["status"] == "signal_decayed"
+    scheduler.reconcile(state, (AGENT, 100 * WEI, True, True, True), AGENT, 4.0)
+    last = state["execution"]["history"][-1]
+    assert last["status"] == "signal_decayed" and last["filled"] == str(200 * WEI)
+
+
+def test_pov_sizes_by_observed_volume_and_timeout_returns_amount():
+    scheduler = ExecutionScheduler({"algo": "pov", "participation": 0.5, "min_child": 10,
+                                    "child_timeout": 30, "cancel_after": 3})
+    state = {}
+    assert scheduler.step(state, swap(400 * WEI), make_ctx(volume=10, seq=1), 0.0) is None
+    child = scheduler.step(state, swap(400 * WEI), make_ctx(volume=30, seq=2), 1.0)
+    assert child.amount_in == 20 * WEI   # 0.5 * (10 + 30)
+    scheduler.sent(state, child, 1.0)
+
+    # Never executed: written off after child_timeout, amount back to the parent
+    scheduler.reconcile(state, (AGENT, 20 * WEI, True, False, False), AGENT, 40.0)
+    parent = state["execution"]["parent"]
+    assert parent["pending"] == 0 and parent["filled"] == 0
+    assert parent["last_child_status"] == "timeout"
+
+
+def test_ttl_cancels_residual_while_agent_is_disabled():
+    scheduler = ExecutionScheduler({"algo": "twap", "slices": 4, "interval": 10, "ttl": 60})
+    state = {}
+    first = scheduler.step(state, swap(350 * WEI), make_ctx(seq=1), 0.0)
+    scheduler.sent(state, first, 0.0)
+
+    # The vault executes the child and auto-revokes the agent: no decisions
+    # are taken any more, only reconcile() and expire()
+    executed = (AGENT, first.amount_in, True, True, True)
+    for now in (5.0, 30.0, 59.0):
+        scheduler.reconcile(state, executed, AGENT, now)
+        scheduler.expire(state, now)
+    parent = state["execution"]["parent"]
+    assert parent["status"] == "active" and parent["filled"] == first.amount_in
+
+    scheduler.expire(state, 60.0)
+    assert state["execution"]["parent"] is None
+    finished = state["execution"]["history"][-1]
+    assert finished["status"] == "expired" and finished["filled"] == str(first.amount_in)
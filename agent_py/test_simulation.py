@@ -0,0 +1,86 @@
+"""
+The simulated vault must follow the contract's request / approve /
+auto-revoke rules on the virtual clock, without ever really sleeping, and
+soak iterations must not pay for output nobody reads.
+"""
+import json
+import os
+import time
+
+import pytest
+
+import loop_agent
+from simulation import SimulatedRevert, VirtualClock, build_simulation, silence_prints
+
+WEI = 10 ** 18
+
+
+def send(sim, name, *args):
+    vault = sim.vault.functions
+    tx = getattr(vault, name)(*args).build_transaction({"from": sim.agent_account.address})
+    return sim.w3.eth.send_raw_transaction(sim.agent_account.sign_transaction(tx).raw_transaction)
+
+
+def test_virtual_sleep_advances_instantly():
+    clock = VirtualClock(start=1_000.0)
+    started = time.perf_counter()
+    clock.sleep(3600)
+    clock.sleep(-5)  # never goes back
+    assert time.perf_counter() - started < 0.1
+    assert clock.time() == 4_600.0
+    assert clock.utcnow().year == 1970
+
+
+def test_request_approve_revoke_then_request_exists():
+    sim = build_simulation(approval_delay=30.0, reenable_delay=60.0, start=0.0)
+    agent = sim.agent_account.address
+    vault = sim.vault.functions
+
+    receipt = sim.w3.eth.wait_for_transaction_receipt(send(sim, "requestExecution", 50 * WEI, True))
+    assert receipt["status"] == 1
+    assert vault.pendingRequest().call() == (agent.lower(), 50 * WEI, True, False, False)
+
+    # The simulated owner approves and executes once approval_delay has passed
+    sim.clock.sleep(29)
+    assert vault.pendingRequest().call()[4] is False
+    sim.clock.sleep(1)
+    assert vault.pendingRequest().call()[3:] == (True, True)
+    assert sim.vault.executed_requests == 1
+
+    # Auto-revoke: disabled with a zero cap until the owner re-enables
+    assert vault.agentConfigs(agent).call()[0] is False
+    with pytest.raises(SimulatedRevert, match="AGENT_DISABLED"):
+        send(sim, "requestExecution", 50 * WEI, True)
+    sim.clock.sleep(60)
+    assert vault.agentConfigs(agent).call()[::2] == (True, 100 * WEI)
+
+    # The executed request still occupies the slot
+    with pytest.raises(SimulatedRevert, match="REQUEST_EXISTS"):
+        send(sim, "requestExecution", 50 * WEI, True)
+
+
+def test_soak_skips_state_file_and_reuses_parsed_config(tmp_path, monkeypatch, capsys):
+    config = tmp_path / "agents.json"
+    config.write_text(json.dumps({"agents": [{"address": "0xa", "enabled": True}]}))
+    monkeypatch.setattr(loop_agent, "AGENTS_CONFIG_PATH", config)
+    monkeypatch.setattr(loop_agent, "_JSON_CACHE", {})
+    first = loop_agent.load_agents_config()
+    assert loop_agent.load_agents_config() is first
+
+    # An edit (new mtime) is picked up on the next iteration
+    config.write_text(json.dumps({"agents": [{"address": "0xa", "enabled": False}]}))
+    st = os.stat(config)
+    os.utime(config, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert loop_agent.load_agents_config()["agents"][0]["enabled"] is False
+
+    # No AGENT_STATE_FILE in a soak run: nothing encoded, nothing written, nothing printed
+    monkeypatch.setattr(loop_agent, "STATE_FILE", None)
+    monkeypatch.setattr(loop_agent, "PUBLISHER", None)
+    monkeypatch.setattr(loop_agent.json, "dumps", lambda *a, **k: pytest.fail("state encoded"))
+    snapshot = {"agent_sub_balance": 0, "agent_spent": 0, "vault_balance": 0}
+    with silence_prints("loop_agent"):
+        loop_agent.write_state("HOLD", "soak", snapshot, 0, 1, {}, "DRY_RUN")
+        loop_agent.find_agent_config({"agents": []}, "0xb")
+    assert capsys.readouterr().out == ""
+    assert "print" not in vars(loop_agent)
+    assert list(tmp_path.iterdir()) == [config]
@@ -0,0 +1,200 @@
+"""
+The status push channel must fan out state deltas and logs from one buffer
+and resume (or resnapshot) reconnecting clients.
+"""
+import asyncio
+import json
+import os
+import stat
+
+import pytest
+
+import state_push
+
+from state_push import EventHub, SocketPublisher, StatePublisher, format_sse, serve_bus, state_delta
+
+
+def collect(hub, last_seq, count, agent=None):
+    async def run():
+        events = []
+        async for event in hub.subscribe(last_seq, heartbeat=0.05, agent=agent):
+            events.append(event)
+            if len(events) == count:
+                return events
+    return asyncio.run(asyncio.wait_for(run(), 2))
+
+
+def test_delta_is_top_level():
+    assert state_delta({"a": 1, "b": {"x": 1}}, {"a": 1, "b": {"x": 2}, "c": 3}) == {
+        "changed": {"b": {"x": 2}, "c": 3}, "removed": []}
+    assert state_delta({"a": 1}, {"a": 1}) is None
+
+
+def test_snapshot_then_resume_from_last_event_id():
+    hub = EventHub(buffer_size=4)
+    hub.publish_state({"status": "running", "loop_count": 1})
+    hub.publish_log({"level": "INFO", "msg": "Iteration 1 HOLD"})
+    assert hub.publish_state({"status": "running", "loop_count": 1}) is None  # unchanged
+
+    (seq, kind, data), = collect(hub, None, 1)
+    assert (seq, kind) == (2, "snapshot")
+    assert data["states"][""]["loop_count"] == 1 and len(data["logs"]) == 1
+
+    hub.publish_state({"status": "running", "loop_count": 2})
+    (seq, kind, data), = collect(hub, 2, 1)
+    assert (seq, kind, data) == (3, "delta", {"changed": {"loop_count": 2}, "removed": [], "agent": ""})
+
+    # Fell out of the 4-event buffer: snapshot again
+    for i in range(3, 8):
+        hub.publish_state({"status": "running", "loop_count": i})
+    assert collect(hub, 1, 1)[0][1] == "snapshot"
+    assert "id: 3\nevent: delta\n" in format_sse((3, "delta", {}))
+
+
+def test_agents_keep_separate_states():
+    hub = EventHub()
+    a = {"agent": {"address": "0xAAA"}, "status": "AWAITING_APPROVAL", "intent": {"amount_in": "5"}}
+    b = {"agent": {"address": "0xBBB"}, "status": "running"}
+    hub.publish_state(a)
+    hub.publish_state(b)
+    # Publishing in turn only changes what changed for that agent
+    assert hub.publish_state(dict(a)) is None
+    seq = hub.publish_state(dict(b, status="idle"))
+    assert hub.events[-1] == (seq, "delta", {"changed": {"status": "idle"}, "removed": [], "agent": "0xbbb"})
+
+    assert hub.states["0xaaa"] == a and hub.state_json("0xAAA")[0] == 1
+    assert hub.state_json("0xbbb")[0] == seq and hub.state_json("0xccc") is None
+
+    # One agent's stream: its snapshot, then only its deltas (and logs)
+    (_, kind, data), = collect(hub, None, 1, agent="0xAAA")
+    assert kind == "snapshot" and data["states"] == {"0xaaa": a}
+    hub.publish_state(dict(b, status="running"))
+    hub.publish_log({"msg": "b"})
+    hub.publish_state(dict(a, status="running"))
+    events = collect(hub, seq, 2, agent="0xaaa")
+    assert [kind for _, kind, _ in events] == ["log", "delta"]
+    assert events[1][2]["agent"] == "0xaaa"
+
+
+def test_waiting_client_is_woken_by_publish():
+    hub = EventHub()
+
+    async def run():
+        task = asyncio.create_task(anext_event(hub))
+        await asyncio.sleep(0.01)
+        hub.publish_log({"msg": "pushed"})
+        return await asyncio.wait_for(task, 1)
+
+    async def anext_event(hub):
+        async for event in hub.subscribe(0, heartbeat=5):
+            return event
+
+    assert asyncio.run(run()) == (1, "log", {"msg": "pushed"})
+
+
+def test_publisher_drops_while_server_is_down():
+    publisher = StatePublisher("http://127.0.0.1:9", timeout=0.2, retry_after=60)
+    publisher.publish_state(json.dumps({"loop_count": 1}))
+    publisher.publish_log({"msg": "x"})
+    publisher.close()
+    assert publisher.sent == 0 and publisher.dropped == 2
+
+
+def test_socket_bus_delivers_in_order_and_skips_replays(tmp_path):
+    path = str(tmp_path / "bus.sock")
+    hub = EventHub()
+
+    def publish():
+        publisher = SocketPublisher(path, retry_after=60)
+        publisher.publish_state(json.dumps({"loop_count": 1}))
+        publisher.publish_log({"msg": "Iteration 1 HOLD"})
+        publisher.publish_state({"loop_count": 2})
+        publisher.close()
+        return publisher
+
+    async def run():
+        server = await serve_bus(hub, path)
+        publisher = await asyncio.get_running_loop().run_in_executor(None, publish)
+        for _ in range(100):
+            if hub.seq == 3:
+                break
+            await asyncio.sleep(0.01)
+        server.close()
+        await server.wait_closed()
+        return publisher
+
+    publisher = asyncio.run(run())
+    assert publisher.sent == 3 and publisher.dropped == 0
+    assert hub.states == {"": {"loop_count": 2}} and list(hub.logs) == [{"msg": "Iteration 1 HOLD"}]
+    assert hub.state_json("") == (3, b'{"loop_count":2}')
+
+    # A replayed record is skipped; a jump forward is counted as a gap
+    session = publisher.session
+    hub.ingest({"session": session, "events": [{"seq": 3, "kind": "state", "data": {"loop_count": 9}}]})
+    hub.ingest({"session": session, "events": [{"seq": 6, "kind": "state", "data": {"loop_count": 4}}]})
+    assert hub.states[""] == {"loop_count": 4} and hub.gaps == 2
+
+
+def test_http_publisher_sends_token(monkeypatch):
+    import io
+    import urllib.request
+    sent = []
+
+    def urlopen(request, timeout):
+        sent.append(request)
+        return io.BytesIO(b'{"seq": 1}')
+
+    monkeypatch.setattr(urllib.request, "urlopen", urlopen)
+    publisher = StatePublisher("http://status:8000", token="s3cret")
+    publisher.publish_state({"loop_count": 1})
+    publisher.close()
+    assert publisher.sent == 1
+    assert sent[0].get_header("X-status-token") == "s3cret"
+    assert sent[0].get_header("Content-type") == "application/json"
+    assert json.loads(sent[0].data)["events"][0]["data"] == {"loop_count": 1}
+
+
+def test_bus_socket_is_private_and_never_replaces_foreign_paths(tmp_path, monkeypatch):
+    # Default path: a fresh 0700 per-user directory, socket 0600
+    default = str(tmp_path / "run" / "state.sock")
+    monkeypatch.setattr(state_push, "DEFAULT_BUS_SOCKET", default)
+
+    async def start(path):
+        server = await serve_bus(EventHub(), path)
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(start(default))
+    assert stat.S_IMODE(os.stat(tmp_path / "run").st_mode) == 0o700
+    assert stat.S_IMODE(os.lstat(default).st_mode) == 0o600
+    asyncio.run(start(default))  # a stale socket of ours is replaced
+
+    # Not a socket: left alone
+    regular = tmp_path / "bus.sock"
+    regular.write_text("keep")
+    with pytest.raises(FileExistsError):
+        asyncio.run(start(str(regular)))
+    assert regular.read_text() == "keep"
+
+    # Owned by another user: neither replaced by the server nor used by publishers
+    hub = EventHub()
+
+    def publish():
+        publisher = SocketPublisher(default, retry_after=60)
+        publisher.publish_log({"msg": "x"})
+        publisher.close()
+        return publisher
+
+    async def run():
+        server = await serve_bus(hub, default)
+        real_uid = os.getuid()
+        monkeypatch.setattr(os, "getuid", lambda: real_uid + 1)
+        with pytest.raises(PermissionError):
+            await serve_bus(EventHub(), default)
+        publisher = await asyncio.get_running_loop().run_in_executor(None, publish)
+        server.close()
+        await server.wait_closed()
+        return publisher
+
+    publisher = asyncio.run(run())
+    assert publisher.sent == 0 and publisher.dropped == 1 and hub.seq == 0
@@ -0,0 +1,76 @@
+"""
+The write endpoints of status_server must only accept the shared-secret
+holder's JSON batches, never a browser's cross-origin simple request.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+import status_server
+from state_push import EventHub
+
+TOKEN = "s3cret"
+BATCH = {"session": "s1", "events": [
+    {"seq": 1, "kind": "state", "data": {"status": "running", "agent": {"address": "0xA"}}}]}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(status_server, "PUSH_TOKEN", TOKEN)
+    monkeypatch.setattr(status_server, "HUB", EventHub())
+    return TestClient(status_server.app)
+
+
+def test_publish_requires_token_and_json(client, monkeypatch):
+    assert client.post("/publish", json=BATCH).status_code == 403
+    assert client.post("/publish", json=BATCH, headers={"X-Status-Token": "nope"}).status_code == 403
+    # A text/plain simple request (no CORS preflight) is refused even with the token
+    response = client.post("/publish", content=b'{"events": []}',
+                           headers={"X-Status-Token": TOKEN, "Content-Type": "text/plain"})
+    assert response.status_code == 415
+    assert status_server.HUB.seq == 0
+
+    response = client.post("/publish", json=BATCH, headers={"X-Status-Token": TOKEN})
+    assert response.status_code == 200 and response.json() == {"seq": 1}
+
+    # No token configured: the endpoint is closed
+    monkeypatch.setattr(status_server, "PUSH_TOKEN", "")
+    assert client.post("/publish", json=BATCH, headers={"X-Status-Token": ""}).status_code == 403
+
+
+@pytest.mark.parametrize("body", [
+    [1, 2], {"events": {"seq": 1}}, {"events": [{"seq": 1, "kind": "state"}]},
+    {"events": [{"seq": "1", "kind": "log", "data": {}}]}, {"events": [{"kind": "state", "data": []}]},
+])
+def test_malformed_batch_is_400(client, body):
+    response = client.post("/publish", json=body, headers={"X-Status-Token": TOKEN})
+    assert response.status_code == 400
+    assert client.post("/publish", content=b"{", headers={
+        "X-Status-Token": TOKEN, "Content-Type": "application/json"}).status_code == 400
+
+
+def test_profile_requires_token_and_post_is_not_cross_origin(client, tmp_path, monkeypatch):
+    import profiler
+    monkeypatch.setattr(profiler, "PROFILE_TRIGGER", tmp_path / "profile.trigger")
+    assert client.post("/profile?iterations=5").status_code == 403
+    assert not profiler.PROFILE_TRIGGER.exists()
+    assert client.post("/profile?iterations=5", headers={"X-Status-Token": TOKEN}).status_code == 200
+    assert profiler.PROFILE_TRIGGER.exists()
+
+    preflight = client.options("/publish", headers={
+        "Origin": "http://evil.example", "Access-Control-Request-Method": "POST",
+        "Access-Control-Request-Headers": "x-status-token"})
+    assert preflight.status_code == 400
+    assert "POST" not in preflight.headers.get("access-control-allow-methods", "")
+
+
+def test_state_is_served_per_agent(client):
+    for address, status in [("0xAAA", "AWAITING_APPROVAL"), ("0xBBB", "running")]:
+        client.post("/publish", headers={"X-Status-Token": TOKEN}, json={"session": address, "events": [
+            {"seq": 1, "kind": "state", "data": {"status": status, "agent": {"address": address}}}]})
+
+    response = client.get("/state/0xaaa")
+    assert response.json()["status"] == "AWAITING_APPROVAL" and response.headers["etag"] == '"1"'
+    assert client.get("/state/0xAAA", headers={"If-None-Match": '"1"'}).status_code == 304
+    assert client.get("/state/0xBBB").json()["status"] == "running"
+    assert client.get("/state/0xccc").status_code == 404
+    assert set(client.get("/state").json()) == {"0xaaa", "0xbbb"}
@@ -0,0 +1,49 @@
+"""
+Sweep results must match single backtests of the same parameters.
+"""
+from backtest import VaultModel, WEI, load_columns, run_backtest, simulate_columns
+from strategies import build_policy
+from sweep import TPESearch, grid_search, run_sweep
+from test_backtest import add_depth
+from tickgen import run_record
+
+
+def test_grid_sweep_matches_backtest(tmp_path):
+    ticks = tmp_path / "ticks.jsonl"
+    run_record(ticks, 5000, rate=10, seed=3)
+    space = {"threshold": [0.002, 0.004, 0.008]}
+
+    results = run_sweep("arb", ticks, space, workers=2, approval_delay=30.0, fee_bps=30)
+    assert len(results) == 3
+    assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+
+    columns = load_columns(ticks)
+    for params in grid_search(space):
+        vault = VaultModel(150 * WEI, 100 * WEI, 30.0, 30)
+        expected = simulate_columns(build_policy("arb", params), columns, vault, 100 * WEI, 50)
+        swept = next(r for r in results if r["params"] == params)
+        assert swept["pnl"] == expected["pnl"]
+        assert swept["max_drawdown"] == expected["max_drawdown"]
+        assert swept["executed"] == expected["executed"]
+
+
+def test_depth_sweep_matches_stream_backtest(tmp_path):
+    plain, ticks = tmp_path / "plain.jsonl", tmp_path / "depth.jsonl"
+    run_record(plain, 3000, rate=10, seed=3)
+    add_depth(plain, ticks, seed=3)
+    space = {"target_price": [0.999, 1.0]}
+
+    for swept in run_sweep("sniper", ticks, space, workers=2, approval_delay=30.0):
+        expected = run_backtest("sniper", swept["params"], ticks, approval_delay=30.0, engine="stream")
+        assert (swept["executed"], swept["turnover"], swept["pnl"]) == (
+            expected["executed"], expected["turnover"], expected["pnl"])
+
+
+def test_tpe_treats_degenerate_ranges_as_constants():
+    space = {"threshold": {"loguniform": [0.004, 0.004]}, "size": {"int": [5, 5]},
+             "bias": {"uniform": [0.0, 1.0]}}
+    tpe = TPESearch(space, seed=1, startup=4)
+    for _ in range(3):
+        for params in tpe.ask(4):
+            assert params["threshold"] == 0.004 and params["size"] == 5
+            tpe.tell(params, -abs(params["bias"] - 0.3))
@@ -0,0 +1,39 @@
+"""
+The in-process load test must account for every tick and report decide()
+failures by type instead of folding them into a bare count.
+"""
+from strategies import SwapIntent
+from strategies.base import BasePolicy
+from strategies.registry import STRATEGY_REGISTRY
+from tickgen import TickGenerator, run_inproc
+
+
+class Flaky(BasePolicy):
+    """Raises on every third tick."""
+
+    def __init__(self, params=None):
+        super().__init__(name="flaky", params=params)
+
+    def decide(self, ctx):
+        if ctx["signal"]["seq"] % 3 == 0:
+            raise ValueError(f"bad tick {ctx['signal']['seq'] % 2}")
+        return SwapIntent.hold("flaky:ok")
+
+
+def test_inproc_reports_errors(monkeypatch):
+    monkeypatch.setitem(STRATEGY_REGISTRY, "flaky", Flaky)
+    result = run_inproc("flaky", {}, rate=2000, duration=0.3, seed=1)
+
+    assert result["produced"] == 600
+    assert result["processed"] + result["dropped"] == result["produced"]
+    assert result["errors"] == sum(result["error_types"].values()) == result["processed"] // 3
+    assert set(result["error_types"]) == {"ValueError: bad tick 0", "ValueError: bad tick 1"}
+    assert result["actions"] == {"HOLD": result["processed"] - result["errors"]}
+
+
+def test_generator_is_reproducible():
+    first = [tick["best_ask"] for _, tick in zip(range(100), TickGenerator(seed=5))]
+    second = [tick["best_ask"] for _, tick in zip(range(100), TickGenerator(seed=5))]
+    assert first == second
+    tick = TickGenerator(seed=5).next_tick()
+    assert tick["best_bid"] <= tick["best_ask"] and tick["seq"] == 1
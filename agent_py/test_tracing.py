@@ -0,0 +1,72 @@
+"""
+Traced iterations must come out as nested Chrome trace "complete" events in
+a loadable JSON array; untraced code must get the shared no-op span.
+"""
+import json
+
+import tracing
+from tracing import Tracer
+
+
+def read_events(path):
+    events = json.loads(path.read_text())
+    return [e for e in events if e["ph"] == "X"], events
+
+
+def test_nested_spans_in_chrome_trace_format(tmp_path):
+    path = tmp_path / "trace.json"
+    tracer = Tracer(path)
+    tracer.begin_iteration(1)
+    with tracer.span("snapshot"):
+        with tracer.span("rpc.call", {"fn": "agentBalances"}) as inner:
+            inner.set(result=1)
+    tracer.close()
+
+    spans, events = read_events(path)
+    assert events[0]["ph"] == "M" and events[-1]["name"] == "trace_end"
+    by_name = {e["name"]: e for e in spans}
+    assert set(by_name) == {"snapshot", "rpc.call", "iteration"}
+    for event in spans:
+        assert event["cat"] == "agent" and event["dur"] >= 0
+        assert {"ts", "pid", "tid", "args"} <= set(event)
+
+    # Children lie within their parents
+    outer, inner, iteration = by_name["snapshot"], by_name["rpc.call"], by_name["iteration"]
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert iteration["ts"] <= outer["ts"] and outer["ts"] + outer["dur"] <= iteration["ts"] + iteration["dur"]
+    assert inner["args"] == {"fn": "agentBalances", "result": 1}
+    assert iteration["args"] == {"iteration": 1, "slow": False}
+
+
+def test_errors_are_recorded_and_unsampled_iterations_dropped(tmp_path):
+    path = tmp_path / "trace.json"
+    tracer = Tracer(path, sample_rate=0.0, slow_ms=60_000)
+    tracer.begin_iteration(1)
+    try:
+        with tracer.span("tx.sign"):
+            raise ValueError("bad key")
+    except ValueError:
+        pass
+    tracer.end_iteration()
+    tracer.begin_iteration(2)
+    with tracer.span("fast"):
+        pass
+    tracer.close()
+    # Neither iteration was sampled nor slow
+    assert not path.exists()
+
+    tracer = Tracer(path)
+    tracer.begin_iteration(3)
+    try:
+        with tracer.span("tx.sign"):
+            raise ValueError("bad key")
+    except ValueError:
+        pass
+    tracer.close()
+    spans, _ = read_events(path)
+    assert spans[0]["args"]["error"] == "ValueError: bad key"
+
+
+def test_disabled_tracer_returns_shared_null_span():
+    assert tracing.TRACER.enabled is False
+    assert tracing.span("anything") is tracing.span("else") is tracing._NULL_SPAN
@@ -0,0 +1,42 @@
+"""
+Cold-start helpers: the ABI cache must track its artifact, and importing
+the agent must not import web3.
+"""
+import json
+import os
+import subprocess
+import sys
+
+from utils import _cached_abi
+
+ABI = [{"type": "function", "name": "pendingRequest", "inputs": [], "outputs": []}]
+
+
+def write_artifact(path, abi, bytecode="0x6080"):
+    path.write_text(json.dumps({"contractName": "Vault", "abi": abi, "bytecode": bytecode}))
+
+
+def test_abi_cache_strips_and_tracks_artifact(tmp_path):
+    artifact, cache = tmp_path / "Vault.json", tmp_path / "cache" / "Vault.json"
+    write_artifact(artifact, ABI)
+
+    assert _cached_abi(artifact, cache) == ABI
+    cached = json.loads(cache.read_text())
+    assert set(cached) == {"sha256", "stat", "abi"}  # no bytecode
+
+    # Same bytes, new mtime: re-hashed, still served from the cache
+    os.utime(artifact, ns=(1, 1))
+    assert _cached_abi(artifact, cache) == ABI
+    assert json.loads(cache.read_text())["sha256"] == cached["sha256"]
+
+    # Recompiled artifact: new hash, new ABI
+    new_abi = ABI + [{"type": "event", "name": "Swap", "inputs": []}]
+    write_artifact(artifact, new_abi, bytecode="0x60806040")
+    assert _cached_abi(artifact, cache) == new_abi
+
+
+def test_agent_import_does_not_load_web3():
+    code = "import sys, loop_agent; print('web3' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert out.stdout.strip().splitlines()[-1] == "False"
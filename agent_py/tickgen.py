@@ -0,0 +1,390 @@
+"""
+Synthetic market tick generator and end-to-end load test for strategies.
+
+Generates a quote stream whose bid/ask spread follows a regime-switching
+Ornstein-Uhlenbeck process with Poisson jumps, around a slowly drifting mid
+price. Ticks are emitted at a configurable rate and either:
+    - fed in-process to a registry strategy (mode "inproc"): a producer
+      thread enqueues ticks into a bounded queue, a consumer runs
+      policy.decide() exactly like loop_agent builds ctx, and ticks that
+      arrive while the queue is full are dropped. Per-tick latency
+      (enqueue -> decision) and decide() service time are recorded in
+      log-bucketed histograms; exceptions from decide() are counted by type
+      and message and reported.
+    - written to signals.json (mode "file") with an atomic rename, to drive
+      a running loop_agent.
+    - recorded unpaced to a .jsonl or .csv tick file (mode "record") for
+      backtest.py.
+
+Usage:
+    python tickgen.py --strategy sniper --rate 5000 --duration 10
+    python tickgen.py --strategy arb --params '{"threshold": 0.002}' --rate 20000
+    python tickgen.py --mode file --rate 2 --duration 600
+    python tickgen.py --mode record --count 1000000 --rate 10 --out ticks.jsonl
+"""
+import argparse
+import json
+import math
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+SIGNALS_PATH = Path(__file__).resolve().parent / "signals.json"
+
+WEI = 10 ** 18
+
+# Default regimes: (name, long-run spread mu, mean reversion theta, volatility sigma)
+DEFAULT_REGIMES = (
+    ("calm", 0.001, 5.0, 0.002),
+    ("volatile", 0.004, 2.0, 0.010),
+    ("dislocated", 0.015, 0.5, 0.020),
+)
+
+
+class TickGenerator:
+    """
+    Regime-switching OU spread process with jumps.
+
+    The spread s (relative to mid) evolves per tick of length dt as
+        s += theta * (mu - s) * dt + sigma * sqrt(dt) * N(0, 1) + jump
+    where (mu, theta, sigma) come from the current regime, jumps arrive with
+    probability jump_rate * dt and regimes switch with probability
+    switch_rate * dt. The mid price follows a driftless random walk.
+    """
+
+    def __init__(self, rate=1000.0, seed=None, mid=1.0, mid_vol=0.0005,
+                 regimes=DEFAULT_REGIMES, switch_rate=0.05, jump_rate=0.2,
+                 jump_scale=0.005, source="tickgen"):
+        """
+        Initialize generator.
+
+        Args:
+            rate: Ticks per second (sets dt = 1 / rate)
+            seed: Random seed for reproducible streams
+            mid: Initial mid price
+            mid_vol: Mid price volatility per sqrt(second)
+            regimes: Sequence of (name, mu, theta, sigma)
+            switch_rate: Expected regime switches per second
+            jump_rate: Expected spread jumps per second
+            jump_scale: Std-dev of a spread jump
+            source: Value of the "source" field in each tick
+        """
+        self.dt = 1.0 / rate
+        self.rng = random.Random(seed)
+        self.mid = mid
+        self.mid_vol = mid_vol
+        self.regimes = list(regimes)
+        self.switch_rate = switch_rate
+        self.jump_rate = jump_rate
+        self.jump_scale = jump_scale
+        self.source = source
+
+        self.regime = 0
+        self.spread = self.regimes[0][1]
+        self.seq = 0
+        self.t = time.time()
+
+    def next_tick(self):
+        """Advance the process by one tick and return a signal dict."""
+        rng = self.rng
+        dt = self.dt
+        sqrt_dt = math.sqrt(dt)
+
+        if rng.random() < self.switch_rate * dt:
+            self.regime = rng.randrange(len(self.regimes))
+        _, mu, theta, sigma = self.regimes[self.regime]
+
+        s = self.spread + theta * (mu - self.spread) * dt + sigma * sqrt_dt * rng.gauss(0.0, 1.0)
+        if rng.random() < self.jump_rate * dt:
+            s += rng.gauss(0.0, self.jump_scale)
+        self.spread = max(s, 0.0)
+
+        self.mid *= 1.0 + self.mid_vol * sqrt_dt * rng.gauss(0.0, 1.0)
+        half = self.mid * self.spread / 2.0
+        self.seq += 1
+        self.t += dt
+
+        bid = self.mid - half
+        ask = self.mid + half
+        return {
+            "best_bid": bid,
+            "best_ask": ask,
+            "spread": ask - bid,
+            "timestamp": datetime.fromtimestamp(self.t, tz=timezone.utc).isoformat().replace("+00:00", "Z"),
+            "source": self.source,
+            "seq": self.seq,
+            "regime": self.regimes[self.regime][0],
+        }
+
+    def __iter__(self):
+        while True:
+            yield self.next_tick()
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (~5% relative precision)."""
+
+    BASE = 1.05
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.max_us = 0.0
+        self._log_base = math.log(self.BASE)
+
+    def record(self, seconds):
+        us = seconds * 1e6
+        bucket = int(math.log(us) / self._log_base) if us >= 1.0 else 0
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+        if us > self.max_us:
+            self.max_us = us
+
+    def percentile(self, p):
+        """Approximate p-th percentile in microseconds (upper bucket bound)."""
+        if not self.total:
+            return 0.0
+        rank = p / 100.0 * self.total
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self.BASE ** (bucket + 1), self.max_us)
+        return self.max_us
+
+    def summary(self):
+        return {
+            "count": self.total,
+            "p50_us": round(self.percentile(50), 1),
+            "p90_us": round(self.percentile(90), 1),
+            "p99_us": round(self.percentile(99), 1),
+            "p999_us": round(self.percentile(99.9), 1),
+            "max_us": round(self.max_us, 1),
+        }
+
+
+def make_ctx(signal, strategy_state, cap_tokens=100, sub_balance_tokens=150, slippage_bps=50):
+    """Build a decide() context the way loop_agent.main does."""
+    cap_wei = int(cap_tokens * WEI)
+    return {
+        "signal": signal,
+        "sub_balance_wei": int(sub_balance_tokens * WEI),
+        "max_per_trade_wei": cap_wei,
+        "default_amount_in_wei": cap_wei,
+        "cap_wei": cap_wei,
+        "slippage_bps": slippage_bps,
+        "agent_address": "0x3C44CdDdB6a900fa2b585dd299e03d12FA4293BC",
+        "user_address": "0x70997970C51812dc3A010C7d01b50e0d17dc79C8",
+        "strategy_state": strategy_state,
+    }
+
+
+def _paced(generator, rate, duration, stop):
+    """Yield ticks on an absolute schedule (no drift from sleep jitter)."""
+    start = time.perf_counter()
+    total = int(rate * duration)
+    for i in range(total):
+        if stop.is_set():
+            return
+        due = start + i / rate
+        delay = due - time.perf_counter()
+        if delay > 0.0005:
+            time.sleep(delay)
+        yield generator.next_tick()
+
+
+def run_inproc(strategy, params, rate, duration, queue_size=1024, seed=None):
+    """
+    Feed ticks to a strategy in-process and measure latency and drops.
+
+    Args:
+        strategy: Registry strategy name
+        params: strategyParams dict
+        rate: Ticks per second
+        duration: Seconds to run
+        queue_size: Bounded queue size between producer and consumer
+        seed: Random seed
+
+    Returns:
+        dict: Load test results
+    """
+    from strategies import build_policy, IndicatorEngine
+
+    policy = build_policy(strategy, params)
+    if policy is None:
+        raise ValueError(f"Unknown strategy '{strategy}'")
+
+    ticks = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    produced = [0]
+    dropped = [0]
+    generator = TickGenerator(rate=rate, seed=seed)
+
+    def produce():
+        try:
+            for tick in _paced(generator, rate, duration, stop):
+                produced[0] += 1
+                try:
+                    ticks.put_nowait((time.perf_counter(), tick))
+                except queue.Full:
+                    dropped[0] += 1
+        finally:
+            # The consumer must wake up even if the generator failed
+            ticks.put(None)
+
+    latency = LatencyHistogram()
+    service = LatencyHistogram()
+    actions = {}
+    errors = {}  # "Type: message" -> count
+    strategy_state = {}
+    engine = IndicatorEngine() if policy.features else None
+
+    producer = threading.Thread(target=produce, name="tickgen", daemon=True)
+    wall_start = time.perf_counter()
+    producer.start()
+    try:
+        while True:
+            item = ticks.get()
+            if item is None:
+                break
+            enqueued, tick = item
+            started = time.perf_counter()
+            try:
+                ctx = make_ctx(tick, strategy_state)
+                if engine is not None:
+                    ctx["features"] = engine.compute((policy,), tick)[0]
+                intent = policy.decide(ctx)
+                actions[intent.action] = actions.get(intent.action, 0) + 1
+            except Exception as e:
+                key = f"{type(e).__name__}: {str(e)[:100]}"
+                errors[key] = errors.get(key, 0) + 1
+            done = time.perf_counter()
+            service.record(done - started)
+            latency.record(done - enqueued)
+    finally:
+        stop.set()
+        producer.join()
+    wall = time.perf_counter() - wall_start
+
+    processed = latency.total
+    return {
+        "strategy": strategy,
+        "params": params,
+        "target_rate": rate,
+        "duration_s": round(wall, 3),
+        "produced": produced[0],
+        "processed": processed,
+        "dropped": dropped[0],
+        "drop_ratio": round(dropped[0] / produced[0], 6) if produced[0] else 0.0,
+        "achieved_rate": round(processed / wall, 1) if wall else 0.0,
+        "actions": actions,
+        "errors": sum(errors.values()),
+        "error_types": errors,
+        "latency": latency.summary(),
+        "decide": service.summary(),
+    }
+
+
+def run_file(path, rate, duration, seed=None):
+    """
+    Write ticks to a signals.json file for a running loop_agent.
+
+    Args:
+        path: Signals file path
+        rate: Ticks per second
+        duration: Seconds to run
+
+    Returns:
+        dict: Number of ticks written and achieved rate
+    """
+    path = Path(path)
+    tmp_path = path.with_suffix(".json.tmp")
+    stop = threading.Event()
+    written = 0
+    start = time.perf_counter()
+    for tick in _paced(TickGenerator(rate=rate, seed=seed), rate, duration, stop):
+        with open(tmp_path, "w") as f:
+            json.dump(tick, f, indent=2)
+        tmp_path.replace(path)
+        written += 1
+    wall = time.perf_counter() - start
+    return {"path": str(path), "written": written, "achieved_rate": round(written / wall, 1) if wall else 0.0}
+
+
+CSV_FIELDS = ("timestamp", "best_bid", "best_ask", "spread", "source", "seq", "regime")
+
+
+def run_record(path, count, rate, seed=None):
+    """
+    Write ticks to a .jsonl or .csv file as fast as they are generated.
+
+    Args:
+        path: Output path (.csv for CSV, anything else for JSON lines)
+        count: Number of ticks
+        rate: Ticks per second of simulated time (tick timestamps)
+        seed: Random seed
+
+    Returns:
+        dict: Number of ticks written
+    """
+    path = Path(path)
+    generator = TickGenerator(rate=rate, seed=seed)
+    with open(path, "w") as f:
+        if path.suffix == ".csv":
+            f.write(",".join(CSV_FIELDS) + "\n")
+            for _ in range(count):
+                tick = generator.next_tick()
+                f.write(",".join(str(tick[field]) for field in CSV_FIELDS) + "\n")
+        else:
+            for _ in range(count):
+                f.write(json.dumps(generator.next_tick(), separators=(",", ":")) + "\n")
+    return {"path": str(path), "written": count}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--mode", choices=("inproc", "file", "record"), default="inproc")
+    parser.add_argument("--strategy", default="sniper", help="registry strategy name (inproc mode)")
+    parser.add_argument("--params", default="{}", help="strategyParams as JSON")
+    parser.add_argument("--rate", type=float, default=1000.0, help="ticks per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--queue", type=int, default=1024, help="bounded queue size (inproc mode)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--signals", default=str(SIGNALS_PATH), help="signals file (file mode)")
+    parser.add_argument("--count", type=int, default=100000, help="ticks to write (record mode)")
+    parser.add_argument("--out", default="ticks.jsonl", help=".jsonl or .csv tick file (record mode)")
+    parser.add_argument("--json", dest="json_out", help="also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.mode == "inproc":
+        result = run_inproc(args.strategy, json.loads(args.params), args.rate,
+                            args.duration, args.queue, args.seed)
+        print(f"=== Load test: {result['strategy']} @ {args.rate:.0f} ticks/s ===")
+        print(f"Produced: {result['produced']}  Processed: {result['processed']}  "
+              f"Dropped: {result['dropped']} ({result['drop_ratio'] * 100:.2f}%)")
+        print(f"Achieved: {result['achieved_rate']:.0f} decisions/s  Actions: {result['actions']}  "
+              f"Errors: {result['errors']}")
+        for label, key in (("Tick latency", "latency"), ("decide()", "decide")):
+            h = result[key]
+            print(f"{label:<13} p50={h['p50_us']}us p90={h['p90_us']}us p99={h['p99_us']}us "
+                  f"p99.9={h['p999_us']}us max={h['max_us']}us")
+        for error, count in sorted(result["error_types"].items(), key=lambda item: -item[1]):
+            print(f"  [Warning: decide() raised {count}x {error}]")
+    elif args.mode == "record":
+        result = run_record(args.out, args.count, args.rate, args.seed)
+        print(f"Wrote {result['written']} ticks to {result['path']}")
+    else:
+        result = run_file(args.signals, args.rate, args.duration, args.seed)
+        print(f"Wrote {result['written']} ticks to {result['path']} ({result['achieved_rate']}/s)")
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,321 @@
+"""
+Opt-in iteration tracer for loop_agent (Chrome / Perfetto trace format).
+
+Records nested spans (snapshot RPCs, strategy decide, signing, RPC send,
+state write) for each loop iteration and writes them as Chrome trace
+"complete" events. Open the output in chrome://tracing or ui.perfetto.dev.
+
+Tracing is disabled unless TRACE_FILE is set. When disabled (or when the
+current iteration is not sampled) span() returns a shared no-op object, so
+instrumented code pays one attribute check per span.
+
+Environment:
+    TRACE_FILE: Output path for the trace JSON (unset = tracing disabled)
+    TRACE_SAMPLE_RATE: Fraction of iterations to write (default: 1.0)
+    TRACE_SLOW_MS: Always write iterations slower than this (default: off)
+    TRACE_MAX_BYTES: Rotate the trace file past this size (default: 50 MB)
+    TRACE_BACKUPS: Number of rotated trace files to keep (default: 3)
+"""
+import atexit
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+
+
+def _now_us():
+    """Monotonic timestamp in microseconds (Chrome trace time unit)."""
+    return time.perf_counter_ns() // 1000
+
+
+class _NullSpan:
+    """Shared no-op span returned when tracing is inactive."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """A single timed span, recorded on exit."""
+
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = _now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = _now_us()
+        if exc_type is not None:
+            self.args["error"] = f"{exc_type.__name__}: {str(exc)[:200]}"
+        self.tracer._record(self.name, self.start, end - self.start, self.args)
+        return False
+
+    def set(self, **args):
+        """Attach extra arguments to the span (shown in the trace viewer)."""
+        self.args.update(args)
+
+
+class _ObservedSpan:
+    """Span wrapper that also reports enter/exit to the phase listener."""
+
+    __slots__ = ("listener", "name", "inner")
+
+    def __init__(self, listener, name, inner):
+        self.listener = listener
+        self.name = name
+        self.inner = inner
+
+    def __enter__(self):
+        self.listener.on_enter(self.name)
+        self.inner.__enter__()
+        return self.inner
+
+    def __exit__(self, exc_type, exc, tb):
+        self.inner.__exit__(exc_type, exc, tb)
+        self.listener.on_exit(self.name)
+        return False
+
+
+class RotatingTraceWriter:
+    """
+    Append-only Chrome trace writer with size-based rotation.
+
+    Each file uses the JSON Array Format: "[" followed by one event per line.
+    Files are terminated with "]" on rotation/close; a file cut short by a
+    crash is still loadable, since trace viewers accept a missing "]".
+    """
+
+    def __init__(self, path, max_bytes=50 * 1024 * 1024, backups=3):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._fh = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.path, "w", encoding="utf-8")
+        self._fh.write("[\n")
+        meta = {
+            "name": "process_name",
+            "ph": "M",
+            "pid": os.getpid(),
+            "args": {"name": "loop_agent"},
+        }
+        self._fh.write(json.dumps(meta, separators=(",", ":")) + ",\n")
+
+    def _close_file(self):
+        if self._fh is None:
+            return
+        end = {
+            "name": "trace_end",
+            "ph": "i",
+            "s": "g",
+            "ts": _now_us(),
+            "pid": os.getpid(),
+            "tid": 0,
+        }
+        self._fh.write(json.dumps(end, separators=(",", ":")) + "\n]\n")
+        self._fh.close()
+        self._fh = None
+
+    def _rotate(self):
+        self._close_file()
+        for i in range(self.backups, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i - 1}") if i > 1 else self.path
+            dst = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                src.replace(dst)
+        if self.backups == 0 and self.path.exists():
+            self.path.unlink()
+
+    def write(self, events):
+        """Append a batch of trace events and rotate if the file is full."""
+        with self._lock:
+            if self._fh is None:
+                self._open()
+            for event in events:
+                self._fh.write(json.dumps(event, separators=(",", ":"), default=str))
+                self._fh.write(",\n")
+            self._fh.flush()
+            if self._fh.tell() >= self.max_bytes:
+                self._rotate()
+
+    def close(self):
+        """Terminate and close the current trace file."""
+        with self._lock:
+            self._close_file()
+
+
+class Tracer:
+    """
+    Per-iteration span recorder.
+
+    Spans are buffered for the current iteration and written in one batch
+    when the iteration ends, if the iteration was sampled or ran slower
+    than slow_ms.
+    """
+
+    def __init__(self, path=None, sample_rate=1.0, slow_ms=None,
+                 max_bytes=50 * 1024 * 1024, backups=3):
+        """
+        Initialize tracer.
+
+        Args:
+            path: Trace output path (None = disabled)
+            sample_rate: Fraction of iterations to write (0.0 - 1.0)
+            slow_ms: Always write iterations slower than this (None = off)
+            max_bytes: Rotate the trace file past this size
+            backups: Number of rotated trace files to keep
+        """
+        self.enabled = path is not None
+        self.sample_rate = sample_rate
+        self.slow_us = slow_ms * 1000 if slow_ms is not None else None
+        self.writer = RotatingTraceWriter(path, max_bytes, backups) if self.enabled else None
+
+        # True while spans of the current iteration are being recorded
+        self.active = False
+        self._keep = False
+        self._iteration = None
+        self._iter_start = None
+        self._events = []
+        self._pid = os.getpid()
+
+    @classmethod
+    def from_env(cls):
+        """Build a tracer from TRACE_* environment variables."""
+        path = os.getenv("TRACE_FILE") or None
+        slow_ms = os.getenv("TRACE_SLOW_MS")
+        return cls(
+            path=path,
+            sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "1.0")),
+            slow_ms=float(slow_ms) if slow_ms else None,
+            max_bytes=int(os.getenv("TRACE_MAX_BYTES", str(50 * 1024 * 1024))),
+            backups=int(os.getenv("TRACE_BACKUPS", "3")),
+        )
+
+    def begin_iteration(self, iteration):
+        """Start recording spans for a loop iteration (closes any open one)."""
+        if not self.enabled:
+            return
+        if self._iter_start is not None:
+            self.end_iteration()
+
+        self._keep = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+        # Unsampled iterations are only recorded when slow capture is on
+        self.active = self._keep or self.slow_us is not None
+        if self.active:
+            self._iteration = iteration
+            self._iter_start = _now_us()
+
+    def end_iteration(self):
+        """Finish the current iteration and write its spans if kept."""
+        if self._iter_start is None:
+            return
+        end = _now_us()
+        dur = end - self._iter_start
+        slow = self.slow_us is not None and dur >= self.slow_us
+
+        if self._keep or slow:
+            self._record("iteration", self._iter_start, dur, {
+                "iteration": self._iteration,
+                "slow": slow,
+            })
+            self.writer.write(self._events)
+
+        self._events = []
+        self._iter_start = None
+        self.active = False
+
+    def _record(self, name, ts, dur, args):
+        self._events.append({
+            "name": name,
+            "cat": "agent",
+            "ph": "X",
+            "ts": ts,
+            "dur": dur,
+            "pid": self._pid,
+            "tid": threading.get_native_id(),
+            "args": args,
+        })
+
+    def span(self, name, args=None):
+        """Return a context manager timing `name` (no-op when inactive)."""
+        if not self.active:
+            return _NULL_SPAN
+        return _Span(self, name, args if args is not None else {})
+
+    def close(self):
+        """Flush any open iteration and close the trace file."""
+        if not self.enabled:
+            return
+        self.end_iteration()
+        self.writer.close()
+
+
+# Process-wide tracer used by span(); replaced by configure_from_env()
+TRACER = Tracer()
+
+# Optional observer notified on every span enter/exit (see profiler.py)
+_PHASE_LISTENER = None
+
+
+def configure_from_env():
+    """(Re)build the global tracer from the environment."""
+    global TRACER
+    TRACER.close()
+    TRACER = Tracer.from_env()
+    if TRACER.enabled:
+        atexit.register(TRACER.close)
+    return TRACER
+
+
+def set_phase_listener(listener):
+    """
+    Install (or clear with None) an observer of span boundaries.
+
+    The listener must provide on_enter(name) and on_exit(name); it is called
+    for every span, whether or not the current iteration is being traced.
+    """
+    global _PHASE_LISTENER
+    _PHASE_LISTENER = listener
+
+
+def span(name, **args):
+    """Time a block under the global tracer: `with span("rpc.send"): ...`."""
+    tracer = TRACER
+    if _PHASE_LISTENER is not None:
+        return _ObservedSpan(_PHASE_LISTENER, name, tracer.span(name, args))
+    if not tracer.active:
+        return _NULL_SPAN
+    return _Span(tracer, name, args)
+
+
+def begin_iteration(iteration):
+    """Start a traced loop iteration on the global tracer."""
+    TRACER.begin_iteration(iteration)
+
+
+def end_iteration():
+    """End the current traced loop iteration on the global tracer."""
+    TRACER.end_iteration()
@@ -1,14 +1,32 @@
 """
 Common utilities for Python agent demo.
+
+Importing this module is cheap: web3 and python-dotenv are imported on first
+use (web3 alone costs over a second of import time), so strategy-only tools
+never pay for them. Entry points call load_env() before reading settings and
+connect() once to get the deployment, web3 instance and vault together.
 """
+import hashlib
 import json
 import os
+from dataclasses import dataclass
 from pathlib import Path
-from web3 import Web3
-from dotenv import load_dotenv
+from typing import Any, Dict, Optional
+from amounts import parse_units, to_decimal
+
+# Stripped ABI-only copies of the Hardhat artifacts (see load_contract_abi)
+ABI_CACHE_DIR = Path(__file__).resolve().parent / ".abi_cache"
+
+_ENV_LOADED = False
 
-# Load environment variables
-load_dotenv()
+def load_env():
+    """Load .env into os.environ (once per process)."""
+    global _ENV_LOADED
+    if not _ENV_LOADED:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _ENV_LOADED = True
 
 def get_project_root():
     """Get project root directory (parent of agent_py)."""
@@ -27,21 +45,59 @@ def load_deployment_info():
     with open(deployment_path, 'r') as f:
         return json.load(f)
 
+def _cached_abi(artifact_path: Path, cache_path: Path):
+    """
+    ABI of a Hardhat artifact through an ABI-only cache file.
+
+    The cache records the artifact's sha256 and stat (size, mtime): a stat
+    match is trusted without reading the artifact, a stat change re-hashes
+    it, and only a new hash parses the full artifact (bytecode included).
+    """
+    stat = artifact_path.stat()
+    key = [stat.st_size, stat.st_mtime_ns]
+    cached = None
+    try:
+        with open(cache_path, 'r') as f:
+            cached = json.load(f)
+        if cached.get('stat') == key:
+            return cached['abi']
+    except (OSError, ValueError, KeyError):
+        cached = None
+
+    raw = artifact_path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    if cached and cached.get('sha256') == digest:
+        abi = cached['abi']
+    else:
+        abi = json.loads(raw)['abi']
+
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'sha256': digest, 'stat': key, 'abi': abi}, f)
+        tmp_path.replace(cache_path)
+    except OSError as e:
+        print(f"  [Warning: Failed to write ABI cache: {e}]")
+    return abi
+
 def load_contract_abi(contract_name):
-    """Load contract ABI from Hardhat artifacts."""
+    """Load contract ABI from Hardhat artifacts (via the ABI-only cache)."""
     artifact_path = get_project_root() / "artifacts" / "contracts" / f"{contract_name}.sol" / f"{contract_name}.json"
 
     if not artifact_path.exists():
         raise FileNotFoundError(f"Contract artifact not found: {artifact_path}")
 
-    with open(artifact_path, 'r') as f:
-        artifact = json.load(f)
-        return artifact['abi']
+    return _cached_abi(artifact_path, ABI_CACHE_DIR / f"{contract_name}.json")
 
-def create_web3_instance(rpc_url=None):
+def create_web3_instance(rpc_url=None, deployment=None):
     """Create Web3 instance connected to local node."""
+    from web3 import Web3
+
+    load_env()
     if rpc_url is None:
-        deployment = load_deployment_info()
+        if deployment is None:
+            deployment = load_deployment_info()
         rpc_url = os.getenv('RPC_URL', deployment.get('rpcUrl', 'http://127.0.0.1:8545'))
 
     w3 = Web3(Web3.HTTPProvider(rpc_url))
@@ -53,6 +109,7 @@ def create_web3_instance(rpc_url=None):
 
 def get_agent_account(w3):
     """Get agent account from private key in .env."""
+    load_env()
     private_key = os.getenv('AGENT_PRIVATE_KEY')
 
     if not private_key:
@@ -63,18 +120,36 @@ def get_agent_account(w3):
 
     return w3.eth.account.from_key(private_key)
 
-def get_vault_contract(w3):
+def get_vault_contract(w3, deployment=None):
     """Get SafeAgentVault contract instance."""
-    deployment = load_deployment_info()
+    if deployment is None:
+        deployment = load_deployment_info()
     vault_address = deployment['addresses']['vault']
     vault_abi = load_contract_abi('SafeAgentVault')
 
     return w3.eth.contract(address=vault_address, abi=vault_abi)
 
+@dataclass
+class ChainContext:
+    """Deployment info and the chain handles built from it (see connect())."""
+    deployment: Dict[str, Any]
+    w3: Any
+    vault: Any
+
+def connect(rpc_url=None, deployment: Optional[Dict[str, Any]] = None) -> ChainContext:
+    """
+    Startup path: read deployments/localhost.json once and build web3 and
+    the vault contract from it.
+    """
+    if deployment is None:
+        deployment = load_deployment_info()
+    w3 = create_web3_instance(rpc_url, deployment)
+    return ChainContext(deployment, w3, get_vault_contract(w3, deployment))
+
 def format_token_amount(amount, decimals=18):
-    """Format token amount from wei to human-readable."""
-    return float(amount) / (10 ** decimals)
+    """Format token amount from wei to human-readable (exact Decimal, see amounts.py)."""
+    return to_decimal(amount, decimals)
 
 def parse_token_amount(amount_str, decimals=18):
-    """Parse human-readable amount to wei."""
-    return int(float(amount_str) * (10 ** decimals))
+    """Parse human-readable amount to wei (exact, see amounts.py)."""
+    return parse_units(amount_str, decimals)
@@ -35,7 +35,7 @@ function AgentDetailView({ agent, agentData, loading, error, deployment, vault }
   // Fetch Python agent runtime state (3-second polling)
   // Returns: data, connected, fetchError, needsApproval
   // NO offline prop — completely removed
-  const { data: runtimeState, connected, fetchError, needsApproval } = useAgentRuntime(3000);
+  const { data: runtimeState, connected, fetchError, needsApproval } = useAgentRuntime(3000, agent?.address);
 
   // Local state for agent controls
   const [localEnabled, setLocalEnabled] = useState(agent?.enabled ?? true);
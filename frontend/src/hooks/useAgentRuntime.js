@@ -6,10 +6,20 @@ import { useState, useEffect, useRef } from 'react';
  */
 export const AGENT_API_BASE = 'http://localhost:8888';
 
+/**
+ * Server-sent events from agent_py/status_server.py (state deltas pushed as
+ * loop_agent writes them, tagged with the agent they belong to). Polling
+ * state.json remains the fallback.
+ */
+export const AGENT_EVENTS_URL = 'http://localhost:8000/events';
+
 /**
  * useAgentRuntime Hook
  *
- * Polls state.json from the Python agent server.
+ * Subscribes to the status server's event stream (snapshot + deltas) for
+ * one agent and polls state.json from the Python agent server while the
+ * stream is down. With several agents publishing to the same server, only
+ * agentAddress's records are applied.
  *
  * Returns:
  *   data           — the raw state.json object (null until first successful fetch)
@@ -26,20 +36,76 @@ export const AGENT_API_BASE = 'http://localhost:8888';
  * There is NO offline gating. If data was fetched at least once, connected=true.
  * The approval modal is NEVER blocked by connection status.
  */
-export function useAgentRuntime(pollInterval = 3000) {
+export function useAgentRuntime(pollInterval = 3000, agentAddress = null) {
   const [data, setData] = useState(null);
   const [connected, setConnected] = useState(false);
   const [fetchError, setFetchError] = useState(null);
   const [needsApproval, setNeedsApproval] = useState(false);
   const failCount = useRef(0);
+  const streaming = useRef(false);
 
   useEffect(() => {
     let cancelled = false;
+    let current = null;
+    const agentKey = agentAddress ? agentAddress.toLowerCase() : null;
+    let followed = agentKey;
+
+    const applyState = (state) => {
+      current = state;
+      // Successfully fetched — mark connected, clear errors
+      setData(state);
+      setConnected(true);
+      setFetchError(null);
+      failCount.current = 0;
+
+      // --- Approval detection (broadened) ---
+      const actionIsPending = state.decision?.action === 'REQUEST_PENDING';
+      const statusHasApproval =
+        typeof state.status === 'string' &&
+        state.status.toUpperCase().includes('APPROVAL');
+      const intentIsSwap =
+        state.intent != null && state.intent.action === 'SWAP';
+
+      setNeedsApproval(actionIsPending || statusHasApproval || intentIsSwap);
+    };
+
+    // Push channel: EventSource reconnects by itself and resends
+    // Last-Event-ID, so the server replays missed deltas (or a snapshot)
+    let events = null;
+    if (typeof EventSource !== 'undefined') {
+      events = new EventSource(
+        agentKey ? `${AGENT_EVENTS_URL}?agent=${encodeURIComponent(agentKey)}` : AGENT_EVENTS_URL
+      );
+      events.onopen = () => { streaming.current = true; };
+      events.onerror = () => { streaming.current = false; };
+      events.addEventListener('snapshot', (e) => {
+        const { states } = JSON.parse(e.data);
+        // Without an address, follow the server's only agent
+        const keys = Object.keys(states || {});
+        followed = agentKey ?? (keys.length === 1 ? keys[0] : null);
+        const state = followed !== null ? states[followed] : null;
+        if (!cancelled && state && Object.keys(state).length > 0) applyState(state);
+      });
+      events.addEventListener('delta', (e) => {
+        if (cancelled) return;
+        const { agent, changed, removed } = JSON.parse(e.data);
+        // The first agent to publish to an empty server
+        if (followed === null) followed = agent;
+        if (agent !== followed) return;
+        const next = { ...(current || {}), ...changed };
+        removed.forEach((key) => { delete next[key]; });
+        applyState(next);
+      });
+    }
 
     const fetchState = async () => {
+      // The stream is live: nothing to poll
+      if (streaming.current && current) return;
       try {
+        // no-cache: revalidate every poll with If-None-Match, so an unchanged
+        // state.json comes back as a bodiless 304 (tools/server.py ETags)
         const response = await fetch(`${AGENT_API_BASE}/agent_py/state.json`, {
-          cache: 'no-store',
+          cache: 'no-cache',
         });
 
         if (!response.ok) {
@@ -49,21 +115,7 @@ export function useAgentRuntime(pollInterval = 3000) {
         const state = await response.json();
         if (cancelled) return;
 
-        // Successfully fetched — mark connected, clear errors
-        setData(state);
-        setConnected(true);
-        setFetchError(null);
-        failCount.current = 0;
-
-        // --- Approval detection (broadened) ---
-        const actionIsPending = state.decision?.action === 'REQUEST_PENDING';
-        const statusHasApproval =
-          typeof state.status === 'string' &&
-          state.status.toUpperCase().includes('APPROVAL');
-        const intentIsSwap =
-          state.intent != null && state.intent.action === 'SWAP';
-
-        setNeedsApproval(actionIsPending || statusHasApproval || intentIsSwap);
+        applyState(state);
       } catch (err) {
         if (cancelled) return;
         failCount.current += 1;
@@ -84,8 +136,10 @@ export function useAgentRuntime(pollInterval = 3000) {
     return () => {
       cancelled = true;
       clearInterval(interval);
+      if (events) events.close();
+      streaming.current = false;
     };
-  }, [pollInterval]);
+  }, [pollInterval, agentAddress]);
 
   return { data, connected, fetchError, needsApproval };
 }
@@ -0,0 +1,184 @@
+"""
+SafeAgentVault HTTP Server - ASGI 模式
+=======================================
+
+与 server.py 提供相同的端点，但作为纯 ASGI 应用运行在 uvicorn 的多个
+worker 进程上（每个进程一个事件循环），不经过 Flask / WSGI：
+
+  - 热文件（state.json 等）直接从 serving.HOT_FILES 的内存缓存发送，
+    304 / gzip / br 与 Flask 模式一致
+  - 大文件：服务器支持 ASGI `http.response.pathsend` 扩展时交给服务器
+    零拷贝发送（sendfile），否则分块流式读取
+  - 访问日志缓冲批量写出（ACCESS_LOG，见 serving.AccessLog）
+
+运行方式：
+  python3 tools/server.py --asgi --workers 4
+  # 或直接用 uvicorn:
+  uvicorn asgi_server:app --app-dir tools --workers 4 --no-access-log --port 8888
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from serving import HOT_FILES, ROUTES, AccessLog, content_type, negotiate, resolve
+
+ACCESS_LOG = AccessLog()
+
+# 大文件分块读取大小
+CHUNK_SIZE = 256 * 1024
+
+CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+]
+
+PREFLIGHT_HEADERS = CORS_HEADERS + [
+    (b'access-control-allow-methods', b'GET, HEAD, OPTIONS'),
+    (b'access-control-allow-headers', b'*'),
+    (b'access-control-max-age', b'86400'),
+]
+
+# 长前缀优先（frontend/public 不会被当成 frontend）
+_PREFIXES = sorted(ROUTES, key=len, reverse=True)
+
+
+def _json_body(data):
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+INDEX_BODY = _json_body({
+    "service": "SafeAgentVault HTTP Server",
+    "status": "running",
+    "cors": "enabled",
+    "mode": "asgi",
+    "endpoints": {
+        "agent_state": "http://localhost:8888/agent_py/state.json",
+        "agents_config": "http://localhost:8888/deployments/agents.local.json",
+        "frontend_public": "http://localhost:8888/frontend/public/..."
+    }
+})
+HEALTH_BODY = _json_body({"status": "ok", "cors": "enabled"})
+NOT_FOUND_BODY = _json_body({"error": "File not found", "message": "请检查文件路径是否正确"})
+
+
+def _split(path):
+    """URL 路径 -> (prefix, filename)；不属于任何前缀返回 (None, None)。"""
+    path = path.lstrip('/')
+    for prefix in _PREFIXES:
+        if path.startswith(prefix + '/'):
+            return prefix, path[len(prefix) + 1:]
+    return None, None
+
+
+def _header(scope, name):
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+async def _respond(send, status, headers, body, head=False):
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': b'' if head else body})
+
+
+async def _send_large(scope, send, path, head):
+    """大文件：优先 pathsend（零拷贝），否则分块读取。"""
+    st = os.stat(path)
+    headers = CORS_HEADERS + [
+        (b'content-type', content_type(path).encode()),
+        (b'content-length', str(st.st_size).encode()),
+        (b'last-modified', time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(st.st_mtime)).encode()),
+    ]
+    await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+    if head:
+        await send({'type': 'http.response.body', 'body': b''})
+        return st.st_size
+    if 'http.response.pathsend' in scope.get('extensions', {}):
+        await send({'type': 'http.response.pathsend', 'path': path})
+        return st.st_size
+
+    loop = asyncio.get_running_loop()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = await loop.run_in_executor(None, f.read, CHUNK_SIZE)
+            more = len(chunk) == CHUNK_SIZE
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': more})
+            if not more:
+                break
+    return st.st_size
+
+
+async def _serve(scope, send):
+    """一个 HTTP 请求 -> (status, size)。"""
+    method = scope['method']
+    path = scope['path']
+    head = method == 'HEAD'
+
+    if method == 'OPTIONS':
+        await _respond(send, 204, PREFLIGHT_HEADERS, b'')
+        return 204, 0
+    if method not in ('GET', 'HEAD'):
+        await _respond(send, 405, CORS_HEADERS + [(b'allow', b'GET, HEAD, OPTIONS')], b'')
+        return 405, 0
+
+    if path == '/':
+        body = INDEX_BODY
+    elif path == '/health':
+        body = HEALTH_BODY
+    else:
+        body = None
+    if body is not None:
+        await _respond(send, 200, CORS_HEADERS + [(b'content-type', b'application/json')], body, head)
+        return 200, len(body)
+
+    prefix, filename = _split(path)
+    file_path = resolve(prefix, filename) if prefix else None
+    entry = None
+    if file_path is not None:
+        try:
+            entry = HOT_FILES.get(file_path)
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            file_path = None
+    if file_path is None:
+        await _respond(send, 404, CORS_HEADERS + [(b'content-type', b'application/json')], NOT_FOUND_BODY, head)
+        return 404, len(NOT_FOUND_BODY)
+    if entry is None:
+        return 200, await _send_large(scope, send, file_path, head)
+
+    status, headers, body = negotiate(
+        entry, _header(scope, b'accept-encoding'), _header(scope, b'if-none-match'))
+    raw = CORS_HEADERS + [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+    if status == 200:
+        raw.append((b'content-length', str(len(body)).encode()))
+    await _respond(send, status, raw, body, head)
+    return status, len(body)
+
+
+async def app(scope, receive, send):
+    """ASGI 入口。"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                ACCESS_LOG.flush()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+
+    started = time.perf_counter()
+    try:
+        status, size = await _serve(scope, send)
+    except Exception as e:
+        status, size = 500, 0
+        body = _json_body({"error": "Internal server error", "message": str(e)})
+        try:
+            await _respond(send, 500, CORS_HEADERS + [(b'content-type', b'application/json')], body)
+        except Exception:
+            pass  # 响应头已发出
+    ACCESS_LOG.log(scope['method'], scope['path'], status, size, (time.perf_counter() - started) * 1000)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+SafeAgentVault HTTP Server - 压测脚本
+=====================================
+
+用 asyncio 开 N 个 keep-alive 连接（HTTP/1.1，无第三方依赖）轮流请求
+各路径，持续 --duration 秒，按路径输出 rps、p50 / p99 延迟和状态码分布。
+
+运行方式：
+  # 先启动服务（任选一种）
+  python3 tools/server.py
+  python3 tools/server.py --asgi --workers 4
+
+  python3 tools/loadtest.py --connections 64 --duration 10
+  python3 tools/loadtest.py --revalidate      # 带 If-None-Match（前端轮询的常态：304）
+  python3 tools/loadtest.py --gzip            # Accept-Encoding: gzip
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = [
+    '/agent_py/state.json',
+    '/deployments/agents.local.json',
+]
+
+
+class PathStats:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.bytes = 0
+        self.errors = 0
+
+
+async def _read_response(reader):
+    """读取一个响应 -> (status, headers, body)。支持 Content-Length 和 chunked。"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        key, _, value = line.decode('latin-1').partition(':')
+        headers[key.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        body = bytearray()
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                await reader.readline()
+                break
+            body += await reader.readexactly(size)
+            await reader.readline()
+        return status, headers, bytes(body)
+    length = int(headers.get('content-length', 0))
+    body = await reader.readexactly(length) if length and status not in (204, 304) else b''
+    return status, headers, body
+
+
+async def _worker(host, port, paths, offset, deadline, stats, args):
+    etags = {}
+    reader = writer = None
+    i = offset
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        lines = [f'GET {path} HTTP/1.1', f'Host: {host}:{port}', 'Connection: keep-alive']
+        if args.gzip:
+            lines.append('Accept-Encoding: gzip')
+        if args.revalidate and path in etags:
+            lines.append(f'If-None-Match: {etags[path]}')
+        request = ('\r\n'.join(lines) + '\r\n\r\n').encode()
+
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(request)
+            status, headers, body = await _read_response(reader)
+        except (OSError, ConnectionError, ValueError, IndexError, asyncio.IncompleteReadError):
+            stats[path].errors += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.01)
+            continue
+        elapsed = time.perf_counter() - started
+
+        s = stats[path]
+        s.latencies.append(elapsed)
+        s.statuses[status] += 1
+        s.bytes += len(body)
+        if 'etag' in headers:
+            etags[path] = headers['etag']
+        if headers.get('connection', '').lower() == 'close':
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run(args):
+    url = urlsplit(args.url)
+    host, port = url.hostname or '127.0.0.1', url.port or 80
+    paths = args.paths or DEFAULT_PATHS
+    stats = {path: PathStats() for path in paths}
+
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(
+        _worker(host, port, paths, n, deadline, stats, args) for n in range(args.connections)
+    ))
+    elapsed = time.perf_counter() - started
+
+    total = sum(len(s.latencies) for s in stats.values())
+    print(f"\n📊 {args.url}  连接数={args.connections}  时长={elapsed:.1f}s"
+          f"  revalidate={args.revalidate}  gzip={args.gzip}")
+    print("-" * 92)
+    print(f"{'path':<36}{'requests':>10}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}  status")
+    for path, s in stats.items():
+        latencies = sorted(s.latencies)
+        codes = ' '.join(f"{code}x{count}" for code, count in sorted(s.statuses.items()))
+        print(f"{path:<36}{len(latencies):>10}{len(latencies) / elapsed:>10.0f}"
+              f"{_percentile(latencies, 0.50) * 1000:>10.2f}{_percentile(latencies, 0.99) * 1000:>10.2f}"
+              f"{s.errors:>8}  {codes}")
+    all_latencies = sorted(l for s in stats.values() for l in s.latencies)
+    print("-" * 92)
+    print(f"{'total':<36}{total:>10}{total / elapsed:>10.0f}"
+          f"{_percentile(all_latencies, 0.50) * 1000:>10.2f}{_percentile(all_latencies, 0.99) * 1000:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SafeAgentVault HTTP Server 压测")
+    parser.add_argument('--url', default='http://127.0.0.1:8888', help='服务地址')
+    parser.add_argument('--paths', nargs='+', help=f'请求路径（默认 {" ".join(DEFAULT_PATHS)}）')
+    parser.add_argument('--connections', type=int, default=32, help='并发 keep-alive 连接数')
+    parser.add_argument('--duration', type=float, default=10.0, help='持续秒数')
+    parser.add_argument('--revalidate', action='store_true', help='带 If-None-Match 重新验证（期望 304）')
+    parser.add_argument('--gzip', action='store_true', help='Accept-Encoding: gzip')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -8,11 +8,15 @@ SafeAgentVault - CORS-enabled HTTP Server
   解决前端 (localhost:5173) 访问后端文件 (localhost:8888) 的跨域问题。
 
 依赖安装：
-  pip install flask flask-cors
+  pip install flask flask-cors          # ASGI 模式另需 uvicorn（agent_py/requirements.txt 已包含）
 
 运行方式：
   cd ~/Desktop/safe-agent-v4
-  python3 server.py
+  python3 tools/server.py                      # Flask 开发服务器
+  python3 tools/server.py --asgi --workers 4   # ASGI（uvicorn 多进程）
+
+  访问日志缓冲输出（ACCESS_LOG=off 关闭，ACCESS_LOG=<文件> 写文件）。
+  压测: python3 tools/loadtest.py --duration 10 --connections 64
 
 访问测试：
   curl -i http://localhost:8888/agent_py/state.json
@@ -22,12 +26,25 @@ SafeAgentVault - CORS-enabled HTTP Server
   - HTTP 200 响应
   - 包含 Access-Control-Allow-Origin: * header
   - 前端可正常 fetch 数据
+
+缓存：
+  小文件（state.json、agents.local.json 等）按 mtime 缓存在内存中，
+  带强 ETag；If-None-Match 命中时返回 304（无 body、无磁盘读取）。
+  gzip（安装了 brotli 时还有 br）在每个文件版本只压缩一次。
+    curl -i --compressed http://localhost:8888/agent_py/state.json
+    curl -i -H 'If-None-Match: "<etag>"' http://localhost:8888/agent_py/state.json
 """
 
-from flask import Flask, send_from_directory, jsonify
+from flask import Flask, Response, abort, g, jsonify, request, send_from_directory
 from flask_cors import CORS
+import argparse
+import logging
 import os
-from pathlib import Path
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from serving import HOT_FILES, PROJECT_ROOT, AccessLog, negotiate, resolve
 
 # 初始化 Flask 应用
 app = Flask(__name__)
@@ -35,14 +52,41 @@ app = Flask(__name__)
 # 启用 CORS，允许所有来源访问
 CORS(app, resources={r"/*": {"origins": "*"}})
 
-# 项目根目录
-PROJECT_ROOT = Path(__file__).resolve().parent
+# 缓冲的访问日志（不再每个请求 print 一行）
+ACCESS_LOG = AccessLog()
+
+
+def serve_file(prefix, filename):
+    """
+    从内存缓存提供文件：强 ETag、304、预压缩的 gzip / br（见 serving.py）。
+    """
+    path = resolve(prefix, filename)
+    if path is None:
+        abort(404)
+    try:
+        entry = HOT_FILES.get(path)
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        abort(404)
+    if entry is None:
+        # 大文件：直接从磁盘发送
+        return send_from_directory(os.path.dirname(path), os.path.basename(path))
+
+    status, headers, body = negotiate(
+        entry, request.headers.get('Accept-Encoding'), request.headers.get('If-None-Match'))
+    return Response(body, status=status, headers=headers)
+
+
+@app.before_request
+def _start_timer():
+    g.started = time.perf_counter()
 
-# 日志：启动时打印项目路径
-print(f"📁 项目根目录: {PROJECT_ROOT}")
-print(f"🌐 服务地址: http://localhost:8888")
-print(f"✅ CORS 已启用: Access-Control-Allow-Origin: *")
-print("-" * 60)
+
+@app.after_request
+def _access_log(response):
+    ACCESS_LOG.log(request.method, request.path, response.status_code,
+                   response.calculate_content_length() or 0,
+                   (time.perf_counter() - g.get('started', time.perf_counter())) * 1000)
+    return response
 
 
 @app.route('/agent_py/<path:filename>')
@@ -51,9 +95,7 @@ def serve_agent_py(filename):
     提供 agent_py/ 目录下的文件
     例如: /agent_py/state.json
     """
-    agent_py_dir = PROJECT_ROOT / 'agent_py'
-    print(f"📄 请求文件: /agent_py/{filename}")
-    return send_from_directory(agent_py_dir, filename)
+    return serve_file('agent_py', filename)
 
 
 @app.route('/deployments/<path:filename>')
@@ -62,9 +104,7 @@ def serve_deployments(filename):
     提供 deployments/ 目录下的文件
     例如: /deployments/agents.local.json
     """
-    deployments_dir = PROJECT_ROOT / 'deployments'
-    print(f"📄 请求文件: /deployments/{filename}")
-    return send_from_directory(deployments_dir, filename)
+    return serve_file('deployments', filename)
 
 
 @app.route('/frontend/public/<path:filename>')
@@ -73,9 +113,7 @@ def serve_frontend_public(filename):
     提供 frontend/public/ 目录下的文件（可选）
     例如: /frontend/public/deployments/agents.local.json
     """
-    frontend_public_dir = PROJECT_ROOT / 'frontend' / 'public'
-    print(f"📄 请求文件: /frontend/public/{filename}")
-    return send_from_directory(frontend_public_dir, filename)
+    return serve_file('frontend/public', filename)
 
 
 @app.route('/')
@@ -125,7 +163,51 @@ def internal_error(error):
     }), 500
 
 
-if __name__ == '__main__':
+def run_asgi(host, port, workers):
+    """
+    异步多进程：每个 worker 一个事件循环，热文件直接从内存发送（asgi_server.py）。
+
+    多 worker 时由这里创建监听 socket：uvicorn 自己创建的 socket proto 为 0，
+    asyncio 因此不会给连接设置 TCP_NODELAY，keep-alive 连接上响应头和 body
+    分两次写出时会被 Nagle + 延迟 ACK 卡住约 40ms。
+    """
+    import socket
+    import uvicorn
+    from uvicorn.supervisors import Multiprocess
+
+    # asgi_server 与本文件同目录（已在 sys.path 中）
+    config = uvicorn.Config('asgi_server:app', host=host, port=port, workers=workers,
+                            access_log=False, log_level='warning')
+    server = uvicorn.Server(config)
+    if workers <= 1:
+        server.run()
+        return
+
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    try:
+        Multiprocess(config, target=server.run, sockets=[sock]).run()
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SafeAgentVault CORS-enabled HTTP Server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8888)
+    parser.add_argument('--asgi', action='store_true',
+                        help='ASGI 模式（uvicorn 多进程，见 asgi_server.py），替代 Flask 开发服务器')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='ASGI 模式的 worker 进程数（默认 CPU 核数）')
+    args = parser.parse_args()
+
+    print(f"📁 项目根目录: {PROJECT_ROOT}")
+    print(f"🌐 服务地址: http://localhost:{args.port}")
+    print(f"✅ CORS 已启用: Access-Control-Allow-Origin: *")
+    print("-" * 60)
     print("\n🚀 启动 SafeAgentVault HTTP Server...")
     print("📋 可用端点:")
     print("   - http://localhost:8888/")
@@ -134,8 +216,20 @@ if __name__ == '__main__':
     print("   - http://localhost:8888/health")
     print("\n⚠️  按 Ctrl+C 停止服务\n")
 
+    if args.asgi:
+        print(f"⚡ ASGI 模式: uvicorn, {args.workers} 个 worker")
+        run_asgi(args.host, args.port, args.workers)
+        return
+
     # 启动 Flask 服务
     # debug=False: 生产模式
     # host='0.0.0.0': 允许外部访问（可选，默认 127.0.0.1 仅本地）
-    # port=8888: 监听端口
-    app.run(host='127.0.0.1', port=8888, debug=False)
+    # threaded=True: 每个请求一个线程（Flask 开发服务器）
+    # 每请求一行的 werkzeug 日志由 ACCESS_LOG 取代
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    # 注意：开发服务器每个响应后都关闭连接（无 keep-alive），高并发请用 --asgi
+    app.run(host=args.host, port=args.port, debug=False, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
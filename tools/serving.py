@@ -0,0 +1,229 @@
+"""
+SafeAgentVault HTTP Server - 共享的文件服务组件
+================================================
+
+server.py（Flask 开发模式）和 asgi_server.py（ASGI 多进程模式）共用：
+
+  - HotFileCache: 小文件按 (mtime_ns, size) 缓存在内存中，每个版本只读一次
+    磁盘、算一次强 ETag、压缩一次（gzip，安装了 brotli 时还有 br）
+  - negotiate(): If-None-Match -> 304，按 Accept-Encoding 选择预压缩变体
+  - AccessLog: 缓冲的访问日志，后台线程批量写出，请求路径上不做 I/O
+  - ROUTES: URL 前缀 -> 项目目录
+"""
+import gzip
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+try:
+    import brotli  # 可选依赖：pip install brotli
+except ImportError:
+    brotli = None
+
+# 项目根目录（本文件位于 tools/ 下；也兼容直接放在根目录运行）
+_HERE = Path(__file__).resolve().parent
+PROJECT_ROOT = _HERE.parent if _HERE.name == 'tools' else _HERE
+
+# URL 前缀 -> 提供文件的目录
+ROUTES = {
+    'agent_py': PROJECT_ROOT / 'agent_py',
+    'deployments': PROJECT_ROOT / 'deployments',
+    'frontend/public': PROJECT_ROOT / 'frontend' / 'public',
+}
+
+# 永不提供的文件（决策历史等 SQLite 数据库及其 WAL/SHM/日志文件）
+PRIVATE_SUFFIXES = ('.db', '.db-wal', '.db-shm', '.db-journal', '.sqlite', '.sqlite3')
+
+# ========== 热文件缓存 ==========
+# 不超过此大小的文件缓存在内存中（更大的文件直接从磁盘发送）
+HOT_FILE_MAX_BYTES = 1024 * 1024
+HOT_FILE_MAX_ENTRIES = 64
+# 小于此大小不压缩（压缩收益抵不过头部开销）
+MIN_COMPRESS_BYTES = 256
+
+
+class HotFileCache:
+    """
+    小文件的内存缓存，按 (mtime_ns, size) 失效。
+
+    每个文件版本只读一次磁盘、算一次 ETag、压缩一次；之后的请求只做一次
+    stat()。条目: path -> {key, etag, body, gzip, br, mimetype}
+    """
+
+    def __init__(self, max_entries=HOT_FILE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def get(self, path):
+        """返回 path 当前版本的缓存条目；文件过大返回 None，不存在抛 FileNotFoundError。"""
+        st = os.stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry['key'] == key:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry
+        if st.st_size > HOT_FILE_MAX_BYTES:
+            return None
+
+        with open(path, 'rb') as f:
+            # 文件可能刚被替换（loop_agent 原子 rename）：以打开的这个版本为准
+            st = os.fstat(f.fileno())
+            body = f.read()
+        entry = self._build(body, (st.st_mtime_ns, st.st_size), path)
+        with self.lock:
+            self.entries[path] = entry
+            self.entries.move_to_end(path)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.loads += 1
+        return entry
+
+    @staticmethod
+    def _build(body, key, path):
+        digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        entry = {
+            'key': key,
+            'etag': digest,
+            'body': body,
+            'gzip': None,
+            'br': None,
+            'mimetype': content_type(path),
+        }
+        if len(body) >= MIN_COMPRESS_BYTES:
+            entry['gzip'] = gzip.compress(body, compresslevel=6, mtime=0)
+            if brotli is not None:
+                entry['br'] = brotli.compress(body)
+        return entry
+
+
+HOT_FILES = HotFileCache()
+
+
+def content_type(path):
+    """按扩展名猜测 Content-Type（JSON 是热路径，直接判断）。"""
+    if path.endswith('.json'):
+        return 'application/json'
+    import mimetypes
+    return mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+
+def resolve(prefix, filename):
+    """URL 前缀 + 文件名 -> 安全的绝对路径（越界、未知前缀或数据库文件返回 None）。"""
+    directory = ROUTES.get(prefix)
+    if directory is None:
+        return None
+    root = os.path.realpath(directory)
+    path = os.path.realpath(os.path.join(root, filename))
+    if path != root and not path.startswith(root + os.sep):
+        return None
+    if path.lower().endswith(PRIVATE_SUFFIXES):
+        return None
+    return path
+
+
+def etag_matches(header, etag):
+    """If-None-Match 是否包含此版本（任一编码变体的 ETag 都算）。"""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        if tag == etag or tag.startswith(etag + '-'):
+            return True
+    return False
+
+
+def negotiate(entry, accept_encoding, if_none_match):
+    """
+    缓存条目 -> (status, headers, body)。
+
+    按 Accept-Encoding 选择预压缩变体（br 优先）；If-None-Match 命中时
+    返回 304 和空 body。
+    """
+    accept = accept_encoding or ''
+    encoding = None
+    if entry['br'] is not None and 'br' in accept:
+        encoding = 'br'
+    elif entry['gzip'] is not None and 'gzip' in accept:
+        encoding = 'gzip'
+    # 不同编码是不同的表示，强 ETag 需区分
+    etag = entry['etag'] if encoding is None else f"{entry['etag']}-{encoding}"
+
+    headers = {
+        'ETag': f'"{etag}"',
+        # 每次都要重新验证，但未变化时只需 304
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding',
+    }
+    if etag_matches(if_none_match, entry['etag']):
+        return 304, headers, b''
+
+    headers['Content-Type'] = entry['mimetype']
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+        return 200, headers, entry[encoding]
+    return 200, headers, entry['body']
+
+
+# ========== 访问日志 ==========
+
+class AccessLog:
+    """
+    缓冲的访问日志。
+
+    log() 只把一行追加到内存缓冲；后台线程每 flush_interval 秒（或缓冲满
+    max_lines 行时）一次性写出，请求路径上没有 stdout / 文件 I/O。
+    ACCESS_LOG=off 关闭，ACCESS_LOG=<路径> 写入文件，默认写 stdout。
+    """
+
+    def __init__(self, target=None, flush_interval=1.0, max_lines=1000):
+        target = os.getenv('ACCESS_LOG', '-') if target is None else target
+        self.enabled = target.lower() not in ('off', '0', 'none', '')
+        self.flush_interval = flush_interval
+        self.max_lines = max_lines
+        self._lines = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stream = None
+        if self.enabled:
+            self._stream = sys.stdout if target == '-' else open(target, 'a', buffering=1024 * 1024)
+            threading.Thread(target=self._run, name='access-log', daemon=True).start()
+
+    def log(self, method, path, status, size, duration_ms):
+        if not self.enabled:
+            return
+        line = f"{time.strftime('%H:%M:%S')} {method} {path} {status} {size}B {duration_ms:.2f}ms\n"
+        with self._lock:
+            self._lines.append(line)
+            full = len(self._lines) >= self.max_lines
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        with self._lock:
+            lines, self._lines = self._lines, []
+        if lines and self._stream is not None:
+            self._stream.write(''.join(lines))
+            self._stream.flush()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                pass
@@ -0,0 +1,148 @@
+"""
+文件服务测试：server.py（Flask）与 asgi_server.py（ASGI）对同一批请求必须给出
+相同的 ETag / 304 / 压缩 / 404 结果；热文件按 mtime 失效，越界路径一律 404。
+
+运行：python -m pytest -q tools
+"""
+import asyncio
+import gzip
+import os
+
+import pytest
+
+import asgi_server
+import server
+import serving
+from serving import AccessLog, HotFileCache
+
+STATE = b'{"status": "running", "loop_count": 1, "pad": "' + b'x' * 600 + b'"}'
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    """agent_py 前缀指向临时目录，两个服务共用一个新的热文件缓存。"""
+    root = tmp_path / "agent_py"
+    root.mkdir()
+    (root / "state.json").write_bytes(STATE)
+    (root / "big.bin").write_bytes(os.urandom(serving.HOT_FILE_MAX_BYTES + asgi_server.CHUNK_SIZE + 1))
+    (root / "history.db").write_bytes(b"SQLite format 3\x00")
+    (tmp_path / "secret.txt").write_text("outside")
+
+    cache = HotFileCache()
+    monkeypatch.setitem(serving.ROUTES, "agent_py", root)
+    monkeypatch.setattr(server, "HOT_FILES", cache)
+    monkeypatch.setattr(asgi_server, "HOT_FILES", cache)
+    monkeypatch.setattr(server, "ACCESS_LOG", AccessLog("off"))
+    monkeypatch.setattr(asgi_server, "ACCESS_LOG", AccessLog("off"))
+    return root, cache
+
+
+def flask_get(path, method="GET", **headers):
+    response = server.app.test_client().open(path, method=method, headers=headers)
+    return response.status_code, {k.lower(): v for k, v in response.headers.items()}, response.get_data()
+
+
+def asgi_get(path, method="GET", extensions=None, **headers):
+    """直接驱动 ASGI app（不经过客户端的路径规范化）。"""
+    scope = {
+        "type": "http", "method": method, "path": path, "extensions": extensions or {},
+        "headers": [(k.replace("_", "-").lower().encode(), v.encode()) for k, v in headers.items()],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi_server.app(scope, receive, send))
+    start = messages[0]
+    headers = {k.decode(): v.decode() for k, v in start["headers"]}
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return start["status"], headers, body, messages
+
+
+def get(client, path, method="GET", **headers):
+    if client == "flask":
+        return flask_get(path, method, **{k.replace("_", "-"): v for k, v in headers.items()})
+    return asgi_get(path, method, **headers)[:3]
+
+
+@pytest.mark.parametrize("client", ["flask", "asgi"])
+def test_200_then_304_with_encoding_etag(files, client):
+    _, cache = files
+    status, headers, body = get(client, "/agent_py/state.json", Accept_Encoding="gzip")
+    assert status == 200 and headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body) == STATE
+    etag = headers["etag"]
+    assert etag.endswith('-gzip"') and headers["access-control-allow-origin"] == "*"
+
+    # The -gzip ETag (and the identity one, weak or not) revalidate the same version
+    for tag in (etag, etag.replace("-gzip", ""), "W/" + etag):
+        status, headers, body = get(client, "/agent_py/state.json", Accept_Encoding="gzip", If_None_Match=tag)
+        assert status == 304 and body == b"" and headers["etag"] == etag
+
+    status, headers, body = get(client, "/agent_py/state.json")
+    assert status == 200 and body == STATE and "content-encoding" not in headers
+    # One disk read for every request above
+    assert cache.loads == 1 and cache.hits >= 4
+
+
+@pytest.mark.parametrize("client", ["flask", "asgi"])
+def test_mtime_change_invalidates(files, client):
+    root, cache = files
+    _, headers, _ = get(client, "/agent_py/state.json")
+    old = headers["etag"]
+
+    path = root / "state.json"
+    path.write_bytes(STATE.replace(b'"loop_count": 1', b'"loop_count": 2'))
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    status, headers, body = get(client, "/agent_py/state.json", If_None_Match=old)
+    assert status == 200 and b'"loop_count": 2' in body and headers["etag"] != old
+    assert cache.loads == 2
+
+
+@pytest.mark.parametrize("client", ["flask", "asgi"])
+@pytest.mark.parametrize("path", [
+    "/agent_py/../secret.txt", "/agent_py/%2e%2e/secret.txt", "/agent_py/sub/../../secret.txt",
+    "/agent_py/missing.json", "/agent_py/history.db", "/nowhere/state.json",
+])
+def test_traversal_missing_and_private_files_are_404(files, client, path):
+    if client == "asgi":
+        # ASGI servers hand the app a percent-decoded path
+        path = path.replace("%2e", ".")
+    status, _, body = get(client, path)
+    assert status == 404 and b"outside" not in body
+
+
+@pytest.mark.parametrize("client", ["flask", "asgi"])
+def test_head_has_headers_without_body(files, client):
+    status, headers, body = get(client, "/agent_py/state.json", "HEAD")
+    assert status == 200 and body == b"" and headers["etag"]
+    status, headers, body = get(client, "/agent_py/big.bin", "HEAD")
+    assert status == 200 and body == b""
+    assert int(headers["content-length"]) == os.path.getsize(files[0] / "big.bin")
+
+
+def test_large_file_bypasses_cache(files):
+    root, cache = files
+    expected = (root / "big.bin").read_bytes()
+    status, _, body = flask_get("/agent_py/big.bin")
+    assert status == 200 and body == expected
+
+    # Streamed in CHUNK_SIZE pieces, or handed to the server with pathsend
+    status, headers, body, messages = asgi_get("/agent_py/big.bin")
+    chunks = -(-len(expected) // asgi_server.CHUNK_SIZE)
+    assert status == 200 and body == expected and len(messages) == 1 + chunks > 2
+    assert int(headers["content-length"]) == len(expected)
+    status, _, _, messages = asgi_get("/agent_py/big.bin", extensions={"http.response.pathsend": {}})
+    assert status == 200 and messages[-1] == {"type": "http.response.pathsend", "path": str(root / "big.bin")}
+    assert cache.loads == 0 and not cache.entries
+
+
+def test_asgi_rejects_writes(files):
+    status, headers, _, _ = asgi_get("/agent_py/state.json", "POST")
+    assert status == 405 and headers["allow"] == "GET, HEAD, OPTIONS"